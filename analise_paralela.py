@@ -0,0 +1,162 @@
+import base64
+import collections
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import instrumentacao
+import mime_local
+
+# Ordem dos campos no resultado compacto de uma mensagem
+_CAMPOS = ('id', 'assunto', 'remetente', 'destinatario', 'copia', 'data', 'data_ts', 'corpo_texto', 'corpo_html')
+
+
+def compacta(mensagem):
+    """
+    Reduz uma mensagem no formato 'raw' da API ao que o processo de análise
+    precisa: o ID e os bytes base64 da mensagem original. Uma tupla de str e
+    bytes é serializada para o processo sem o custo de um dicionário.
+
+    Args:
+        mensagem (dict): A mensagem retornada por messages.get com format='raw'.
+
+    Returns:
+        tuple[str, bytes]: O ID e a mensagem original em base64url.
+    """
+    return mensagem.get('id', ''), mensagem.get('raw', '').encode('ascii')
+
+
+def _analisa_lote(cargas, codificadas=True):
+    """
+    Analisa um lote de mensagens compactadas no processo de trabalho. Uma
+    mensagem que não pode ser analisada vira None em vez de interromper o lote.
+
+    Args:
+        cargas (list[tuple]): O ID (ou None) e os bytes de cada mensagem.
+        codificadas (bool, opcional): Se os bytes estão em base64url, como
+                                      no formato 'raw' da API. O padrão é True.
+
+    Returns:
+        list[tuple | None]: Os campos de _CAMPOS e os anexos, como tuplas.
+    """
+    resultados = []
+    for id_msg, bruto in cargas:
+        try:
+            dados = mime_local.analisa(base64.urlsafe_b64decode(bruto) if codificadas else bruto, id_msg)
+        except Exception:
+            resultados.append(None)
+            continue
+        anexos = tuple((a['filename'], a['mime_type'], a['tamanho']) for a in dados['anexos'])
+        resultados.append(tuple(dados[campo] for campo in _CAMPOS) + (anexos,))
+    return resultados
+
+
+def _expande(resultado, rotulos):
+    """
+    Converte o resultado compacto nos dados usados por `Email`.
+    """
+    dados = dict(zip(_CAMPOS, resultado))
+    dados['anexos'] = [{'filename': nome, 'mime_type': tipo, 'data': None, 'tamanho': tamanho}
+                       for nome, tipo, tamanho in resultado[-1]]
+    dados['rotulos'] = rotulos
+    return dados
+
+
+class AnalisadorParalelo:
+    """
+    Etapa de análise MIME de um pipeline de ingestão: recebe mensagens no
+    formato 'raw' da API (`analisa`) ou originais, como as de um mbox
+    (`analisa_brutas`), e devolve os dados de cada e-mail, na mesma ordem.
+
+    Com `processos` > 0, a análise (decodificação base64, parse MIME e
+    decodificação dos charsets, limitada pela CPU e pelo GIL) roda em um
+    pool de processos, em lotes. As mensagens vão para os processos em
+    forma compacta (ID e bytes) e os resultados voltam como tuplas. Até
+    2 lotes por processo ficam em andamento: a entrada é consumida aos
+    poucos, de modo que a busca das próximas mensagens na rede continua
+    enquanto as anteriores são analisadas.
+    """
+
+    def __init__(self, processos=0, lote=32):
+        """
+        Args:
+            processos (int, opcional): Processos de análise. 0 (padrão)
+                                       analisa na própria thread; None usa
+                                       o número de CPUs.
+            lote (int, opcional): Mensagens enviadas a um processo por vez.
+                                  O padrão é 32.
+        """
+        self.__processos = (os.cpu_count() or 1) if processos is None else processos
+        self.__lote = max(1, lote)
+
+    @property
+    def processos(self):
+        """Retorna o número de processos de análise (0: na própria thread)."""
+        return self.__processos
+
+    def analisa(self, mensagens):
+        """
+        Analisa as mensagens, mantendo a ordem da entrada.
+
+        Args:
+            mensagens (iterable[dict]): Mensagens no formato 'raw' da API.
+
+        Yields:
+            tuple[str, dict | None]: O ID e os dados de cada e-mail (ver
+                                     `mime_local.analisa`, com 'rotulos'),
+                                     ou None se a mensagem não pôde ser
+                                     analisada.
+        """
+        for lote, resultados in self.__lotes(mensagens, compacta, True):
+            for m, resultado in zip(lote, resultados):
+                yield m.get('id', ''), None if resultado is None else _expande(resultado, m.get('labelIds', []))
+
+    def analisa_brutas(self, brutas):
+        """
+        Analisa mensagens originais (RFC 822), mantendo a ordem da entrada.
+
+        Args:
+            brutas (iterable[bytes]): As mensagens, por exemplo lidas de um
+                                      mbox. O ID vem do Message-ID.
+
+        Yields:
+            dict | None: Os dados de cada e-mail (ver `mime_local.analisa`),
+                         ou None se a mensagem não pôde ser analisada.
+        """
+        for _, resultados in self.__lotes(brutas, lambda bruto: (None, bruto), False):
+            for resultado in resultados:
+                yield None if resultado is None else _expande(resultado, [])
+
+    def __lotes(self, itens, compacta_, codificadas):
+        """
+        Divide a entrada em lotes e entrega, em ordem, cada lote com os
+        resultados compactos da sua análise.
+        """
+        entrada = iter(itens)
+        lotes = iter(lambda: list(itertools.islice(entrada, self.__lote)), [])
+        if not self.__processos:
+            for lote in lotes:
+                cargas = [compacta_(item) for item in lote]
+                with instrumentacao.mede('analise.lote') as medida:
+                    medida.bytes = sum(len(bruto) for _, bruto in cargas)
+                    resultados = _analisa_lote(cargas, codificadas)
+                yield lote, resultados
+            return
+
+        pendentes = collections.deque()
+        with ProcessPoolExecutor(max_workers=self.__processos) as executor:
+            for lote in lotes:
+                cargas = [compacta_(item) for item in lote]
+                pendentes.append((lote, cargas, executor.submit(_analisa_lote, cargas, codificadas)))
+                if len(pendentes) >= 2 * self.__processos:
+                    yield self.__aguarda(*pendentes.popleft())
+            while pendentes:
+                yield self.__aguarda(*pendentes.popleft())
+
+    @staticmethod
+    def __aguarda(lote, cargas, futuro):
+        # O tempo parado aqui mostra se a análise é o gargalo do pipeline
+        with instrumentacao.mede('analise.espera') as medida:
+            medida.bytes = sum(len(bruto) for _, bruto in cargas)
+            resultados = futuro.result()
+        return lote, resultados
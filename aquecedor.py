@@ -0,0 +1,239 @@
+import contextlib
+import threading
+
+from repeticao import status_http
+
+
+class _Pausa(Exception):
+    """Interrompe a rodada em andamento: um comando começou ou o aquecedor foi fechado."""
+
+
+class AquecedorCache:
+    """
+    Mantém o cache atualizado enquanto o prompt está ocioso.
+
+    Uma thread em segundo plano lê as alterações da caixa a cada
+    `intervalo` segundos com history.list (sincronização incremental, a
+    partir do historyId de getProfile) e, quando há alterações, refaz a
+    listagem das `buscas` configuradas e baixa só as mensagens que ainda
+    não estão no cache. O resultado é registrado com `Email_Cache.aquece`,
+    e o próximo search= com a mesma query não acessa a API.
+
+    O trabalho é feito uma requisição por vez e para assim que um comando
+    acessa a API (`pausa`), sendo retomado quando a chamada termina. As
+    chamadas passam pelo limitador de cota do cliente, e o aquecedor também
+    espera enquanto a utilização da cota estiver acima de `utilizacao`,
+    deixando a cota para os comandos.
+    """
+
+    def __init__(self, client, cache, buscas=('label:unread',), limite=50, intervalo=30.0, utilizacao=0.5):
+        """
+        Inicializa o aquecedor e inicia a thread.
+
+        Args:
+            client (EmailClient): O cliente da API.
+            cache (Email_Cache): O cache atualizado.
+            buscas (iterable[str], opcional): Queries mantidas no cache. O
+                                              padrão é 'label:unread'.
+            limite (int, opcional): Mensagens mantidas por query. O padrão é 50.
+            intervalo (float, opcional): Segundos entre as leituras do
+                                         histórico. O padrão é 30.
+            utilizacao (float, opcional): Utilização da cota (0 a 1) acima da
+                                          qual o aquecedor espera. O padrão é 0.5.
+        """
+        self.__client = client
+        self.__cache = cache
+        self.__buscas = list(buscas)
+        self.__limite = limite
+        self.__intervalo = intervalo
+        self.__utilizacao = utilizacao
+        # Setado enquanto nenhum comando está em execução
+        self.__livre = threading.Event()
+        self.__livre.set()
+        self.__parar = threading.Event()
+        self.__trava = threading.Lock()
+        self.__history_id = None
+        # As buscas precisam ser refeitas (início ou alterações no histórico)
+        self.__pendente = True
+        self.__novas = set()
+        self.__sincronizacoes = 0
+        self.__baixadas = 0
+        self.__interrupcoes = 0
+        self.__erro = None
+        self.__thread = threading.Thread(target=self.__trabalha, name='aquecedor-cache', daemon=True)
+        self.__thread.start()
+
+    @contextlib.contextmanager
+    def pausa(self):
+        """
+        Contexto das chamadas de um comando em primeiro plano: o aquecedor
+        para antes da sua próxima requisição e só volta ao trabalho na saída.
+        Não deve envolver a espera pelo usuário.
+        """
+        self.__livre.clear()
+        try:
+            yield
+        finally:
+            self.__livre.set()
+
+    @property
+    def novas(self):
+        """Retorna quantas mensagens chegaram à caixa de entrada desde `zera_novas`."""
+        with self.__trava:
+            return len(self.__novas)
+
+    def zera_novas(self):
+        """
+        Marca as mensagens novas como vistas (por exemplo, após um search=).
+        """
+        with self.__trava:
+            self.__novas.clear()
+
+    def fecha(self):
+        """
+        Interrompe a rodada em andamento e encerra a thread. Não há nada a
+        gravar: a espera é curta para não atrasar a saída por uma
+        requisição em andamento.
+        """
+        self.__parar.set()
+        self.__livre.set()
+        self.__thread.join(1.0)
+
+    def estatisticas(self):
+        """
+        Returns:
+            dict: historyId atual, se as buscas ainda precisam ser refeitas
+                  (pendente), sincronizações feitas, mensagens baixadas,
+                  rodadas interrompidas por comandos, mensagens novas e o
+                  último erro.
+        """
+        with self.__trava:
+            return {'history_id': self.__history_id, 'pendente': self.__pendente,
+                    'sincronizacoes': self.__sincronizacoes, 'baixadas': self.__baixadas,
+                    'interrupcoes': self.__interrupcoes,
+                    'novas': len(self.__novas), 'erro': self.__erro}
+
+    def __trabalha(self):
+        """
+        Laço da thread: uma sincronização a cada intervalo, só com o prompt livre.
+        """
+        while not self.__parar.is_set():
+            self.__livre.wait()
+            try:
+                self.__sincroniza()
+                self.__erro = None
+            except _Pausa:
+                # Retoma assim que o comando terminar
+                with self.__trava:
+                    self.__interrupcoes += 1
+                continue
+            except Exception as error:
+                # Sem mensagens no console: o usuário pode estar digitando
+                self.__erro = str(error)
+            self.__parar.wait(self.__intervalo)
+
+    def __vez(self):
+        """
+        Chamado antes de cada requisição: interrompe a rodada se um comando
+        começou e espera a utilização da cota baixar.
+        """
+        limitador = self.__client.limitador
+        while True:
+            if self.__parar.is_set() or not self.__livre.is_set():
+                raise _Pausa()
+            if limitador is None or limitador.estatisticas()['utilizacao'] <= self.__utilizacao:
+                return
+            self.__parar.wait(0.5)
+
+    def __sincroniza(self):
+        """
+        Lê o histórico desde a última sincronização e, se houve alterações,
+        refaz as buscas aquecidas.
+        """
+        if self.__history_id is None:
+            self.__vez()
+            history_id = self.__client.obtem_perfil()['historyId']
+            with self.__trava:
+                self.__history_id = history_id
+                self.__pendente = True
+        else:
+            self.__vez()
+            try:
+                history_id, registros = self.__client.historico(self.__history_id)
+            except Exception as error:
+                if status_http(error) != 404:
+                    raise
+                # O histórico guardado pela API não alcança o último historyId
+                self.__cache.descarta_aquecidas()
+                with self.__trava:
+                    self.__history_id = None
+                return self.__sincroniza()
+            alterou = self.__aplica(registros)
+            with self.__trava:
+                self.__history_id = history_id
+                self.__pendente = self.__pendente or alterou
+                self.__sincronizacoes += 1
+
+        if not self.__pendente:
+            self.__cache.confirma_aquecidas()
+            return
+        aquecidas = [self.__aquece(query) for query in self.__buscas]
+        with self.__trava:
+            # Uma busca que falhou é refeita na próxima sincronização
+            self.__pendente = not all(aquecidas)
+
+    def __aplica(self, registros):
+        """
+        Aplica os registros do histórico ao cache e conta as mensagens novas
+        na caixa de entrada.
+
+        Returns:
+            bool: Se houve alguma alteração.
+        """
+        for registro in registros:
+            for item in registro.get('messagesAdded', []):
+                mensagem = item.get('message', {})
+                if 'INBOX' in mensagem.get('labelIds', []):
+                    with self.__trava:
+                        self.__novas.add(mensagem.get('id'))
+            for chave in ('labelsAdded', 'labelsRemoved'):
+                for item in registro.get(chave, []):
+                    mensagem = item.get('message', {})
+                    self.__cache.atualiza_rotulos(mensagem.get('id'), mensagem.get('labelIds', []))
+        return bool(registros)
+
+    def __aquece(self, query):
+        """
+        Lista os primeiros `limite` IDs da query, baixa os que faltam no
+        cache e registra o resultado.
+
+        Returns:
+            bool: Se o resultado foi registrado.
+        """
+        paginas = self.__client.paginas(query)
+        ids, completa = [], False
+        try:
+            while len(ids) < self.__limite:
+                self.__vez()
+                pagina = next(paginas, None)
+                if pagina is None:
+                    completa = True
+                    break
+                ids.extend(mensagem['id'] for mensagem in pagina[1])
+        finally:
+            paginas.close()
+        if len(ids) > self.__limite:
+            ids, completa = ids[:self.__limite], False
+
+        for id_msg in self.__cache.faltantes(ids):
+            self.__vez()
+            email_ = self.__client.obtem_email(id_msg)
+            if email_ is None:
+                # Resultado com buraco: a busca continua sendo feita na API
+                self.__cache.descarta_aquecidas(query)
+                return False
+            self.__cache.adiciona_emails([email_])
+            with self.__trava:
+                self.__baixadas += 1
+        self.__cache.aquece(query, ids, completa)
+        return True
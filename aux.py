@@ -2,12 +2,13 @@ import os
 import re
 import readline
 import sys
+import time
 from getpass import getpass as g
 from typing import Any
 
-import bcrypt
-
+import config
 from data_base import DataBase
+from indice_prefixo import IndiceFrecencia, IndicePrefixo
 
 
 class Hash_Pass:
@@ -41,6 +42,9 @@ class Hash_Pass:
         Returns:
             str: O hash da senha em formato de string.
         """
+        # Importado apenas quando usado, para acelerar a inicialização.
+        import bcrypt
+
         # Converte a senha de string (str) para bytes (b'), pois bcrypt
         # trabalha com este tipo de dado.
         senha_bytes = senha.encode('utf-8')
@@ -68,6 +72,8 @@ class Hash_Pass:
         Returns:
             bool: True se as senhas corresponderem, False caso contrário.
         """
+        import bcrypt
+
         # Converte a senha em texto puro para bytes.
         senha_bytes = senha.encode('utf-8')
 
@@ -81,6 +87,36 @@ class Hash_Pass:
         return bcrypt.checkpw(senha_bytes, hashed_bytes)
 
 
+# Instante de início do programa, usado para medir o tempo até o primeiro prompt
+_inicio = None
+
+
+def marca_inicio(instante):
+    """
+    Registra o instante (time.perf_counter) em que o programa começou.
+
+    Se o Python for executado com `-X importtime` ou com a variável de
+    ambiente EMAIL_CONSOLE_TEMPO_INICIO definida, o tempo até o primeiro
+    prompt é impresso em stderr, junto da saída do importtime.
+
+    Args:
+        instante (float): Valor de time.perf_counter() no início do programa.
+    """
+    global _inicio
+    if 'importtime' in sys._xoptions or os.environ.get('EMAIL_CONSOLE_TEMPO_INICIO'):
+        _inicio = instante
+
+
+def _primeiro_prompt():
+    """
+    Imprime o tempo até o primeiro prompt, apenas uma vez.
+    """
+    global _inicio
+    if _inicio is not None:
+        print(f'tempo até o primeiro prompt: {(time.perf_counter() - _inicio) * 1000:.1f} ms', file=sys.stderr)
+        _inicio = None
+
+
 def senha(mensagem):
     """
     Solicita uma senha ao usuário de forma segura.
@@ -91,17 +127,46 @@ def senha(mensagem):
     Returns:
         str: A senha digitada pelo usuário.
     """
+    _primeiro_prompt()
     senha = g(mensagem)
     return senha
 
 
+# Funções executadas por encerra_programa antes de fechar o banco de dados
+_ao_encerrar = []
+
+
+def ao_encerrar(funcao):
+    """
+    Registra uma função a ser chamada quando o programa for encerrado com
+    'quik', antes do fechamento do banco de dados (por exemplo, para gravar
+    dados pendentes de threads em segundo plano).
+
+    Args:
+        funcao (callable): Função sem argumentos.
+    """
+    _ao_encerrar.append(funcao)
+
+
+def finaliza(banco):
+    """
+    Executa as funções registradas em `ao_encerrar` e fecha o banco de dados.
+
+    Args:
+        banco (objeto): Instância do banco de dados, com `fecha_cnx()`.
+    """
+    for funcao in _ao_encerrar:
+        funcao()
+    banco.fecha_cnx()
+
+
 def encerra_programa(comando, banco):
     """
     Encerra o programa se o comando for 'quik'.
 
-    Esta função verifica se o comando fornecido é 'quik'. Se for, ela fecha
-    a conexão com o banco de dados e encerra a execução do script
-    e apaga os arquivos html gerados.
+    Esta função verifica se o comando fornecido é 'quik'. Se for, ela executa
+    as funções registradas em `ao_encerrar`, fecha a conexão com o banco de
+    dados, encerra a execução do script e apaga os arquivos html gerados.
 
     Args:
         comando (str): O comando fornecido pelo usuário.
@@ -109,7 +174,7 @@ def encerra_programa(comando, banco):
                         que possui um método `fecha_cnx()`.
     """
     if comando == 'quik':
-        banco.fecha_cnx()
+        finaliza(banco)
         os.system('del email_id_*' if os.name == 'nt' else 'rm email_id_*')
         print('programa encerrado')
         sys.exit(0)
@@ -132,9 +197,16 @@ class Autocomplete:
     Esta classe integra-se com o módulo 'readline' para fornecer
     funcionalidades de autocompletar para comandos, contatos e caminhos
     de arquivos.
+
+    Comandos e contatos são carregados do banco uma única vez para índices
+    em memória, evitando consultas SQL a cada TAB. O índice de contatos é
+    atualizado pelo próprio DataBase sempre que novos contatos são salvos e
+    ordena as sugestões por frecência.
     """
     __completados: list[Any]
     __data_base: DataBase
+    __indice_cmds: IndicePrefixo
+    __indice_contatos: IndiceFrecencia
 
     def __init__(self, data_base: DataBase):
         """
@@ -146,6 +218,10 @@ class Autocomplete:
         """
         self.__completados = []
         self.__data_base = data_base
+        self.__indice_cmds = IndicePrefixo(data_base.lista_cmds())
+        self.__indice_contatos = IndiceFrecencia(data_base.lista_contatos(),
+                                                 config.get('contatos_meia_vida_dias'))
+        data_base.set_indice_contatos(self.__indice_contatos)
         self.__configura_tab()
 
     def __configura_tab(self):
@@ -196,8 +272,8 @@ class Autocomplete:
                 except FileNotFoundError:
                     return None
             else:
-                self.__completados.extend(self.__data_base.busca_cmds(entrada))
-                self.__completados.extend(self.__data_base.busca_contatos(entrada))
+                self.__completados.extend(self.__indice_cmds.busca(entrada))
+                self.__completados.extend(self.__indice_contatos.busca(entrada))
         try:
             return self.__completados[estado] + ' '
         except Exception:
@@ -229,6 +305,17 @@ class Entrada:
         self.__query = None
         self.__limit = None
         self.__user = None
+        self.__timers = None
+        self.__formato = None
+        self.__destino = None
+        self.__retoma = False
+        self.__local = False
+        self.__conversas = False
+        self.__alvo = None
+        self.__rotulo = None
+        self.__exata = False
+        self.__contas = []
+        self.__conta = None
 
     def __filtra_entrada(self):
         """
@@ -256,6 +343,38 @@ class Entrada:
             self.__comando = 'search'
             self.__query = args.get('search')
             self.__limit = args.get('limit')
+            self.__local = args.get('local', '').lower() in ('on', 's', 'sim', 'yes')
+            self.__contas = args.get('acc', '').split()
+            if 'threads' in args:
+                self.__conversas = args.get('threads', '').lower() in ('on', 's', 'sim', 'yes')
+            else:
+                self.__conversas = config.get('busca_conversas')
+        elif 'count' in args:
+            self.__comando = 'count'
+            self.__query = args.get('count')
+            self.__exata = args.get('exact', '').lower() in ('on', 's', 'sim', 'yes')
+        elif 'export' in args:
+            self.__comando = 'export'
+            self.__query = args.get('export')
+            self.__limit = args.get('limit')
+            self.__formato = args.get('fmt', 'mbox')
+            self.__destino = args.get('out')
+            self.__retoma = args.get('resume', '').lower() in ('on', 's', 'sim', 'yes')
+        elif 'import' in args:
+            self.__comando = 'import'
+            arquivos_str = args.get('import', '')
+            if arquivos_str:
+                self.__arquivos = [f.rstrip('/') for f in arquivos_str.split()]
+        elif 'read' in args or 'unread' in args or 'archive' in args:
+            self.__comando = next(c for c in ('read', 'unread', 'archive') if c in args)
+            self.__alvo = args.get(self.__comando) or 'page'
+        elif 'label' in args or 'unlabel' in args:
+            self.__comando = 'label' if 'label' in args else 'unlabel'
+            self.__rotulo = args.get(self.__comando)
+            self.__alvo = args.get('em') or 'page'
+        elif 'account' in args:
+            self.__comando = 'account'
+            self.__conta = args.get('account') or None
         elif 'back' in args:
             self.__comando = 'back'
         elif 'quik' in args:
@@ -266,6 +385,11 @@ class Entrada:
             self.__comando = 'prev'
         elif 'next' in args:
             self.__comando = 'next'
+        elif 'stats' in args:
+            self.__comando = 'stats'
+        elif 'timers' in args:
+            self.__comando = 'timers'
+            self.__timers = args.get('timers')
         elif 'user' in args:
             self.__comando = 'user'
             self.__user = args.get('user')
@@ -293,18 +417,31 @@ class Entrada:
         Args:
             mensagem (str): A mensagem a ser exibida como prompt para o usuário.
         """
+        _primeiro_prompt()
         while True:
             try:
-                self.__entrada = input(mensagem)
-                if self.__entrada == 'S':
-                    self.__comando = 'S'
-                    return
-                # Chama a função para filtrar a entrada
-                self.__filtra_entrada()
+                self.interpreta(input(mensagem))
                 break
             except KeyboardInterrupt:
                 print('quik= para sair')
 
+    def interpreta(self, texto: str):
+        """
+        Interpreta uma linha de comando já lida, sem exibir prompt.
+
+        Usado por `entrada` e pelo modo em lote, que lê os comandos de um
+        arquivo (cada linha em uma instância própria de Entrada).
+
+        Args:
+            texto (str): A linha a interpretar (por exemplo, 'search= fatura limit= 10').
+        """
+        self.__entrada = texto
+        if self.__entrada == 'S':
+            self.__comando = 'S'
+            return
+        # Chama a função para filtrar a entrada
+        self.__filtra_entrada()
+
     @property
     def usuario(self):
         """
@@ -315,6 +452,129 @@ class Entrada:
         """
         return self.__user
 
+    @property
+    def timers(self) -> str | None:
+        """
+        Retorna o argumento do comando timers= ('on' ou 'off').
+
+        Returns:
+            str | None: O argumento, se houver, ou None.
+        """
+        return self.__timers
+
+    @property
+    def formato(self) -> str | None:
+        """
+        Retorna o formato de saída do export= ('mbox', 'jsonl' ou 'eml').
+
+        Returns:
+            str | None: O formato, se houver, ou None.
+        """
+        return self.__formato
+
+    @property
+    def destino(self) -> str | None:
+        """
+        Retorna o arquivo ou diretório de saída do export= (out=).
+
+        Returns:
+            str | None: O destino, se houver, ou None.
+        """
+        return self.__destino
+
+    @property
+    def retoma(self) -> bool:
+        """
+        Retorna se o export= deve retomar uma exportação interrompida (resume= on).
+
+        Returns:
+            bool: True para retomar.
+        """
+        return self.__retoma
+
+    @property
+    def local(self) -> bool:
+        """
+        Retorna se a busca deve ser feita só no cache local (local= on).
+
+        Returns:
+            bool: True para não acessar a API.
+        """
+        return self.__local
+
+    @property
+    def conversas(self) -> bool:
+        """
+        Retorna se a busca deve listar conversas em vez de mensagens (threads= on).
+
+        Returns:
+            bool: True para uma linha por conversa.
+        """
+        return self.__conversas
+
+    @property
+    def contas(self) -> list[str]:
+        """
+        Retorna as contas de search= (acc=), ou ['all'] para todas.
+
+        Returns:
+            list[str]: Os nomes; vazia busca só na conta ativa.
+        """
+        return self.__contas
+
+    @property
+    def conta(self) -> str | None:
+        """
+        Retorna a conta de account=.
+
+        Returns:
+            str | None: O nome da conta, ou None para listar as contas.
+        """
+        return self.__conta
+
+    @property
+    def exata(self) -> bool:
+        """
+        Retorna se o count= deve contar as mensagens uma a uma (exact= on).
+
+        Returns:
+            bool: True para a contagem exata em vez da estimativa.
+        """
+        return self.__exata
+
+    @property
+    def alvo(self) -> str | None:
+        """
+        Retorna os e-mails de uma ação em lote: 'page' (a página exibida),
+        'all' (todos os resultados) ou os índices exibidos (ex: '1 3 5').
+
+        Returns:
+            str | None: O alvo informado, ou None.
+        """
+        return self.__alvo
+
+    @property
+    def rotulo(self) -> str | None:
+        """
+        Retorna o nome do rótulo de label= ou unlabel=.
+
+        Returns:
+            str | None: O nome do rótulo, ou None.
+        """
+        return self.__rotulo
+
+    @property
+    def limite_exportacao(self) -> int | None:
+        """
+        Retorna o limite do export=, que, ao contrário da busca, não tem padrão.
+
+        Returns:
+            int | None: O limite convertido para inteiro, ou None (sem limite).
+        """
+        if self.__limit:
+            return int(self.__limit)
+        return None
+
     @property
     def limite(self) -> int:
         """
@@ -403,8 +663,22 @@ class Entrada:
         """
         ajuda = (
             '\nsend= {email@1 email@2} (1 ou mais) ass= OPCIONAL msg= OPCIONAL file= caminho para o arquivo OPCIONAL\n'
-            '\nshow= {N} (N é o indice do email a ser aberto)\n'
-            '\nsearch= query de busca gmail ex: label:uread (para não lidos) limit= N limite de busca OPCIONAL (padrão 50)\n'
+            '\nshow= {N} (N é o indice do email ou da conversa a ser aberta)\n'
+            '\nread= | unread= | archive= {page|all|N M ...} marca como lidos, não lidos ou arquiva os e-mails '
+            'da página (padrão), de todos os resultados ou os indicados\n'
+            '\nlabel= | unlabel= {rótulo} em= {page|all|N M ...} OPCIONAL adiciona ou remove um rótulo\n'
+            '\nsearch= query de busca gmail ex: label:uread (para não lidos) limit= N limite de busca OPCIONAL (padrão 50) '
+            'local= on OPCIONAL (só no cache local) threads= on|off OPCIONAL (uma linha por conversa) '
+            'acc= {all|conta1 conta2 ...} OPCIONAL (busca nas contas ao mesmo tempo, mais novos primeiro)\n'
+            '\naccount= {conta} troca a conta ativa (sem nome, lista as contas)\n'
+            '\ncount= query de busca conta as mensagens sem baixá-las (estimativa; exata para um único rótulo) '
+            'exact= on OPCIONAL (percorre todos os IDs)\n'
+            '\nexport= query de busca fmt= mbox|jsonl|eml OPCIONAL (padrão mbox) out= arquivo ou diretório '
+            'limit= N OPCIONAL resume= on OPCIONAL (continua uma exportação interrompida)\n'
+            '\nimport= {arquivo.mbox arquivo.eml diretório} importa mensagens para o cache local '
+            '(buscadas com search= ... local= on)\n'
+            '\nstats= resumo das chamadas à API e ao banco (latência, bytes, erros)\n'
+            '\ntimers= on|off liga ou desliga os cronômetros das funções críticas (vistos em stats=)\n'
             '\nuser= {usuario}\n'
             '\n{campos obrigatórios}\n'
             '\nprev= página previa de exibição\n'
@@ -0,0 +1,107 @@
+"""
+Mede a escala da análise MIME em processos (analise_paralela.py).
+
+- etapa: só a análise de mensagens 'raw' já baixadas, com 0 (na própria
+  thread), 1, 2, ... processos, em mensagens/s e aceleração sobre 0;
+- pipeline: EmailClient.baixa com o motor 'bruto' contra o Gmail falso com
+  latência, buscando em paralelo e analisando no pool;
+- carga: bytes serializados por mensagem enviados aos processos, na forma
+  compacta (ID e bytes) e como o dicionário da API, e na volta, em tuplas
+  e como dicionário.
+
+A aceleração só aparece com mais de uma CPU: o JSON traz cpu_count.
+
+Uso:
+    python benchmarks/bench_analise.py [--mensagens 2000] [--processos 0 1 2 4] [--latencia 0.002]
+                                       [--saida resultado.json]
+"""
+import argparse
+import json
+import os
+import pickle
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import analise_paralela  # noqa: E402
+import gmail_server  # noqa: E402
+from bench_gmail import versao  # noqa: E402
+from caixa_sintetica import GeradorCaixa  # noqa: E402
+from fake_gmail import GmailFalso  # noqa: E402
+
+
+def etapa(mensagens, processos, lote):
+    analisador = analise_paralela.AnalisadorParalelo(processos, lote)
+    inicio = time.perf_counter()
+    analisadas = sum(1 for _, dados in analisador.analisa(mensagens) if dados is not None)
+    duracao = time.perf_counter() - inicio
+    return {'mensagens': analisadas, 'segundos': round(duracao, 3),
+            'mensagens_por_s': round(analisadas / duracao, 1) if duracao else None}
+
+
+def pipeline(args, gerador, processos):
+    servico = GmailFalso(mensagens=args.mensagens, latencia=args.latencia, tamanho_pagina=500, gerador=gerador)
+    client = gmail_server.EmailClient(gmail_server.Email, service=servico)
+    client.set_limitador(None)
+    client.set_motor('bruto')
+    inicio = time.perf_counter()
+    baixadas = sum(1 for _ in client.baixa('in:inbox', args.mensagens, processos=processos))
+    duracao = time.perf_counter() - inicio
+    return {'mensagens': baixadas, 'segundos': round(duracao, 3),
+            'mensagens_por_s': round(baixadas / duracao, 1) if duracao else None}
+
+
+def carga(mensagens):
+    amostra = mensagens[:200]
+    ida_compacta = sum(len(pickle.dumps(analise_paralela.compacta(m))) for m in amostra)
+    ida_dict = sum(len(pickle.dumps(m)) for m in amostra)
+    cargas = [analise_paralela.compacta(m) for m in amostra]
+    volta_tupla = sum(len(pickle.dumps(r)) for r in analise_paralela._analisa_lote(cargas))
+    volta_dict = sum(len(pickle.dumps(gmail_server.mime_local.analisa(
+        gmail_server.base64.urlsafe_b64decode(m['raw']), m['id']))) for m in amostra)
+    n = len(amostra)
+    return {'ida_compacta': ida_compacta // n, 'ida_dict': ida_dict // n,
+            'volta_tupla': volta_tupla // n, 'volta_dict': volta_dict // n}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mensagens', type=int, default=2000)
+    parser.add_argument('--processos', type=int, nargs='+', default=[0, 1, 2, 4])
+    parser.add_argument('--lote', type=int, default=32, help='mensagens por tarefa de um processo')
+    parser.add_argument('--latencia', type=float, default=0.002, help='segundos por ida e volta no pipeline')
+    parser.add_argument('--anexos', type=float, default=0.2, help='fração de mensagens com anexo')
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--saida', help='grava o JSON também neste arquivo')
+    args = parser.parse_args()
+
+    gerador = GeradorCaixa(args.semente, proporcao_anexos=args.anexos)
+    mensagens = list(gerador.itera(args.mensagens, formato='raw'))
+    gmail_server.perfil.ativa_cronometros(False)
+
+    resultado = {
+        'versao': versao(),
+        'cpu_count': os.cpu_count(),
+        'parametros': {k: v for k, v in vars(args).items() if k != 'saida'},
+        'carga_bytes_por_mensagem': carga(mensagens),
+        'etapa': {}, 'pipeline': {},
+    }
+    for processos in args.processos:
+        resultado['etapa'][processos] = etapa(mensagens, processos, args.lote)
+        resultado['pipeline'][processos] = pipeline(args, gerador, processos)
+    for secao in ('etapa', 'pipeline'):
+        base = resultado[secao][args.processos[0]]['mensagens_por_s']
+        for medida in resultado[secao].values():
+            medida['aceleracao'] = round(medida['mensagens_por_s'] / base, 2) if base else None
+
+    saida = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            f.write(saida)
+    print(saida)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Mede a latência do autocompletar de contatos com o índice em memória.
+
+Gera N contatos sintéticos, carrega um IndicePrefixo e executa buscas com
+prefixos aleatórios de 1 a 6 caracteres, reportando os percentis de
+latência em microssegundos. Para comparação, mede também uma varredura
+linear (equivalente a um LIKE 'x%' sem índice).
+
+Uso:
+    python benchmarks/bench_autocomplete.py [--contatos 100000] [--buscas 20000]
+"""
+import argparse
+import json
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from indice_prefixo import IndicePrefixo  # noqa: E402
+
+
+def gera_contatos(n, semente=42):
+    """
+    Gera `n` endereços de e-mail sintéticos e distintos.
+    """
+    rnd = random.Random(semente)
+    dominios = [f'{"".join(rnd.choices(string.ascii_lowercase, k=rnd.randint(4, 10)))}.com' for _ in range(500)]
+    contatos = set()
+    while len(contatos) < n:
+        usuario = ''.join(rnd.choices(string.ascii_lowercase + string.digits + '._', k=rnd.randint(3, 14)))
+        contatos.add(f'{usuario}@{rnd.choice(dominios)}')
+    return list(contatos)
+
+
+def percentis(amostras):
+    """
+    Retorna p50, p95, p99 e máximo (em microssegundos).
+    """
+    amostras = sorted(amostras)
+    n = len(amostras)
+    return {
+        'p50_us': round(amostras[n // 2] * 1e6, 2),
+        'p95_us': round(amostras[int(n * 0.95)] * 1e6, 2),
+        'p99_us': round(amostras[int(n * 0.99)] * 1e6, 2),
+        'max_us': round(amostras[-1] * 1e6, 2),
+    }
+
+
+def mede(funcao, prefixos):
+    """
+    Executa `funcao(prefixo)` para cada prefixo e devolve as latências.
+    """
+    amostras = []
+    for prefixo in prefixos:
+        inicio = time.perf_counter()
+        funcao(prefixo)
+        amostras.append(time.perf_counter() - inicio)
+    return amostras
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--contatos', type=int, default=100_000)
+    parser.add_argument('--buscas', type=int, default=20_000)
+    args = parser.parse_args()
+
+    contatos = gera_contatos(args.contatos)
+    rnd = random.Random(7)
+    prefixos = [c[:rnd.randint(1, 6)] for c in rnd.choices(contatos, k=args.buscas)]
+
+    inicio = time.perf_counter()
+    indice = IndicePrefixo(contatos)
+    carga = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    indice.adiciona([f'novo{i}@exemplo.com' for i in range(1000)])
+    insercao = time.perf_counter() - inicio
+
+    def linear(prefixo):
+        return [c for c in contatos if c.startswith(prefixo)][:50]
+
+    resultado = {
+        'contatos': args.contatos,
+        'buscas': args.buscas,
+        'carga_ms': round(carga * 1000, 2),
+        'insercao_1000_ms': round(insercao * 1000, 2),
+        'indice': percentis(mede(indice.busca, prefixos)),
+        'varredura_linear': percentis(mede(linear, prefixos[:200])),
+    }
+    print(json.dumps(resultado, indent=2))
+
+
+if __name__ == '__main__':
+    main()
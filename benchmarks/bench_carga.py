@@ -0,0 +1,171 @@
+"""
+Teste de carga do Email_Cache com a caixa sintética (caixa_sintetica.py).
+
+As mensagens são geradas em fluxo, convertidas em Email por
+EmailClient.cria_email e guardadas no cache em lotes, sem nunca ter a caixa
+inteira em memória além do que o próprio cache guarda. Reporta:
+- taxa de ingestão (mensagens/s) e a memória (RSS) ao longo da carga;
+- latência das buscas no cache (percentis, em ms);
+- pico de RSS do processo.
+
+Modos de ingestão:
+- direto: gerador -> cria_email -> Email_Cache.adiciona_emails;
+- api: o mesmo conteúdo servido pelo Gmail falso e lido por
+  EmailClient.baixa (listagem + messages.get em paralelo + análise), como
+  em uma busca real; --motor e --processos escolhem o motor e os
+  processos de análise;
+- gerador: só gera e converte, sem guardar (mede o custo do fluxo e
+  confirma que a memória fica constante).
+
+Uso:
+    python benchmarks/bench_carga.py [--mensagens 100000] [--modo direto|api|gerador]
+                                     [--motor json|bruto] [--processos 0] [--lote 5000]
+                                     [--buscas 50] [--saida resultado.json]
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import gmail_server  # noqa: E402
+from bench_gmail import versao  # noqa: E402
+from caixa_sintetica import GeradorCaixa  # noqa: E402
+from fake_gmail import GmailFalso  # noqa: E402
+
+
+def rss_mb():
+    """
+    RSS atual em MB (Linux) ou None se não disponível.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            paginas = int(f.read().split()[1])
+        return round(paginas * os.sysconf('SC_PAGE_SIZE') / 2 ** 20, 1)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def pico_rss_mb():
+    """
+    Pico de RSS do processo em MB ou None (por exemplo, no Windows).
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # KB no Linux, bytes no macOS
+    return round(pico / (2 ** 20 if sys.platform == 'darwin' else 2 ** 10), 1)
+
+
+def percentis_ms(amostras):
+    amostras = sorted(amostras)
+    n = len(amostras)
+    return {
+        'p50_ms': round(amostras[n // 2] * 1000, 3),
+        'p95_ms': round(amostras[int(n * 0.95)] * 1000, 3),
+        'p99_ms': round(amostras[int(n * 0.99)] * 1000, 3),
+        'max_ms': round(amostras[-1] * 1000, 3),
+    }
+
+
+def emails(args, gerador, client):
+    """
+    Gera os objetos Email no modo escolhido, um a um.
+    """
+    if args.modo == 'api':
+        return client.baixa('in:inbox', args.mensagens, processos=args.processos)
+    return (client.cria_email(m) for m in gerador.itera(args.mensagens))
+
+
+def carrega(args, gerador, client, cache):
+    """
+    Ingere as mensagens em lotes e registra a taxa e a memória de cada lote.
+    """
+    amostras = []
+    total = 0
+    inicio = time.perf_counter()
+    fluxo = emails(args, gerador, client)
+    while True:
+        lote = list(itertools.islice(fluxo, args.lote))
+        if not lote:
+            break
+        if args.modo != 'gerador':
+            cache.adiciona_emails(lote)
+        total += len(lote)
+        decorrido = time.perf_counter() - inicio
+        amostras.append({'mensagens': total, 'segundos': round(decorrido, 2),
+                         'por_s': round(total / decorrido, 1), 'rss_mb': rss_mb()})
+    duracao = time.perf_counter() - inicio
+    return {
+        'mensagens': total,
+        'segundos': round(duracao, 2),
+        'mensagens_por_s': round(total / duracao, 1) if duracao else None,
+        'progresso': amostras,
+    }
+
+
+def buscas(args, cache):
+    """
+    Mede a busca no cache com termos do assunto, do corpo e de remetentes.
+    """
+    rnd = random.Random(args.semente)
+    termos = ['fatura', 'reunião', 'contrato', 'silva', 'gmail.com', 'conceição', 'inexistente-xyz']
+    # Método privado chamado diretamente: é o caminho usado quando a busca é atendida pelo cache
+    busca = cache._Email_Cache__search_in_saved_emails
+    amostras, encontrados = [], []
+    for _ in range(args.buscas):
+        inicio = time.perf_counter()
+        encontrados.append(len(busca(rnd.choice(termos))))
+        amostras.append(time.perf_counter() - inicio)
+    return {**percentis_ms(amostras), 'media_encontrados': round(sum(encontrados) / len(encontrados), 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mensagens', type=int, default=100_000)
+    parser.add_argument('--modo', choices=('direto', 'api', 'gerador'), default='direto')
+    parser.add_argument('--motor', choices=gmail_server.MOTORES, default='json', help='motor do modo api')
+    parser.add_argument('--processos', type=int, default=0, help='processos de análise do modo api (motor bruto)')
+    parser.add_argument('--lote', type=int, default=5000, help='mensagens por lote de ingestão')
+    parser.add_argument('--buscas', type=int, default=50)
+    parser.add_argument('--anexos', type=float, default=0.2, help='fração de mensagens com anexo')
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--saida', help='grava o JSON também neste arquivo')
+    args = parser.parse_args()
+
+    gerador = GeradorCaixa(args.semente, proporcao_anexos=args.anexos)
+    servico = GmailFalso(mensagens=args.mensagens, tamanho_pagina=500, gerador=gerador)
+    client = gmail_server.EmailClient(gmail_server.Email, service=servico)
+    client.set_limitador(None)
+    client.set_motor(args.motor)
+    # Sem timers: medem cada chamada e não fazem parte do caminho medido aqui
+    gmail_server.perfil.ativa_cronometros(False)
+    cache = gmail_server.Email_Cache()
+    cache.set_service(client)
+
+    resultado = {
+        'versao': versao(),
+        'parametros': {k: v for k, v in vars(args).items() if k != 'saida'},
+        'rss_inicial_mb': rss_mb(),
+    }
+    resultado['ingestao'] = carrega(args, gerador, client, cache)
+    if args.modo != 'gerador' and args.buscas:
+        resultado['busca_cache'] = buscas(args, cache)
+    resultado['rss_final_mb'] = rss_mb()
+    resultado['pico_rss_mb'] = pico_rss_mb()
+
+    saida = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            f.write(saida)
+    print(saida)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Compara os backends de armazenamento (SQLite e MySQL/MariaDB).
+
+Para cada backend mede:
+- partida a frio: abrir um banco novo e criar as tabelas;
+- partida a quente: reabrir o banco já existente;
+- inserção em lote: contatos/s gravados com salva_contatos;
+- consulta de autocompletar: latência de busca_contatos por prefixo.
+
+O MySQL só é medido se a senha for informada (--mysql-senha ou variável
+EMAIL_CONSOLE_DB_PASS). O benchmark usa o banco 'sistema_bench', que é
+apagado ao final.
+
+Uso:
+    python benchmarks/bench_data_base.py [--contatos 10000] [--buscas 500]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_autocomplete import gera_contatos, percentis  # noqa: E402
+
+BANCO_MYSQL = 'sistema_bench'
+
+
+def abre_sqlite(arquivo):
+    import data_base_sqlite
+    return data_base_sqlite.DataBaseSQLite(arquivo)
+
+
+def abre_mysql(senha):
+    import data_base_mysql
+    return data_base_mysql.DataBaseMySQL(senha, nome=BANCO_MYSQL)
+
+
+def apaga_mysql(senha):
+    import mysql.connector
+    import config
+    cnx = mysql.connector.connect(host=config.get('db_mysql_host'), user=config.get('db_mysql_usuario'),
+                                  passwd=senha)
+    with cnx.cursor() as cursor:
+        cursor.execute(f'DROP DATABASE IF EXISTS {BANCO_MYSQL}')
+    cnx.close()
+
+
+def mede_backend(abre, contatos, prefixos):
+    """
+    Executa as medições em um backend. `abre` cria uma nova instância.
+    """
+    inicio = time.perf_counter()
+    db = abre()
+    frio = time.perf_counter() - inicio
+    db.fecha_cnx()
+
+    inicio = time.perf_counter()
+    db = abre()
+    quente = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    db.salva_contatos(contatos)
+    insercao = time.perf_counter() - inicio
+
+    amostras = []
+    for prefixo in prefixos:
+        inicio = time.perf_counter()
+        db.busca_contatos(prefixo)
+        amostras.append(time.perf_counter() - inicio)
+
+    db.fecha_cnx()
+    return {
+        'partida_fria_ms': round(frio * 1000, 2),
+        'partida_quente_ms': round(quente * 1000, 2),
+        'insercao_contatos_s': round(len(contatos) / insercao),
+        'autocompletar': percentis(amostras),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--contatos', type=int, default=10_000)
+    parser.add_argument('--buscas', type=int, default=500)
+    parser.add_argument('--mysql-senha', default=os.environ.get('EMAIL_CONSOLE_DB_PASS'))
+    args = parser.parse_args()
+
+    contatos = gera_contatos(args.contatos)
+    rnd = random.Random(7)
+    prefixos = [c[:rnd.randint(1, 6)] for c in rnd.choices(contatos, k=args.buscas)]
+
+    resultado = {'contatos': args.contatos, 'buscas': args.buscas}
+
+    with tempfile.TemporaryDirectory() as pasta:
+        arquivo = os.path.join(pasta, 'bench.db')
+        resultado['sqlite'] = mede_backend(lambda: abre_sqlite(arquivo), contatos, prefixos)
+
+    if args.mysql_senha:
+        apaga_mysql(args.mysql_senha)
+        try:
+            resultado['mysql'] = mede_backend(lambda: abre_mysql(args.mysql_senha), contatos, prefixos)
+        finally:
+            apaga_mysql(args.mysql_senha)
+
+    print(json.dumps(resultado, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,255 @@
+"""
+Mede o EmailClient e o Email_Cache contra o serviço do Gmail falso.
+
+Cenários:
+- busca: search= em um cache vazio (listagem + messages.get por mensagem),
+  em e-mails/s;
+- cache: a mesma busca repetida, atendida pelo cache local;
+- conversas: a mesma busca com threads= on (threads.list + um threads.get
+  por conversa), comparada à busca por mensagens em chamadas à API;
+- contagem: count= exato da caixa inteira (só páginas de IDs, sem
+  messages.get) e pelo rótulo (labels.get), com as chamadas feitas;
+- aquecido: search= label:unread sem e com o aquecedor do cache, depois que
+  ele sincronizou em segundo plano, e as chamadas feitas pelo aquecedor;
+- contas: search= acc= all em --contas caixas falsas, cada uma com o seu
+  cliente e cota, comparada à mesma busca feita conta por conta; reporta
+  também o tempo até o primeiro e-mail mesclado;
+- envio: write_email + send_email, em mensagens/s;
+- html: geração da página HTML de cada e-mail buscado.
+
+A saída é um JSON com os parâmetros, a versão (commit) e os resultados,
+para comparação entre commits. O conteúdo da caixa é determinístico (semente).
+
+Uso:
+    python benchmarks/bench_gmail.py [--mensagens 2000] [--limite 200] [--latencia 0.002]
+                                     [--taxa-erro 0] [--cota 250 --cota-servico 250] [--contas 3]
+                                     [--saida resultado.json]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import aquecedor  # noqa: E402
+import config  # noqa: E402
+import contas  # noqa: E402
+import gmail_server  # noqa: E402
+import instrumentacao  # noqa: E402
+import limitador  # noqa: E402
+from bench_autocomplete import percentis  # noqa: E402
+from fake_gmail import GmailFalso  # noqa: E402
+
+
+def versao():
+    """
+    Retorna o commit atual (ou None fora de um repositório git).
+    """
+    proc = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, capture_output=True, text=True)
+    return proc.stdout.strip() or None
+
+
+def novo_client(args, conta=None, semente=None):
+    """
+    Cria um EmailClient e um Email_Cache ligados a um serviço falso novo
+    (a caixa da conta `conta`, com o conteúdo da `semente`).
+    """
+    semente = args.semente if semente is None else semente
+    servico = GmailFalso(mensagens=args.mensagens, latencia=args.latencia, tamanho_pagina=args.pagina,
+                         taxa_erro=args.taxa_erro, semente=semente, cota=args.cota_servico)
+    client = gmail_server.EmailClient(gmail_server.Email, service=servico, conta=conta)
+    # Sem --cota, mede o cliente sem o limitador
+    client.set_limitador(limitador.LimitadorCota(args.cota, config.get('gmail_cota_rajada')) if args.cota else None)
+    cache = gmail_server.Email_Cache()
+    cache.set_service(client)
+    client.set_cache_clas(cache)
+    return servico, client, cache
+
+
+def busca(args):
+    _, client, cache = novo_client(args)
+    inicio = time.perf_counter()
+    emails = cache.search_emails(args.limite, args.query) or []
+    duracao = time.perf_counter() - inicio
+    return {'emails': len(emails), 'segundos': round(duracao, 4),
+            'emails_por_s': round(len(emails) / duracao, 1) if duracao else None}, (client, cache, emails)
+
+
+def conversas(args):
+    """
+    Busca as mesmas mensagens da busca comum, agrupadas em conversas, e
+    compara as chamadas à API feitas nos dois modos.
+    """
+    servico, _, cache = novo_client(args)
+    emails = cache.search_emails(args.limite, args.query) or []
+    por_mensagem = sum(servico.estatisticas()['requisicoes'].values())
+
+    servico, client, _ = novo_client(args)
+    inicio = time.perf_counter()
+    # Conversas até cobrir o mesmo número de mensagens da busca comum
+    encontradas, mensagens = [], 0
+    for conversa in client.conversas(args.query):
+        encontradas.append(conversa)
+        mensagens += conversa.quantidade
+        if mensagens >= len(emails):
+            break
+    duracao = time.perf_counter() - inicio
+    por_conversa = sum(servico.estatisticas()['requisicoes'].values())
+    return {'conversas': len(encontradas), 'mensagens': mensagens, 'segundos': round(duracao, 4),
+            'requisicoes': por_conversa, 'requisicoes_por_mensagem': por_mensagem,
+            'reducao': round(1 - por_conversa / por_mensagem, 3) if por_mensagem else None}
+
+
+def contagem(args):
+    servico, client, _ = novo_client(args)
+    inicio = time.perf_counter()
+    exata = client.contagem(args.query, exata=True)
+    duracao = time.perf_counter() - inicio
+    chamadas = dict(servico.estatisticas()['requisicoes'])
+    inicio = time.perf_counter()
+    rotulo = client.contagem('in:inbox')
+    return {'total': exata['total'], 'segundos': round(duracao, 4), 'requisicoes': chamadas,
+            'rotulo': rotulo, 'segundos_rotulo': round(time.perf_counter() - inicio, 4)}
+
+
+def aquecido(args):
+    """
+    Mede search= label:unread em um cache frio e em um cache mantido pelo
+    aquecedor, depois da sua primeira sincronização.
+    """
+    _, _, cache = novo_client(args)
+    inicio = time.perf_counter()
+    frios = cache.search_emails(args.limite, 'label:unread') or []
+    frio = time.perf_counter() - inicio
+
+    servico, client, cache = novo_client(args)
+    aquecedor_ = aquecedor.AquecedorCache(client, cache, ['label:unread'], args.limite, intervalo=1.0)
+    espera = time.perf_counter()
+    while aquecedor_.estatisticas()['pendente'] and time.perf_counter() - espera < 60:
+        time.sleep(0.01)
+    preparo = time.perf_counter() - espera
+    chamadas = sum(servico.estatisticas()['requisicoes'].values())
+    inicio = time.perf_counter()
+    quentes = cache.search_emails(args.limite, 'label:unread') or []
+    quente = time.perf_counter() - inicio
+    aquecedor_.fecha()
+    return {'emails': len(frios), 'segundos_frio': round(frio, 4), 'emails_aquecidos': len(quentes),
+            'segundos_aquecido': round(quente, 6), 'segundos_aquecedor': round(preparo, 4),
+            'requisicoes_aquecedor': chamadas,
+            'requisicoes_busca_aquecida': sum(servico.estatisticas()['requisicoes'].values()) - chamadas}
+
+
+def varias_contas(args):
+    """
+    Busca em várias contas ao mesmo tempo (GerenciadorContas.busca) e
+    conta por conta, em caches vazios.
+    """
+    def abre():
+        abertas = []
+        for indice in range(args.contas):
+            _, client, cache = novo_client(args, f'conta{indice}', args.semente + indice)
+            abertas.append(contas.Conta(client.conta, client, cache))
+        return contas.GerenciadorContas(abertas)
+
+    gerenciador = abre()
+    inicio = time.perf_counter()
+    for nome in gerenciador.nomes:
+        list(gerenciador.conta(nome).client.baixa(args.query, args.limite))
+    sequencial = time.perf_counter() - inicio
+
+    gerenciador = abre()
+    inicio = time.perf_counter()
+    busca_ = gerenciador.busca(args.query, args.limite)
+    primeiro = next(busca_, None)
+    ate_primeiro = time.perf_counter() - inicio
+    emails = ([primeiro] if primeiro else []) + list(busca_)
+    duracao = time.perf_counter() - inicio
+    return {'contas': args.contas, 'emails': len(emails), 'segundos': round(duracao, 4),
+            'segundos_primeiro': round(ate_primeiro, 4), 'segundos_sequencial': round(sequencial, 4),
+            'aceleracao': round(sequencial / duracao, 2) if duracao else None}
+
+
+def cache_repetido(cache, query, limite, repeticoes):
+    amostras = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        cache.search_emails(limite, query)
+        amostras.append(time.perf_counter() - inicio)
+    return percentis(amostras)
+
+
+def envio(args):
+    servico, client, _ = novo_client(args)
+    inicio = time.perf_counter()
+    for i in range(args.envios):
+        msgs = client.write_email([f'destino{i % 10}@exemplo.com'], f'Assunto {i}', 'corpo ' * 200)
+        client.send_email(msgs)
+    duracao = time.perf_counter() - inicio
+    return {'mensagens': servico.estatisticas()['enviadas'], 'segundos': round(duracao, 4),
+            'mensagens_por_s': round(args.envios / duracao, 1) if duracao else None}
+
+
+def html(cache, emails):
+    # Método privado chamado diretamente para não abrir o navegador
+    gera = cache._Email_Cache__get_content_html
+    amostras = []
+    for email_ in emails:
+        inicio = time.perf_counter()
+        gera([email_])
+        amostras.append(time.perf_counter() - inicio)
+    return percentis(amostras) if amostras else {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mensagens', type=int, default=2000, help='mensagens na caixa falsa')
+    parser.add_argument('--limite', type=int, default=200, help='limit= da busca')
+    parser.add_argument('--query', default='fatura', help='termo buscado (a repetição é atendida pelo cache)')
+    parser.add_argument('--pagina', type=int, default=100, help='maxResults padrão da listagem')
+    parser.add_argument('--latencia', type=float, default=0.002, help='segundos por ida e volta')
+    parser.add_argument('--taxa-erro', type=float, default=0.0, help='fração de requisições com erro')
+    parser.add_argument('--cota', type=float, default=0, help='unidades/s do limitador do cliente (0: sem limitador)')
+    parser.add_argument('--cota-servico', type=float, default=0,
+                        help='unidades/s aceitas pelo serviço falso antes de responder 429 (0: sem limite)')
+    parser.add_argument('--contas', type=int, default=3, help='caixas da busca em várias contas')
+    parser.add_argument('--envios', type=int, default=100)
+    parser.add_argument('--repeticoes', type=int, default=200, help='buscas repetidas no cache')
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--saida', help='grava o JSON também neste arquivo')
+    args = parser.parse_args()
+
+    resultado = {
+        'versao': versao(),
+        'python': platform.python_version(),
+        'parametros': {k: v for k, v in vars(args).items() if k != 'saida'},
+    }
+    # As mensagens de erro do cliente (erros injetados) não poluem o JSON
+    with contextlib.redirect_stdout(io.StringIO()):
+        resultado['busca'], (client, cache, emails) = busca(args)
+        resultado['cache'] = cache_repetido(cache, args.query, args.limite, args.repeticoes)
+        resultado['conversas'] = conversas(args)
+        resultado['contagem'] = contagem(args)
+        resultado['aquecido'] = aquecido(args)
+        resultado['contas'] = varias_contas(args)
+        resultado['envio'] = envio(args)
+        resultado['html'] = html(cache, emails)
+    resultado['operacoes'] = instrumentacao.registro.resumo()['operacoes']
+    if client.limitador is not None:
+        resultado['cota'] = client.limitador.estatisticas()
+
+    saida = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            f.write(saida)
+    print(saida)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Compara os motores de obtenção das mensagens completas do EmailClient.
+
+- json: messages.get com format='full'; a API separa as partes e o cliente
+  percorre a árvore JSON (`__get_parts`) decodificando cada corpo;
+- bruto: messages.get com format='raw'; o cliente analisa o MIME localmente
+  com `email.parser.BytesParser` (`mime_local`).
+
+As mensagens vêm do Gmail falso, geradas de forma determinística pela caixa
+sintética, cujo plano (corpos, charsets e anexos) serve de gabarito. Para
+cada motor são reportados os bytes das respostas (JSON serializado), o tempo
+de CPU da conversão em Email (sem a rede) e a fração de mensagens com
+texto, HTML e anexos iguais aos do gabarito.
+
+O serviço falso ignora o parâmetro `fields`, de modo que os bytes do motor
+json incluem campos que a projeção 'completa' não pediria (snippet,
+sizeEstimate, ...): são um limite superior.
+
+Uso:
+    python benchmarks/bench_motores.py [--mensagens 2000] [--semente 0] [--saida resultado.json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import gmail_server  # noqa: E402
+from caixa_sintetica import GeradorCaixa  # noqa: E402
+from fake_gmail import GmailFalso  # noqa: E402
+
+# Formato pedido à API por cada motor
+FORMATOS = {'json': 'full', 'bruto': 'raw'}
+
+
+def gabarito(no, esperado=None):
+    """
+    Extrai do plano de uma mensagem o primeiro texto simples, o primeiro
+    HTML e os nomes dos anexos.
+    """
+    esperado = esperado if esperado is not None else {'corpo_texto': '', 'corpo_html': '', 'anexos': []}
+    if 'partes' in no:
+        for filho in no['partes']:
+            gabarito(filho, esperado)
+    elif no.get('nome'):
+        esperado['anexos'].append(no['nome'])
+    elif no['tipo'] == 'text/plain' and not esperado['corpo_texto']:
+        esperado['corpo_texto'] = no['texto']
+    elif no['tipo'] == 'text/html' and not esperado['corpo_html']:
+        esperado['corpo_html'] = no['texto']
+    return esperado
+
+
+def normaliza(texto):
+    # Quebras de linha e espaços finais mudam com o transfer-encoding
+    return ' '.join(texto.split())
+
+
+def mede(client, servico, gerador, motor, quantidade):
+    """
+    Busca `quantidade` mensagens no formato do motor, converte-as e confere
+    o resultado com o gabarito.
+    """
+    mensagens = servico.users().messages()
+    respostas = [mensagens.get(userId='me', id=gerador.id_(indice), format=FORMATOS[motor]).execute()
+                 for indice in range(quantidade)]
+    tamanho = sum(len(json.dumps(resposta, ensure_ascii=False).encode('utf-8')) for resposta in respostas)
+
+    cria = client.cria_email_bruto if motor == 'bruto' else client.cria_email
+    inicio = time.process_time()
+    emails = [cria(resposta) for resposta in respostas]
+    cpu = time.process_time() - inicio
+
+    acertos = {'corpo_texto': 0, 'corpo_html': 0, 'anexos': 0}
+    for indice, email_ in enumerate(emails):
+        esperado = gabarito(gerador.plano(indice)['corpo'])
+        acertos['corpo_texto'] += normaliza(email_.corpo_texto) == normaliza(esperado['corpo_texto'])
+        acertos['corpo_html'] += normaliza(email_.corpo_html) == normaliza(esperado['corpo_html'])
+        acertos['anexos'] += sorted(a['filename'] for a in email_.anexos) == sorted(esperado['anexos'])
+    return {
+        'bytes_medio': round(tamanho / quantidade),
+        'cpu_ms_por_mensagem': round(cpu * 1000 / quantidade, 4),
+        'mensagens_por_s_cpu': round(quantidade / cpu, 1) if cpu else None,
+        'corretas': {campo: round(n / quantidade, 4) for campo, n in acertos.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mensagens', type=int, default=2000)
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--saida', help='grava o JSON também neste arquivo')
+    args = parser.parse_args()
+
+    gerador = GeradorCaixa(args.semente)
+    servico = GmailFalso(mensagens=args.mensagens, semente=args.semente, gerador=gerador)
+    client = gmail_server.EmailClient(gmail_server.Email, service=servico)
+
+    resultado = {'mensagens': args.mensagens, 'semente': args.semente}
+    for motor in gmail_server.MOTORES:
+        resultado[motor] = mede(client, servico, gerador, motor, args.mensagens)
+
+    saida = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            f.write(saida)
+    print(saida)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Compara as chamadas à API do Gmail com e sem projeções (parâmetro `fields`).
+
+Busca as mesmas mensagens nas visões 'completa' e 'cabecalhos', alternando
+as projeções desligadas (recurso completo, como antes) e ligadas, e reporta
+por caso de uso o tamanho médio da resposta JSON e o tempo médio de parse.
+
+Usa a conta do Gmail autenticada (token.json); na falta dele, abre o
+navegador para a autorização.
+
+Uso:
+    python benchmarks/bench_projecoes.py [--mensagens 50] [--query "in:inbox"] [--repeticoes 2]
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import gmail_server  # noqa: E402
+
+
+def mede(client, query, visao, mensagens, projecoes):
+    """
+    Busca `mensagens` e-mails e retorna as medidas do modelo por rótulo.
+    """
+    client.set_projecoes(projecoes)
+    client.modelo.zera()
+    for _ in client.baixa(query, mensagens, visao=visao):
+        pass
+    return client.modelo.estatisticas()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mensagens', type=int, default=50)
+    parser.add_argument('--query', default='in:inbox')
+    parser.add_argument('--repeticoes', type=int, default=2)
+    args = parser.parse_args()
+
+    client = gmail_server.EmailClient(gmail_server.Email)
+    resultado = {'mensagens': args.mensagens, 'query': args.query}
+
+    for visao in ('completa', 'cabecalhos'):
+        medidas = {'sem_fields': {}, 'com_fields': {}}
+        # Alterna a ordem para que conexões já abertas não favoreçam um dos lados
+        for _ in range(args.repeticoes):
+            for nome, projecoes in (('sem_fields', False), ('com_fields', True)):
+                for rotulo, valores in mede(client, args.query, visao, args.mensagens, projecoes).items():
+                    medidas[nome].setdefault(rotulo, []).append(valores)
+
+        comparacao = {}
+        for rotulo in medidas['sem_fields']:
+            sem = medidas['sem_fields'][rotulo]
+            com = medidas['com_fields'].get(rotulo, sem)
+            bytes_sem = sum(m['bytes_medio'] for m in sem) / len(sem)
+            bytes_com = sum(m['bytes_medio'] for m in com) / len(com)
+            parse_sem = sum(m['parse_medio_ms'] for m in sem) / len(sem)
+            parse_com = sum(m['parse_medio_ms'] for m in com) / len(com)
+            comparacao[rotulo] = {
+                'bytes_medio': {'sem_fields': round(bytes_sem), 'com_fields': round(bytes_com),
+                                'reducao_pct': round(100 * (1 - bytes_com / bytes_sem), 1) if bytes_sem else 0},
+                'parse_medio_ms': {'sem_fields': round(parse_sem, 3), 'com_fields': round(parse_com, 3)},
+            }
+        resultado[visao] = comparacao
+
+    resultado['transporte'] = client.transporte.estatisticas()
+    client.credenciais.para()
+    client.transporte.close()
+    print(json.dumps(resultado, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Mede o custo de importação do programa com `python -X importtime`.
+
+Executa `import main` em processos novos várias vezes e reporta a mediana
+do tempo cumulativo de importação de `main` e os módulos mais caros. Para
+comparação, mede também as bibliotecas pesadas que agora só são importadas
+quando usadas (googleapiclient, google_auth_oauthlib, mysql.connector,
+bcrypt), se estiverem instaladas.
+
+O tempo até o primeiro prompt de uma sessão real pode ser visto com:
+    python -X importtime main.py 2> importtime.txt
+(a última linha de stderr antes do prompt traz "tempo até o primeiro prompt").
+
+Uso:
+    python benchmarks/bench_startup.py [--repeticoes 5] [--top 10]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Bibliotecas cuja importação foi adiada até o primeiro uso
+ADIADAS = ['googleapiclient.discovery', 'google_auth_oauthlib.flow', 'google.auth.transport.requests',
+           'mysql.connector', 'bcrypt']
+
+
+def importtime(codigo):
+    """
+    Executa `codigo` com -X importtime e retorna {modulo: cumulativo_us}
+    ou None se a importação falhar.
+    """
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', codigo], cwd=RAIZ,
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        return None
+    tempos = {}
+    for linha in proc.stderr.splitlines():
+        if not linha.startswith('import time:') or 'cumulative' in linha:
+            continue
+        _, _, cumulativo, modulo = (p.strip() for p in linha.replace('import time:', '|').split('|'))
+        tempos[modulo] = int(cumulativo)
+    return tempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    # Primeira execução descartada: compila os .pyc
+    importtime('import main')
+    execucoes = [importtime('import main') for _ in range(args.repeticoes)]
+    if not all(execucoes):
+        sys.exit('Falha ao importar main')
+
+    mediana = {m: statistics.median(e.get(m, 0) for e in execucoes) for m in execucoes[0]}
+    top = sorted(mediana.items(), key=lambda i: i[1], reverse=True)[:args.top]
+
+    adiadas = {}
+    for modulo in ADIADAS:
+        tempos = importtime(f'import {modulo}')
+        if tempos:
+            adiadas[modulo] = round(tempos.get(modulo, 0) / 1000, 2)
+
+    print(json.dumps({
+        'import_main_ms': round(mediana['main'] / 1000, 2),
+        'mais_caros_ms': {m: round(t / 1000, 2) for m, t in top},
+        'adiadas_ms': adiadas,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
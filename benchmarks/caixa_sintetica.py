@@ -0,0 +1,388 @@
+"""
+Gerador de caixas de e-mail sintéticas para testes de escala.
+
+Cada mensagem é descrita por um plano (cabeçalhos e árvore de partes) do
+qual saem tanto o MIME (`email.message.EmailMessage`, formato 'raw') quanto
+o recurso Message da API do Gmail (formatos 'full', 'metadata' e
+'minimal'). A mensagem `i` depende apenas da semente e de `i`, então uma
+caixa de milhões de mensagens pode ser percorrida em fluxo (`itera`) ou
+acessada por índice sem ficar na memória.
+
+Distribuições usadas:
+- tamanho do texto: log-normal (mediana ~1,5 KB, cauda até 200 KB);
+- estrutura: texto simples, multipart/alternative, multipart/mixed com
+  anexos e multipart/related com imagem embutida (até 3 níveis);
+- anexos: 1 a 3 por mensagem com anexo, tamanho log-normal (mediana
+  ~40 KB, até 5 MB);
+- charsets: UTF-8, ISO-8859-1 e Windows-1252;
+- remetentes: poucos remetentes concentram a maior parte das mensagens;
+- conversas: mensagens vizinhas compartilham threadId e assunto ("Re:").
+"""
+import base64
+import math
+import random
+import unicodedata
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage, MIMEPart
+from email.policy import SMTP
+from email.utils import format_datetime
+
+_PALAVRAS = (
+    'relatório', 'reunião', 'fatura', 'projeto', 'entrega', 'proposta', 'contrato', 'agenda', 'pedido',
+    'orçamento', 'revisão', 'viagem', 'convite', 'resultado', 'pagamento', 'atualização', 'cliente',
+    'equipe', 'prazo', 'análise', 'versão', 'documento', 'sistema', 'acesso', 'senha', 'semana', 'mês',
+    'ação', 'informação', 'produção', 'aprovação', 'dúvida', 'solicitação', 'conferência', 'cotação',
+    'the', 'meeting', 'invoice', 'report', 'update', 'review', 'deadline', 'team', 'and', 'of', 'para',
+    'com', 'de', 'que', 'o', 'a', 'em', 'um', 'uma', 'não', 'por', 'mais', 'como', 'também', 'já',
+)
+_NOMES = ('Ana', 'João', 'Maria', 'José', 'Conceição', 'Antônio', 'Lúcia', 'Sérgio', 'Paula', 'Ângela',
+          'Carlos', 'Fernanda', 'Luís', 'Mônica', 'Rafael', 'Beatriz', 'Zoë', 'André', 'Inês', 'Otávio')
+_SOBRENOMES = ('Silva', 'Souza', 'Gonçalves', 'Araújo', 'Lima', 'Simões', 'Magalhães', 'Brandão',
+               'Ferreira', 'Gomes', 'Conceição', 'Ribeiro', 'Müller', 'Peña', 'Castro', 'Assunção')
+_DOMINIOS = ('gmail.com', 'empresa.com.br', 'exemplo.org', 'outlook.com', 'universidade.edu.br',
+             'fornecedor.com', 'loja.com.br', 'newsletter.net')
+# Tipo MIME, extensão e peso relativo dos anexos
+_ANEXOS = (('application', 'pdf', 'pdf', 5), ('image', 'jpeg', 'jpg', 4), ('image', 'png', 'png', 2),
+           ('application', 'vnd.openxmlformats-officedocument.wordprocessingml.document', 'docx', 2),
+           ('application', 'zip', 'zip', 1), ('text', 'csv', 'csv', 1))
+_CHARSETS = ('utf-8', 'iso-8859-1', 'windows-1252')
+_ESTRUTURAS = ('texto', 'alternativa', 'mista', 'relacionada')
+# Bloco de bytes pseudoaleatórios fatiado para o conteúdo dos anexos
+_BLOCO = random.Random(0).randbytes(1 << 20)
+
+
+def _sorteia(rnd, opcoes):
+    total = sum(peso for *_, peso in opcoes)
+    alvo = rnd.uniform(0, total)
+    for opcao in opcoes:
+        alvo -= opcao[-1]
+        if alvo <= 0:
+            return opcao
+    return opcoes[-1]
+
+
+def _b64(dados):
+    return base64.urlsafe_b64encode(dados).decode('ascii')
+
+
+class GeradorCaixa:
+    """
+    Caixa de e-mail sintética e determinística.
+
+    Args:
+        semente (int, opcional): Semente da caixa. O padrão é 0.
+        remetentes (int, opcional): Número de remetentes distintos.
+        proporcao_anexos (float, opcional): Fração de mensagens com anexo
+                                            (multipart/mixed). O padrão é 0,2.
+        inicio (datetime, opcional): Data da mensagem mais antiga.
+        intervalo_min (float, opcional): Minutos médios entre mensagens.
+    """
+
+    def __init__(self, semente=0, remetentes=5000, proporcao_anexos=0.2, inicio=None, intervalo_min=7.0):
+        self.__semente = semente
+        self.__remetentes = remetentes
+        # Pesos de texto simples, alternativa, mista (com anexos) e relacionada
+        self.__pesos = (0.25, 0.67 - proporcao_anexos, proporcao_anexos, 0.08)
+        self.__inicio = inicio or datetime(2020, 1, 1, tzinfo=timezone.utc)
+        self.__intervalo = intervalo_min
+
+    # Identificação e rótulos (baratos: não montam a mensagem)
+
+    @staticmethod
+    def id_(indice):
+        """ID da mensagem `indice` (hexadecimal de 16 dígitos, como na API)."""
+        return f'{indice:016x}'
+
+    @staticmethod
+    def indice(id_msg):
+        """Índice da mensagem com o ID `id_msg`."""
+        return int(id_msg, 16)
+
+    def thread_id(self, indice):
+        """Conversas de 1 a 5 mensagens consecutivas."""
+        return f'{self.__conversa(indice)[0]:016x}'
+
+    def rotulos(self, indice):
+        """
+        Rótulos da mensagem, sem montar o corpo (usado para filtrar listagens).
+        """
+        rnd = self.__rnd(indice, 1)
+        rotulos = ['INBOX']
+        if rnd.random() < 0.3:
+            rotulos.append('UNREAD')
+        if rnd.random() < 0.1:
+            rotulos.append('IMPORTANT')
+        rotulos.append(rnd.choice(('CATEGORY_PERSONAL', 'CATEGORY_UPDATES', 'CATEGORY_PROMOTIONS',
+                                   'CATEGORY_SOCIAL')))
+        return rotulos
+
+    # Mensagens
+
+    def plano(self, indice):
+        """
+        Descreve a mensagem `indice`: cabeçalhos e árvore de partes.
+
+        O plano é a fonte única da mensagem; `mime` o monta como MIME
+        (usado no formato 'raw') e `mensagem` o converte diretamente para o
+        recurso da API, sem serializar o MIME, o que é muito mais rápido.
+
+        Returns:
+            dict: {'cabecalhos': [(nome, valor)], 'corpo': nó}, em que cada
+                  nó é {'tipo', 'partes'} (multipart), {'tipo', 'texto',
+                  'charset'} (texto) ou {'tipo', 'tamanho', 'deslocamento',
+                  'nome', 'cid'} (binário).
+        """
+        rnd = self.__rnd(indice, 2)
+        inicio_conversa, posicao = self.__conversa(indice)
+        assunto = self.__assunto(inicio_conversa)
+        if posicao:
+            assunto = f'Re: {assunto}'
+        charset = rnd.choices(_CHARSETS, (7, 2, 1))[0]
+        estrutura = rnd.choices(_ESTRUTURAS, self.__pesos)[0]
+
+        cabecalhos = [('From', self.__remetente(rnd)), ('To', 'Você <voce@gmail.com>')]
+        if rnd.random() < 0.2:
+            cabecalhos.append(('Cc', ', '.join(self.__remetente(rnd) for _ in range(rnd.randint(1, 4)))))
+        cabecalhos += [
+            ('Subject', assunto),
+            ('Date', format_datetime(self.data(indice))),
+            ('Message-ID', f'<{self.id_(indice)}.{self.__semente}@sintetico.local>'),
+        ]
+
+        texto = self.__texto(rnd)
+        simples = {'tipo': 'text/plain', 'texto': texto, 'charset': charset}
+        if estrutura == 'texto':
+            return {'cabecalhos': cabecalhos, 'corpo': simples}
+
+        if estrutura == 'relacionada':
+            # multipart/related com imagem embutida dentro da alternativa HTML
+            cid = f'img.{self.id_(indice)}@sintetico.local'
+            html = {'tipo': 'multipart/related', 'partes': [
+                {'tipo': 'text/html', 'texto': self.__html(texto, cid), 'charset': charset},
+                self.__binario(rnd, 'image/png', rnd.randint(2_000, 60_000), cid=cid),
+            ]}
+        else:
+            html = {'tipo': 'text/html', 'texto': self.__html(texto), 'charset': charset}
+        corpo = {'tipo': 'multipart/alternative', 'partes': [simples, html]}
+
+        if estrutura == 'mista':
+            anexos = [self.__anexo(rnd) for _ in range(rnd.randint(1, 3))]
+            corpo = {'tipo': 'multipart/mixed', 'partes': [corpo] + anexos}
+        return {'cabecalhos': cabecalhos, 'corpo': corpo}
+
+    def mime(self, indice):
+        """
+        Monta a mensagem `indice` como MIME.
+
+        Returns:
+            EmailMessage: A mensagem completa, com corpo e anexos.
+        """
+        plano = self.plano(indice)
+        msg = EmailMessage()
+        for nome, valor in plano['cabecalhos']:
+            msg[nome] = valor
+        self.__preenche(msg, plano['corpo'], self.id_(indice))
+        return msg
+
+    def bruta(self, indice):
+        """Bytes RFC 822 da mensagem `indice`."""
+        return self.mime(indice).as_bytes(policy=SMTP)
+
+    def mensagem(self, indice, formato='full', cabecalhos=None):
+        """
+        Recurso Message da API do Gmail para a mensagem `indice`.
+
+        Args:
+            indice (int): Índice da mensagem.
+            formato (str, opcional): 'full' (padrão), 'metadata', 'minimal'
+                                     ou 'raw'.
+            cabecalhos (list[str], opcional): metadataHeaders do formato
+                                              'metadata'.
+
+        Returns:
+            dict: O recurso no formato pedido.
+        """
+        plano = self.plano(indice)
+        corpo = plano['corpo']
+        if formato == 'raw':
+            bruto = self.bruta(indice)
+            tamanho = len(bruto)
+        else:
+            tamanho = sum(len(n) + len(v) + 4 for n, v in plano['cabecalhos']) + self.__tamanho(corpo)
+        recurso = {
+            'id': self.id_(indice),
+            'threadId': self.thread_id(indice),
+            'labelIds': self.rotulos(indice),
+            'snippet': ' '.join(self.__primeiro_texto(corpo)[:400].split())[:200],
+            'historyId': str(indice + 1),
+            'internalDate': str(int(self.data(indice).timestamp() * 1000)),
+            'sizeEstimate': tamanho,
+        }
+        todos = plano['cabecalhos'] + [('MIME-Version', '1.0')]
+        if formato == 'raw':
+            recurso['raw'] = _b64(bruto)
+        elif formato == 'metadata':
+            nomes = {n.lower() for n in cabecalhos or []}
+            recurso['payload'] = {
+                'mimeType': corpo['tipo'],
+                'headers': [{'name': k, 'value': v} for k, v in todos if not nomes or k.lower() in nomes],
+            }
+        elif formato == 'full':
+            recurso['payload'] = self.__parte(corpo, '', self.id_(indice), todos)
+        return recurso
+
+    def itera(self, quantidade, inicio=0, formato='full'):
+        """
+        Gera `quantidade` mensagens a partir de `inicio`, uma por vez.
+
+        Yields:
+            dict: Recurso Message no formato pedido.
+        """
+        for indice in range(inicio, inicio + quantidade):
+            yield self.mensagem(indice, formato)
+
+    def data(self, indice):
+        """Data de envio: crescente com o índice, com variação."""
+        rnd = self.__rnd(indice, 3)
+        minutos = indice * self.__intervalo + rnd.uniform(0, self.__intervalo)
+        return self.__inicio + timedelta(minutes=minutos)
+
+    # Auxiliares
+
+    def __rnd(self, indice, fluxo):
+        return random.Random((self.__semente * 1_000_003 + indice) * 8 + fluxo)
+
+    def __conversa(self, indice):
+        """
+        Retorna (índice inicial da conversa, posição da mensagem nela).
+        Os blocos têm tamanho fixo de 8; cada um é dividido em conversas.
+        """
+        bloco = indice - indice % 8
+        rnd = self.__rnd(bloco, 4)
+        inicio = bloco
+        while inicio < bloco + 8:
+            fim = inicio + rnd.randint(1, 5)
+            if indice < fim:
+                return inicio, indice - inicio
+            inicio = fim
+        return inicio, 0
+
+    def __assunto(self, inicio_conversa):
+        rnd = self.__rnd(inicio_conversa, 5)
+        palavras = rnd.sample(_PALAVRAS[:35], rnd.randint(2, 6))
+        return ' '.join(palavras).capitalize()
+
+    def __remetente(self, rnd):
+        # Lei de potência: os primeiros remetentes concentram as mensagens
+        numero = int(self.__remetentes * rnd.random() ** 3)
+        r = random.Random(self.__semente * 7919 + numero)
+        nome, sobrenome = r.choice(_NOMES), r.choice(_SOBRENOMES)
+        usuario = unicodedata.normalize('NFKD', f'{nome}.{sobrenome}{numero}'.lower())
+        usuario = usuario.encode('ascii', 'ignore').decode()
+        return f'{nome} {sobrenome} <{usuario}@{r.choice(_DOMINIOS)}>'
+
+    def __texto(self, rnd):
+        # Log-normal com mediana de ~1,5 KB (cerca de 8 bytes por palavra)
+        tamanho = min(int(math.exp(rnd.gauss(7.3, 1.1))), 200_000)
+        palavras = rnd.choices(_PALAVRAS, k=max(tamanho // 8, 3))
+        linhas = [' '.join(palavras[i:i + 12]) for i in range(0, len(palavras), 12)]
+        return '\n'.join(linhas) + '\n'
+
+    @staticmethod
+    def __html(texto, cid=None):
+        paragrafos = ''.join(f'<p>{linha}</p>' for linha in texto.splitlines())
+        imagem = f'<img src="cid:{cid}">' if cid else ''
+        return f'<html><body>{paragrafos}{imagem}</body></html>\n'
+
+    @staticmethod
+    def __binario(rnd, tipo, tamanho, nome=None, cid=None):
+        return {'tipo': tipo, 'tamanho': tamanho, 'deslocamento': rnd.randrange(len(_BLOCO)),
+                'nome': nome, 'cid': cid}
+
+    def __anexo(self, rnd):
+        maintype, subtype, extensao, _ = _sorteia(rnd, _ANEXOS)
+        nome = f'{rnd.choice(_PALAVRAS[:35])}_{rnd.randint(1, 999)}.{extensao}'
+        if maintype == 'text':
+            return {'tipo': 'text/csv', 'texto': self.__texto(rnd), 'charset': 'utf-8', 'nome': nome}
+        tamanho = min(int(math.exp(rnd.gauss(10.6, 1.4))), 5_000_000)
+        return self.__binario(rnd, f'{maintype}/{subtype}', tamanho, nome=nome)
+
+    @staticmethod
+    def __bytes(no):
+        repeticoes = no['tamanho'] // len(_BLOCO) + 2
+        return (_BLOCO[no['deslocamento']:] + _BLOCO * repeticoes)[:no['tamanho']]
+
+    def __preenche(self, parte, no, id_msg, caminho='0'):
+        """
+        Monta o nó do plano na parte MIME `parte`.
+        """
+        maintype, subtype = no['tipo'].split('/')
+        if 'partes' in no:
+            parte['Content-Type'] = f'{no["tipo"]}; boundary="=_{id_msg}.{caminho}"'
+            for i, filho in enumerate(no['partes']):
+                sub = MIMEPart()
+                self.__preenche(sub, filho, id_msg, f'{caminho}.{i}')
+                parte.attach(sub)
+        elif 'texto' in no:
+            parte.set_content(no['texto'], subtype=subtype, charset=no['charset'],
+                              disposition='attachment' if no.get('nome') else None, filename=no.get('nome'))
+        else:
+            parte.set_content(self.__bytes(no), maintype, subtype,
+                              disposition='inline' if no['cid'] else 'attachment',
+                              filename=no['nome'], cid=f'<{no["cid"]}>' if no['cid'] else None)
+
+    def __tamanho(self, no):
+        """
+        Tamanho aproximado do nó serializado (base64 nos binários).
+        """
+        if 'partes' in no:
+            return 120 + sum(self.__tamanho(filho) + 60 for filho in no['partes'])
+        if 'texto' in no:
+            # O email escolhe o menor entre quoted-printable e base64
+            dados = no['texto'].encode(no['charset'])
+            altos = len(dados.translate(None, bytes(range(128))))
+            qp = len(dados) + 2 * altos + len(dados) // 25
+            return 100 + min(qp, len(dados) * 4 // 3 * 78 // 76)
+        return 150 + no['tamanho'] * 4 // 3 * 78 // 76
+
+    def __primeiro_texto(self, no):
+        if 'partes' in no:
+            return self.__primeiro_texto(no['partes'][0])
+        return no.get('texto', '')
+
+    def __parte(self, no, part_id, id_msg, cabecalhos=()):
+        """
+        Converte um nó do plano em MessagePart da API: o corpo vem
+        decodificado do transfer-encoding, mas no charset original, e
+        anexos trazem apenas attachmentId e tamanho.
+        """
+        cabecalhos = list(cabecalhos)
+        if 'partes' in no:
+            cabecalhos.append(('Content-Type', f'{no["tipo"]}; boundary="=_{id_msg}.{part_id or 0}"'))
+        elif 'texto' in no:
+            cabecalhos += [('Content-Type', f'{no["tipo"]}; charset="{no["charset"]}"'),
+                           ('Content-Transfer-Encoding', 'quoted-printable')]
+        else:
+            cabecalhos += [('Content-Type', no['tipo']), ('Content-Transfer-Encoding', 'base64')]
+            if no['cid']:
+                cabecalhos.append(('Content-ID', f'<{no["cid"]}>'))
+        if no.get('nome'):
+            cabecalhos.append(('Content-Disposition', f'attachment; filename="{no["nome"]}"'))
+
+        recurso = {
+            'partId': part_id,
+            'mimeType': no['tipo'],
+            'filename': no.get('nome') or '',
+            'headers': [{'name': k, 'value': v} for k, v in cabecalhos],
+        }
+        if 'partes' in no:
+            recurso['body'] = {'size': 0}
+            recurso['parts'] = [self.__parte(filho, f'{part_id}.{i}' if part_id else str(i), id_msg)
+                                for i, filho in enumerate(no['partes'])]
+        elif 'texto' in no and not no.get('nome'):
+            dados = no['texto'].encode(no['charset'])
+            recurso['body'] = {'size': len(dados), 'data': _b64(dados)}
+        else:
+            tamanho = len(no['texto'].encode(no['charset'])) if 'texto' in no else no['tamanho']
+            recurso['body'] = {'attachmentId': f'{id_msg}.{part_id}', 'size': tamanho}
+        return recurso
@@ -0,0 +1,443 @@
+"""
+Serviço do Gmail falso, em memória, para benchmarks sem conta do Google.
+
+Imita a interface do objeto criado por `googleapiclient.discovery.build`
+(`service.users().messages().list(...).execute()`) e pode ser injetado em
+`EmailClient(..., service=GmailFalso())`. Implementa messages.list/get/send/
+batchModify, threads.list/get, labels.list/get, history.list e getProfile,
+com latência, tamanho de página, injeção de erros e cota por segundo
+configuráveis. O parâmetro `fields` é aceito e ignorado. O conteúdo vem de
+`caixa_sintetica.GeradorCaixa`.
+"""
+import base64
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+
+import limitador
+from caixa_sintetica import GeradorCaixa
+
+# Rótulos do sistema (o ID é o próprio nome) e rótulos criados pelo usuário
+ROTULOS_SISTEMA = ('INBOX', 'UNREAD', 'STARRED', 'IMPORTANT', 'SENT', 'DRAFT', 'SPAM', 'TRASH',
+                   'CATEGORY_PERSONAL', 'CATEGORY_UPDATES', 'CATEGORY_PROMOTIONS', 'CATEGORY_SOCIAL')
+ROTULOS_USUARIO = {'Label_1': 'Trabalho', 'Label_2': 'Pessoal', 'Label_3': 'Financeiro'}
+
+
+class RespostaFalsa(dict):
+    """Resposta HTTP mínima, como a `resp` de um HttpError."""
+
+    def __init__(self, status):
+        super().__init__(status=str(status))
+        self.status = status
+        self.reason = 'erro injetado'
+
+
+class ErroHttpFalso(Exception):
+    """
+    Erro HTTP injetado. Tem `resp.status` e `status_code`, como o
+    `googleapiclient.errors.HttpError`.
+    """
+
+    def __init__(self, status, uri=''):
+        super().__init__(f'<HttpError {status} "{uri}">')
+        self.resp = RespostaFalsa(status)
+        self.status_code = status
+        self.uri = uri
+
+
+class RequisicaoFalsa:
+    """
+    Requisição pendente, como o `HttpRequest` do googleapiclient.
+    """
+
+    def __init__(self, servico, metodo, funcao):
+        self.methodId = f'gmail.users.{metodo}'
+        self.uri = f'falso://{metodo}'
+        self.funcao = funcao
+        self.__servico = servico
+
+    def execute(self, http=None, num_retries=0):
+        self.__servico._ida_e_volta()
+        return self.__servico._executa(self.uri, self.funcao)
+
+
+# Tipos de registro do histórico: o valor de historyTypes e o campo da resposta
+_TIPOS_HISTORICO = {'messageAdded': 'messagesAdded', 'messageDeleted': 'messagesDeleted',
+                    'labelAdded': 'labelsAdded', 'labelRemoved': 'labelsRemoved'}
+
+
+class _Recurso:
+    """Agrupa os métodos de um recurso (messages, history)."""
+
+    def __init__(self, metodos):
+        for nome, funcao in metodos.items():
+            setattr(self, nome, funcao)
+
+
+class GmailFalso:
+    """
+    Serviço do Gmail em memória.
+
+    A caixa é gerada sob demanda pelo GeradorCaixa e listada da mais recente
+    (maior índice) para a mais antiga, como na API. Só as mensagens obtidas
+    mais recentemente ficam guardadas, de modo que caixas de milhões de
+    mensagens não ocupam memória.
+    """
+
+    # Mensagens montadas mantidas em memória
+    __guardadas = 10_000
+
+    def __init__(self, mensagens=1000, latencia=0.0, variacao=0.0, tamanho_pagina=100, taxa_erro=0.0,
+                 status_erro=(429, 500, 503), semente=0, gerador=None, cota=0):
+        """
+        Args:
+            mensagens (int): Número de mensagens na caixa.
+            latencia (float): Tempo, em segundos, de cada ida e volta.
+            variacao (float): Variação aleatória (±) somada à latência.
+            tamanho_pagina (int): maxResults padrão de messages.list.
+            taxa_erro (float): Probabilidade (0 a 1) de uma requisição falhar.
+            status_erro (tuple): Códigos HTTP sorteados nos erros injetados.
+            semente (int): Semente do conteúdo e dos sorteios.
+            gerador (GeradorCaixa): Conteúdo da caixa. O padrão é um
+                                    GeradorCaixa com a mesma semente.
+            cota (float): Unidades por segundo aceitas, com os custos de
+                          `limitador.CUSTOS`; acima disso as requisições
+                          recebem 429, como na API. 0 (padrão) não limita.
+        """
+        self.__total = mensagens
+        self.__latencia = latencia
+        self.__variacao = variacao
+        self.__tamanho_pagina = tamanho_pagina
+        self.__taxa_erro = taxa_erro
+        self.__status_erro = status_erro
+        self.__gerador = gerador or GeradorCaixa(semente)
+        self.__rnd = random.Random(semente)
+        self.__trava = threading.Lock()
+        self.__mensagens = OrderedDict()
+        self.__historico = []
+        self.__history_id = mensagens
+        self.__contagem = {}
+        self.__enviadas = 0
+        self.__bytes_enviados = 0
+        self.__cota = cota
+        self.__usadas = deque()
+        self.__soma_usadas = 0
+        self.__recusadas = 0
+        # Rótulos alterados por batchModify, por índice da mensagem
+        self.__rotulos_alterados = {}
+
+    # Interface do googleapiclient
+
+    def users(self):
+        return _Recurso({
+            'getProfile': self.__get_profile,
+            'messages': lambda: _Recurso({
+                'list': self.__messages_list,
+                'get': self.__messages_get,
+                'send': self.__messages_send,
+                'batchModify': self.__messages_batch_modify,
+            }),
+            'threads': lambda: _Recurso({
+                'list': self.__threads_list,
+                'get': self.__threads_get,
+            }),
+            'labels': lambda: _Recurso({
+                'list': self.__labels_list,
+                'get': self.__labels_get,
+            }),
+            'history': lambda: _Recurso({
+                'list': self.__history_list,
+            }),
+        })
+
+    # Controle do benchmark
+
+    def adiciona_mensagens(self, quantidade=1):
+        """
+        Simula a chegada de novas mensagens, registrando-as no histórico.
+
+        Returns:
+            list[str]: Os IDs das mensagens adicionadas.
+        """
+        ids = []
+        with self.__trava:
+            for _ in range(quantidade):
+                indice = self.__total
+                self.__total += 1
+                self.__history_id += 1
+                ids.append(self.__gerador.id_(indice))
+                self.__historico.append((self.__history_id, indice, 'messagesAdded', None))
+        return ids
+
+    def estatisticas(self):
+        """
+        Returns:
+            dict: Requisições por método, mensagens enviadas e bytes enviados.
+        """
+        with self.__trava:
+            return {'requisicoes': dict(self.__contagem), 'enviadas': self.__enviadas,
+                    'bytes_enviados': self.__bytes_enviados, 'recusadas_cota': self.__recusadas}
+
+    # Execução
+
+    def _ida_e_volta(self):
+        espera = self.__latencia
+        if self.__variacao:
+            with self.__trava:
+                espera += self.__rnd.uniform(-self.__variacao, self.__variacao)
+        if espera > 0:
+            time.sleep(espera)
+
+    def _executa(self, uri, funcao):
+        with self.__trava:
+            metodo = uri.removeprefix('falso://')
+            self.__contagem[metodo] = self.__contagem.get(metodo, 0) + 1
+            falha = self.__taxa_erro and self.__rnd.random() < self.__taxa_erro
+            status = self.__rnd.choice(self.__status_erro) if falha else None
+            if not falha and self.__cota and not self.__dentro_da_cota(metodo):
+                falha, status = True, 429
+                self.__recusadas += 1
+        if falha:
+            raise ErroHttpFalso(status, uri)
+        return funcao()
+
+    def __dentro_da_cota(self, metodo):
+        """
+        Janela deslizante de um segundo com as unidades usadas. Chamado com a trava.
+        """
+        agora = time.monotonic()
+        while self.__usadas and self.__usadas[0][0] <= agora - 1.0:
+            self.__soma_usadas -= self.__usadas.popleft()[1]
+        custo = limitador.CUSTOS.get(metodo, limitador.CUSTO_PADRAO)
+        if self.__soma_usadas + custo > self.__cota:
+            return False
+        self.__usadas.append((agora, custo))
+        self.__soma_usadas += custo
+        return True
+
+    def __mensagem(self, indice, formato):
+        chave = (indice, formato)
+        with self.__trava:
+            mensagem = self.__mensagens.get(chave)
+            if mensagem is not None:
+                self.__mensagens.move_to_end(chave)
+                return mensagem
+        mensagem = self.__gerador.mensagem(indice, formato)
+        with self.__trava:
+            self.__mensagens[chave] = mensagem
+            if len(self.__mensagens) > self.__guardadas:
+                self.__mensagens.popitem(last=False)
+        return mensagem
+
+    def __rotulos(self, indice):
+        """Rótulos atuais da mensagem, com as alterações de batchModify."""
+        alterados = self.__rotulos_alterados.get(indice)
+        return list(alterados) if alterados is not None else self.__gerador.rotulos(indice)
+
+    def __com_rotulos(self, indice, mensagem):
+        """A mensagem com os rótulos atuais (sem alterar a guardada)."""
+        if indice in self.__rotulos_alterados:
+            return dict(mensagem, labelIds=self.__rotulos(indice))
+        return mensagem
+
+    def __filtro(self, q, rotulos):
+        """
+        Entende apenas 'label:X', 'in:X' e 'is:unread'; outros termos casam tudo.
+        """
+        exigidos = set(rotulos or [])
+        for termo in (q or '').split():
+            chave, _, valor = termo.partition(':')
+            if chave in ('label', 'in'):
+                exigidos.add(valor.upper())
+            elif termo == 'is:unread':
+                exigidos.add('UNREAD')
+        return exigidos
+
+    def __messages_list(self, userId='me', q=None, labelIds=None, maxResults=None, pageToken=None, **kwargs):
+        def lista():
+            exigidos = self.__filtro(q, labelIds)
+            tamanho = min(maxResults or self.__tamanho_pagina, 500)
+            indice = int(pageToken) if pageToken else self.__total - 1
+            mensagens = []
+            primeiro = indice
+            while indice >= 0 and len(mensagens) < tamanho:
+                # Os rótulos saem do gerador sem montar a mensagem
+                if exigidos <= set(self.__rotulos(indice)):
+                    mensagens.append({'id': self.__gerador.id_(indice), 'threadId': self.__gerador.thread_id(indice)})
+                indice -= 1
+            # Como na API, a estimativa é do total da busca e só é exata sem
+            # filtros; aqui é extrapolada da fração das mensagens varridas
+            varridas = primeiro - indice
+            estimativa = self.__total if not exigidos else round(len(mensagens) / varridas * self.__total) \
+                if varridas else 0
+            resposta = {'resultSizeEstimate': estimativa}
+            if mensagens:
+                resposta['messages'] = mensagens
+            if indice >= 0:
+                resposta['nextPageToken'] = str(indice)
+            return resposta
+        return RequisicaoFalsa(self, 'messages.list', lista)
+
+    def __messages_get(self, userId='me', id=None, format='full', metadataHeaders=None, **kwargs):
+        def obtem():
+            try:
+                indice = self.__gerador.indice(id)
+            except (TypeError, ValueError):
+                raise ErroHttpFalso(400, 'falso://messages.get')
+            if not 0 <= indice < self.__total:
+                raise ErroHttpFalso(404, 'falso://messages.get')
+            if format == 'metadata':
+                return self.__com_rotulos(indice, self.__gerador.mensagem(indice, format, metadataHeaders))
+            return self.__com_rotulos(indice, self.__mensagem(indice, format))
+        return RequisicaoFalsa(self, 'messages.get', obtem)
+
+    def __threads_list(self, userId='me', q=None, labelIds=None, maxResults=None, pageToken=None, **kwargs):
+        def lista():
+            exigidos = self.__filtro(q, labelIds)
+            tamanho = min(maxResults or self.__tamanho_pagina, 500)
+            indice = int(pageToken) if pageToken else self.__total - 1
+            conversas = []
+            # As mensagens de uma conversa são vizinhas: basta agrupar os índices
+            while indice >= 0 and len(conversas) < tamanho:
+                thread_id = self.__gerador.thread_id(indice)
+                casou = False
+                while indice >= 0 and self.__gerador.thread_id(indice) == thread_id:
+                    casou = casou or exigidos <= set(self.__rotulos(indice))
+                    indice -= 1
+                if casou:
+                    conversas.append({'id': thread_id})
+            resposta = {'resultSizeEstimate': len(conversas)}
+            if conversas:
+                resposta['threads'] = conversas
+            if indice >= 0:
+                resposta['nextPageToken'] = str(indice)
+            return resposta
+        return RequisicaoFalsa(self, 'threads.list', lista)
+
+    def __threads_get(self, userId='me', id=None, format='full', metadataHeaders=None, **kwargs):
+        def obtem():
+            try:
+                inicio = self.__gerador.indice(id)
+            except (TypeError, ValueError):
+                raise ErroHttpFalso(400, 'falso://threads.get')
+            if not 0 <= inicio < self.__total or self.__gerador.thread_id(inicio) != id:
+                raise ErroHttpFalso(404, 'falso://threads.get')
+            mensagens = []
+            indice = inicio
+            while indice < self.__total and self.__gerador.thread_id(indice) == id:
+                if format == 'metadata':
+                    mensagem = self.__gerador.mensagem(indice, format, metadataHeaders)
+                else:
+                    mensagem = self.__mensagem(indice, format)
+                mensagens.append(self.__com_rotulos(indice, mensagem))
+                indice += 1
+            return {'id': id, 'historyId': mensagens[-1]['historyId'], 'messages': mensagens}
+        return RequisicaoFalsa(self, 'threads.get', obtem)
+
+    def __messages_batch_modify(self, userId='me', body=None, **kwargs):
+        def modifica():
+            body_ = body or {}
+            ids = body_.get('ids', [])
+            adicionar = body_.get('addLabelIds', [])
+            remover = body_.get('removeLabelIds', [])
+            validos = set(ROTULOS_SISTEMA) | set(ROTULOS_USUARIO)
+            if not ids or len(ids) > 1000 or not validos.issuperset(adicionar + remover):
+                raise ErroHttpFalso(400, 'falso://messages.batchModify')
+            try:
+                indices = [self.__gerador.indice(id_msg) for id_msg in ids]
+            except (TypeError, ValueError):
+                raise ErroHttpFalso(400, 'falso://messages.batchModify')
+            with self.__trava:
+                for indice in indices:
+                    if not 0 <= indice < self.__total:
+                        continue
+                    antes = self.__rotulos(indice)
+                    rotulos = [r for r in antes if r not in remover]
+                    self.__rotulos_alterados[indice] = rotulos + [r for r in adicionar if r not in rotulos]
+                    # Como na API, as alterações efetivas entram no histórico
+                    for tipo, alterados in (('labelsAdded', [r for r in adicionar if r not in antes]),
+                                            ('labelsRemoved', [r for r in remover if r in antes])):
+                        if alterados:
+                            self.__history_id += 1
+                            self.__historico.append((self.__history_id, indice, tipo, alterados))
+            # A resposta do batchModify é vazia
+            return {}
+        return RequisicaoFalsa(self, 'messages.batchModify', modifica)
+
+    def __labels_list(self, userId='me', **kwargs):
+        def lista():
+            rotulos = [{'id': r, 'name': r, 'type': 'system'} for r in ROTULOS_SISTEMA]
+            rotulos += [{'id': id_, 'name': nome, 'type': 'user'} for id_, nome in ROTULOS_USUARIO.items()]
+            return {'labels': rotulos}
+        return RequisicaoFalsa(self, 'labels.list', lista)
+
+    def __labels_get(self, userId='me', id=None, **kwargs):
+        def obtem():
+            nomes = dict(zip(ROTULOS_SISTEMA, ROTULOS_SISTEMA), **ROTULOS_USUARIO)
+            if id not in nomes:
+                raise ErroHttpFalso(404, 'falso://labels.get')
+            total = nao_lidas = 0
+            conversas, conversas_nao_lidas = set(), set()
+            with self.__trava:
+                quantidade = self.__total
+            # Os contadores são mantidos pelo Gmail; aqui são calculados varrendo a caixa
+            for indice in range(quantidade):
+                rotulos = self.__rotulos(indice)
+                if id in rotulos:
+                    total += 1
+                    conversas.add(self.__gerador.thread_id(indice))
+                    if 'UNREAD' in rotulos:
+                        nao_lidas += 1
+                        conversas_nao_lidas.add(self.__gerador.thread_id(indice))
+            return {'id': id, 'name': nomes[id], 'messagesTotal': total, 'messagesUnread': nao_lidas,
+                    'threadsTotal': len(conversas), 'threadsUnread': len(conversas_nao_lidas)}
+        return RequisicaoFalsa(self, 'labels.get', obtem)
+
+    def __messages_send(self, userId='me', body=None, **kwargs):
+        def envia():
+            bruto = base64.urlsafe_b64decode((body or {}).get('raw', ''))
+            with self.__trava:
+                self.__enviadas += 1
+                self.__bytes_enviados += len(bruto)
+                numero = self.__enviadas
+            return {'id': f'e{numero:015x}', 'threadId': f'e{numero:015x}', 'labelIds': ['SENT']}
+        return RequisicaoFalsa(self, 'messages.send', envia)
+
+    def __get_profile(self, userId='me', **kwargs):
+        def obtem():
+            with self.__trava:
+                return {'emailAddress': 'falso@exemplo.com', 'messagesTotal': self.__total,
+                        'threadsTotal': self.__total, 'historyId': str(self.__history_id)}
+        return RequisicaoFalsa(self, 'getProfile', obtem)
+
+    def __history_list(self, userId='me', startHistoryId=None, historyTypes=None, pageToken=None,
+                       maxResults=None, **kwargs):
+        def lista():
+            inicio = int(startHistoryId)
+            with self.__trava:
+                historico = list(self.__historico)
+                atual = self.__history_id
+            # A API só guarda o histórico recente; antes dele responde 404
+            if historico and inicio < historico[0][0] - 1:
+                raise ErroHttpFalso(404, 'falso://history.list')
+            tamanho = maxResults or self.__tamanho_pagina
+            posicao = int(pageToken) if pageToken else 0
+            # historyTypes usa o singular ('messageAdded'); a resposta, o plural
+            tipos = {_TIPOS_HISTORICO[t] for t in historyTypes or _TIPOS_HISTORICO}
+            novos = [h for h in historico if h[0] > inicio and h[2] in tipos][posicao:posicao + tamanho]
+            resposta = {'historyId': str(atual)}
+            if novos:
+                resposta['history'] = []
+                for history_id, indice, tipo, alterados in novos:
+                    with self.__trava:
+                        rotulos = self.__rotulos(indice)
+                    item = {'message': {'id': self.__gerador.id_(indice),
+                                        'threadId': self.__gerador.thread_id(indice), 'labelIds': rotulos}}
+                    if alterados is not None:
+                        item['labelIds'] = alterados
+                    resposta['history'].append({'id': str(history_id), tipo: [item]})
+                if len(novos) == tamanho:
+                    resposta['nextPageToken'] = str(posicao + tamanho)
+            return resposta
+        return RequisicaoFalsa(self, 'history.list', lista)
@@ -0,0 +1,113 @@
+import queue
+import threading
+import time
+from email.utils import getaddresses
+
+
+class ColetorContatos:
+    """
+    Coleta contatos dos cabeçalhos From/To/Cc dos e-mails buscados.
+
+    `registra()` apenas enfileira os cabeçalhos, sem custo perceptível para
+    a busca. Uma thread em segundo plano analisa os endereços e os grava no
+    banco em lotes, com `DataBase.salva_contatos`, a cada `lote` endereços
+    ou a cada `intervalo` segundos, o que vier primeiro. O último uso de
+    cada endereço é a data do e-mail mais recente em que ele aparece, e não
+    o momento da busca.
+    """
+
+    def __init__(self, data_base, lote=500, intervalo=5.0):
+        """
+        Inicializa o coletor e inicia a thread de gravação.
+
+        Args:
+            data_base (DataBase): Banco onde os contatos serão salvos.
+            lote (int, opcional): Número de endereços por gravação. O padrão é 500.
+            intervalo (float, opcional): Tempo máximo, em segundos, que um
+                                         endereço espera para ser gravado.
+                                         O padrão é 5.
+        """
+        self.__data_base = data_base
+        self.__lote = lote
+        self.__intervalo = intervalo
+        self.__fila = queue.Queue()
+        self.__coletados = 0
+        self.__thread = threading.Thread(target=self.__trabalha, name='coletor-contatos', daemon=True)
+        self.__thread.start()
+
+    def registra(self, email):
+        """
+        Enfileira os cabeçalhos e a data de um e-mail para coleta.
+
+        Args:
+            email (Email): O e-mail recém-buscado.
+        """
+        self.__fila.put(((email.remetente, email.destinatario, email.copia), email.data_ts))
+
+    def fecha(self):
+        """
+        Grava os endereços pendentes e encerra a thread.
+        """
+        if self.__thread.is_alive():
+            self.__fila.put(None)
+            self.__thread.join()
+
+    @property
+    def coletados(self):
+        """Retorna o número de endereços já enviados ao banco."""
+        return self.__coletados
+
+    def __trabalha(self):
+        """
+        Laço da thread: acumula endereços e grava em lotes.
+        """
+        pendentes = []
+        # Endereço -> data do e-mail mais recente em que aparece
+        instantes = {}
+        limite = None
+        while True:
+            espera = None if limite is None else max(0.0, limite - time.monotonic())
+            try:
+                item = self.__fila.get(timeout=espera)
+            except queue.Empty:
+                item = ((), None)
+
+            if item is None:
+                self.__grava(pendentes, instantes)
+                return
+
+            cabecalhos, instante = item
+            for endereco in self.__enderecos(cabecalhos):
+                pendentes.append(endereco)
+                if instante is not None:
+                    instantes[endereco] = max(instante, instantes.get(endereco, instante))
+                if limite is None:
+                    limite = time.monotonic() + self.__intervalo
+
+            if pendentes and (len(pendentes) >= self.__lote or time.monotonic() >= limite):
+                self.__grava(pendentes, instantes)
+                pendentes = []
+                instantes = {}
+                limite = None
+
+    @staticmethod
+    def __enderecos(cabecalhos):
+        """
+        Extrai os endereços de e-mail válidos de uma tupla de cabeçalhos.
+        """
+        for _, endereco in getaddresses([c for c in cabecalhos if c]):
+            endereco = endereco.strip().lower()
+            if '@' in endereco and len(endereco) <= 254:
+                yield endereco
+
+    def __grava(self, enderecos, instantes):
+        """
+        Grava um lote de endereços, sem deixar erros derrubarem a thread.
+        """
+        if not enderecos:
+            return
+        try:
+            self.__data_base.salva_contatos(enderecos, instantes)
+            self.__coletados += len(enderecos)
+        except Exception as error:
+            print(f'\aErro ao salvar contatos coletados: {error}')
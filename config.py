@@ -0,0 +1,133 @@
+import json
+import os
+
+# Arquivo de configuração opcional. Pode ser trocado pela variável de ambiente
+# EMAIL_CONSOLE_CONFIG.
+ARQUIVO_CONFIG = os.environ.get('EMAIL_CONSOLE_CONFIG', 'config.json')
+
+# Valores usados quando a chave não está presente no arquivo de configuração.
+PADRAO = {
+    # Backend de armazenamento: 'mysql' (servidor MySQL/MariaDB) ou 'sqlite' (arquivo local)
+    'db_backend': 'mysql',
+    # Arquivo do banco quando o backend é 'sqlite'
+    'db_sqlite_arquivo': 'email_console.db',
+    # Servidor, usuário e nome do banco quando o backend é 'mysql'
+    'db_mysql_host': 'localhost',
+    'db_mysql_usuario': 'root',
+    'db_mysql_nome': 'sistema',
+    # Número máximo de conexões simultâneas com o banco de dados
+    'db_pool_tamanho': 4,
+    # Tempo máximo (segundos) de espera por uma conexão livre do pool
+    'db_pool_espera': 10.0,
+    # Conexões ociosas há mais que este tempo (segundos) são testadas antes do uso
+    'db_pool_verifica_apos': 30.0,
+    # Meia-vida, em dias, da frecência usada para ordenar contatos no autocompletar
+    'contatos_meia_vida_dias': 30.0,
+    # Número de endereços coletados dos cabeçalhos gravados por lote
+    'coleta_lote': 500,
+    # Intervalo máximo, em segundos, entre gravações de contatos coletados
+    'coleta_intervalo': 5.0,
+    # Token OAuth (JSON, permissão 0600) e segredos do cliente OAuth
+    'gmail_token_arquivo': 'token.json',
+    'gmail_segredos_arquivo': 'credentials.json',
+    # Outras contas do Gmail, além da principal (a do token acima), pelo
+    # nome: {"suporte": {"token": "token_suporte.json"}}. Cada uma tem o seu
+    # token, cache e cota; opcionalmente usuario (userId, padrão 'me'),
+    # remetente (From dos envios) e cota_unidades_s
+    'gmail_contas': {},
+    # Antecedência, em segundos, da renovação automática do token
+    'gmail_token_margem': 300.0,
+    # Cópia local do documento de descoberta da API do Gmail
+    'gmail_discovery_arquivo': 'gmail.v1.json',
+    # Pede à API apenas os campos usados (parâmetro `fields`)
+    'gmail_projecoes': True,
+    # Resumo das operações (o mesmo do comando stats=) gravado em JSON ao sair;
+    # vazio desativa
+    'stats_arquivo': 'stats.json',
+    # Cronômetros das funções críticas ligados ao iniciar (alterável com timers=)
+    'perfil_cronometros': True,
+    # Requisições simultâneas à API (uma conexão keep-alive por host em cada)
+    'http_pool_tamanho': 4,
+    # Timeout, em segundos, das requisições à API
+    'http_timeout': 60.0,
+    # Cota da API do Gmail por usuário, em unidades por segundo, respeitada
+    # por todas as chamadas (0 desativa o limitador), e unidades que podem
+    # ser usadas de uma vez
+    'gmail_cota_unidades_s': 250,
+    'gmail_cota_rajada': 50,
+    # Como as mensagens completas são obtidas: 'json' (format='full', partes
+    # já separadas pela API) ou 'bruto' (format='raw', MIME analisado localmente)
+    'gmail_motor': 'json',
+    # Processos que analisam o MIME das mensagens baixadas em grandes
+    # volumes com o motor 'bruto' (0 analisa na própria thread) e mensagens
+    # enviadas a um processo por vez
+    'analise_processos': 0,
+    'analise_lote': 32,
+    # Execuções de uma chamada à API que falha com 429, 5xx ou erro de rede
+    # (incluindo a primeira) e espera base e máxima, em segundos, entre elas
+    'gmail_tentativas': 5,
+    'gmail_espera_base': 0.5,
+    'gmail_espera_maxima': 30.0,
+    # Se True, search= lista conversas (uma linha por thread) quando threads=
+    # não é informado
+    'busca_conversas': False,
+    # Mantém o cache atualizado em segundo plano enquanto o prompt está
+    # ocioso: lê o histórico da caixa a cada aquecedor_intervalo segundos e
+    # mantém as primeiras aquecedor_limite mensagens de cada busca de
+    # aquecedor_buscas, que search= atende sem a API enquanto confirmadas há
+    # menos de aquecedor_validade segundos. O aquecedor espera enquanto a
+    # utilização da cota passar de aquecedor_utilizacao (0 a 1)
+    'aquecedor_ativo': False,
+    'aquecedor_buscas': ['label:unread'],
+    'aquecedor_limite': 50,
+    'aquecedor_intervalo': 30.0,
+    'aquecedor_validade': 60.0,
+    'aquecedor_utilizacao': 0.5,
+    # Comandos executados ao mesmo tempo no modo em lote (--batch), se --jobs
+    # não for informado
+    'lote_tarefas': 4,
+    # Processos que analisam as mensagens no import= (0 usa o número de CPUs)
+    'importa_processos': 0,
+    # Mensagens importadas gravadas no banco por vez
+    'importa_lote': 500,
+}
+
+_config = None
+
+
+def carrega(caminho=None):
+    """
+    Lê o arquivo de configuração (JSON) e mescla com os valores padrão.
+
+    Se o arquivo não existir, apenas os valores padrão são usados.
+
+    Args:
+        caminho (str, opcional): Caminho do arquivo. O padrão é ARQUIVO_CONFIG.
+
+    Returns:
+        dict: A configuração carregada.
+    """
+    global _config
+    config = dict(PADRAO)
+    caminho = caminho or ARQUIVO_CONFIG
+    if os.path.exists(caminho):
+        with open(caminho, 'r', encoding='utf-8') as f:
+            config.update(json.load(f))
+    _config = config
+    return config
+
+
+def get(chave, padrao=None):
+    """
+    Retorna o valor de uma chave de configuração, carregando o arquivo na
+    primeira chamada.
+
+    Args:
+        chave (str): Nome da chave.
+        padrao (Any, opcional): Valor retornado se a chave não existir.
+
+    Returns:
+        Any: O valor configurado.
+    """
+    config = _config if _config is not None else carrega()
+    return config.get(chave, padrao)
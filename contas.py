@@ -0,0 +1,255 @@
+import contextlib
+import heapq
+import itertools
+import queue
+import threading
+
+import config
+import gmail_server
+from credenciais import GerenciadorCredenciais
+from limitador import LimitadorCota
+
+# Nome da conta do token de 'gmail_token_arquivo'
+PRINCIPAL = 'principal'
+
+
+def configuradas():
+    """
+    Retorna as contas configuradas: a principal e as de 'gmail_contas'.
+
+    Returns:
+        dict[str, dict]: Opções de cada conta, pelo nome: token, usuario,
+                         remetente e cota_unidades_s (todas opcionais).
+    """
+    contas = {PRINCIPAL: {}}
+    contas.update(config.get('gmail_contas') or {})
+    return contas
+
+
+def cria_client(email, nome=None, opcoes=None, interativo=True):
+    """
+    Cria o EmailClient de uma conta, com as suas próprias credenciais,
+    conexões e limitador de cota.
+
+    Args:
+        email (gmail_server.Email): Objeto repassado ao EmailClient.
+        nome (str, opcional): Nome da conta, gravado nos e-mails. None com
+                              uma só conta.
+        opcoes (dict, opcional): Opções da conta (ver `configuradas`); sem
+                                 'token', usa 'gmail_token_arquivo'.
+        interativo (bool, opcional): Permite o fluxo OAuth no navegador.
+                                     O padrão é True.
+
+    Returns:
+        gmail_server.EmailClient: O cliente da conta.
+    """
+    opcoes = opcoes or {}
+    credenciais = GerenciadorCredenciais(
+        gmail_server.ESCOPOS,
+        arquivo_token=opcoes.get('token') or config.get('gmail_token_arquivo'),
+        arquivo_segredos=config.get('gmail_segredos_arquivo'),
+        margem=config.get('gmail_token_margem')
+    )
+    limitador = None
+    if opcoes.get('cota_unidades_s'):
+        limitador = LimitadorCota(opcoes['cota_unidades_s'], config.get('gmail_cota_rajada'))
+    return gmail_server.EmailClient(email, interativo, credenciais=credenciais, limitador=limitador, conta=nome,
+                                    usuario=opcoes.get('usuario'), remetente=opcoes.get('remetente'))
+
+
+class Conta:
+    """
+    Uma caixa de e-mail aberta: o cliente, o cache e o aquecedor da conta.
+    """
+
+    def __init__(self, nome, client, cache, aquecedor=None):
+        """
+        Args:
+            nome (str): O nome da conta.
+            client (gmail_server.EmailClient): O cliente da conta.
+            cache (gmail_server.Email_Cache): O cache da conta.
+            aquecedor (aquecedor.AquecedorCache, opcional): O aquecedor do cache.
+        """
+        self.__nome = nome
+        self.__client = client
+        self.__cache = cache
+        self.__aquecedor = aquecedor
+
+    @property
+    def nome(self):
+        """Retorna o nome da conta."""
+        return self.__nome
+
+    @property
+    def client(self):
+        """Retorna o EmailClient da conta."""
+        return self.__client
+
+    @property
+    def cache(self):
+        """Retorna o Email_Cache da conta."""
+        return self.__cache
+
+    @property
+    def aquecedor(self):
+        """Retorna o AquecedorCache da conta (ou None)."""
+        return self.__aquecedor
+
+
+class GerenciadorContas:
+    """
+    Mantém as contas abertas e a conta ativa, usada pelos comandos.
+
+    Cada conta tem as suas credenciais, o seu cache e o seu limitador de
+    cota, de modo que uma caixa movimentada não consome a cota das demais.
+    `busca` consulta várias contas ao mesmo tempo e mescla os resultados
+    pela data, à medida que chegam.
+    """
+
+    def __init__(self, contas, ativa=None):
+        """
+        Args:
+            contas (list[Conta]): As contas abertas.
+            ativa (str, opcional): O nome da conta ativa. O padrão é a primeira.
+        """
+        self.__contas = {conta.nome: conta for conta in contas}
+        self.__ativa = ativa or contas[0].nome
+
+    @property
+    def nomes(self):
+        """Retorna os nomes das contas abertas."""
+        return list(self.__contas)
+
+    @property
+    def varias(self):
+        """Indica se há mais de uma conta aberta."""
+        return len(self.__contas) > 1
+
+    @property
+    def ativa(self):
+        """Retorna a Conta ativa."""
+        return self.__contas[self.__ativa]
+
+    def usa(self, nome):
+        """
+        Troca a conta ativa.
+
+        Raises:
+            ValueError: Se não há conta com esse nome.
+        """
+        self.__ativa = self.conta(nome).nome
+
+    def conta(self, nome=None):
+        """
+        Retorna a Conta `nome` (a ativa, se None).
+
+        Raises:
+            ValueError: Se não há conta com esse nome.
+        """
+        if nome is None:
+            return self.ativa
+        if nome not in self.__contas:
+            raise ValueError(f'Conta desconhecida: {nome} (contas: {", ".join(self.__contas)})')
+        return self.__contas[nome]
+
+    def de(self, item):
+        """
+        Retorna a Conta de origem de um Email ou Conversa (a ativa, se o
+        item não tem conta, como com uma só conta).
+        """
+        email_ = item.emails[0] if isinstance(item, gmail_server.Conversa) else item
+        return self.__contas.get(email_.conta) or self.ativa
+
+    @property
+    def novas(self):
+        """Retorna as mensagens novas vistas pelos aquecedores de todas as contas."""
+        return sum(conta.aquecedor.novas for conta in self.__contas.values() if conta.aquecedor is not None)
+
+    def zera_novas(self):
+        """Marca como vistas as mensagens novas de todas as contas."""
+        for conta in self.__contas.values():
+            if conta.aquecedor is not None:
+                conta.aquecedor.zera_novas()
+
+    @contextlib.contextmanager
+    def pausa(self):
+        """
+        Pausa os aquecedores de todas as contas durante as chamadas de um comando.
+        """
+        with contextlib.ExitStack() as pilha:
+            for conta in self.__contas.values():
+                if conta.aquecedor is not None:
+                    pilha.enter_context(conta.aquecedor.pausa())
+            yield
+
+    def busca(self, query, limite, nomes=None, relatorio=None):
+        """
+        Busca nas contas ao mesmo tempo, uma thread por conta, e mescla os
+        resultados do mais novo para o mais antigo.
+
+        A API devolve cada busca do mais novo para o mais antigo: um e-mail
+        sai assim que todas as contas entregaram um e-mail mais antigo (ou
+        terminaram), sem esperar as buscas inteiras. Os e-mails são
+        guardados no cache da sua conta.
+
+        Args:
+            query (str): A string de busca.
+            limite (int): O número máximo de e-mails, no total.
+            nomes (list[str], opcional): As contas consultadas. O padrão é todas.
+            relatorio (RelatorioBusca, opcional): Recebe as mensagens
+                                                  perdidas ('conta:ID') e
+                                                  os erros de cada conta.
+
+        Yields:
+            Email: Os e-mails, mais novos primeiro, marcados com a conta.
+
+        Raises:
+            ValueError: Se um dos nomes não é de uma conta aberta.
+        """
+        contas = [self.conta(nome) for nome in nomes] if nomes else list(self.__contas.values())
+        relatorio = relatorio if relatorio is not None else gmail_server.RelatorioBusca()
+        parar = threading.Event()
+        buscas = []
+        for conta in contas:
+            fila, parcial = queue.Queue(), gmail_server.RelatorioBusca()
+            thread = threading.Thread(target=self.__produz, args=(conta, query, limite, parcial, fila, parar),
+                                      name=f'busca-{conta.nome}', daemon=True)
+            thread.start()
+            buscas.append((conta, fila, parcial, thread))
+        try:
+            fluxos = [iter(fila.get, None) for _, fila, _, _ in buscas]
+            yield from itertools.islice(heapq.merge(*fluxos, key=_instante, reverse=True), limite)
+        finally:
+            parar.set()
+            erros = []
+            for conta, _, parcial, thread in buscas:
+                thread.join()
+                relatorio.perdidas.extend(f'{conta.nome}:{id_msg}' for id_msg in parcial.perdidas)
+                if parcial.erro:
+                    erros.append(f'{conta.nome}: {parcial.erro}')
+            if erros:
+                relatorio.erro = '; '.join(erros)
+
+    @staticmethod
+    def __produz(conta, query, limite, relatorio, fila, parar):
+        """
+        Thread de uma conta: baixa a busca e entrega os e-mails na fila,
+        terminando com None.
+        """
+        emails = conta.client.baixa(query, limite, relatorio)
+        try:
+            for email_ in emails:
+                conta.cache.adiciona_emails([email_])
+                fila.put(email_)
+                if parar.is_set():
+                    break
+        except Exception as error:
+            relatorio.erro = str(error)
+        finally:
+            emails.close()
+            fila.put(None)
+
+
+def _instante(email_):
+    # E-mails sem data válida vão para o fim
+    return email_.data_ts or 0
@@ -0,0 +1,190 @@
+import os
+import pickle
+import threading
+from datetime import datetime, timezone
+
+
+class AutenticacaoNecessaria(Exception):
+    """
+    Lançada quando o cliente é criado em modo não interativo e não há
+    credenciais salvas válidas, sendo necessário o fluxo OAuth no navegador.
+    """
+
+
+class GerenciadorCredenciais:
+    """
+    Mantém as credenciais OAuth do Gmail sempre válidas.
+
+    - O token é salvo em JSON (não em pickle), com permissão 0600 e gravação
+      atômica. Um `token.pickle` antigo é convertido na primeira execução.
+    - Um temporizador em segundo plano renova o token `margem` segundos antes
+      de expirar, de modo que nenhuma requisição do usuário paga a latência
+      da renovação.
+    - Um único objeto de credenciais é compartilhado por todas as threads e
+      conexões; a renovação é protegida por uma trava.
+    """
+
+    # Espera, em segundos, antes de tentar de novo uma renovação que falhou
+    __espera_falha = 60.0
+
+    def __init__(self, scopes, arquivo_token='token.json', arquivo_segredos='credentials.json', margem=300.0):
+        """
+        Inicializa o gerenciador. As credenciais são carregadas em `obtem()`.
+
+        Args:
+            scopes (list[str]): Permissões solicitadas à API.
+            arquivo_token (str, opcional): Onde o token é salvo.
+            arquivo_segredos (str, opcional): Segredos do cliente OAuth.
+            margem (float, opcional): Antecedência, em segundos, da renovação.
+                                      O padrão é 300.
+        """
+        self.__scopes = scopes
+        self.__arquivo_token = arquivo_token
+        self.__arquivo_segredos = arquivo_segredos
+        self.__margem = margem
+        self.__credentials = None
+        self.__trava = threading.RLock()
+        self.__temporizador = None
+        self.__renovacoes = 0
+        self.__falhas = 0
+
+    @property
+    def credentials(self):
+        """Retorna o objeto de credenciais compartilhado."""
+        return self.__credentials
+
+    def obtem(self, interativo=True):
+        """
+        Carrega, renova ou cria as credenciais e agenda a próxima renovação.
+
+        Args:
+            interativo (bool, opcional): Se False, não abre o navegador para
+                                         o fluxo OAuth. O padrão é True.
+
+        Returns:
+            google.oauth2.credentials.Credentials: As credenciais válidas.
+
+        Raises:
+            AutenticacaoNecessaria: Se `interativo` for False e não houver
+                                    credenciais salvas utilizáveis.
+        """
+        with self.__trava:
+            credentials = self.__credentials or self.__carrega()
+
+            if not credentials or not credentials.valid:
+                if credentials and credentials.refresh_token:
+                    self.__renova(credentials)
+                elif not interativo:
+                    raise AutenticacaoNecessaria('Credenciais salvas ausentes ou inválidas')
+                else:
+                    from google_auth_oauthlib.flow import InstalledAppFlow
+                    fluxo = InstalledAppFlow.from_client_secrets_file(self.__arquivo_segredos, self.__scopes)
+                    credentials = fluxo.run_local_server(port=0)
+                    self.__salva(credentials)
+
+            self.__credentials = credentials
+            self.__agenda()
+            return credentials
+
+    def renova(self):
+        """
+        Renova o token imediatamente (usada pelo temporizador).
+        """
+        with self.__trava:
+            if self.__credentials is None:
+                return
+            try:
+                self.__renova(self.__credentials)
+            except Exception as error:
+                self.__falhas += 1
+                print(f'\aErro ao renovar o token: {error}')
+                self.__agenda(self.__espera_falha)
+                return
+            self.__agenda()
+
+    def para(self):
+        """
+        Cancela a renovação automática.
+        """
+        with self.__trava:
+            if self.__temporizador:
+                self.__temporizador.cancel()
+                self.__temporizador = None
+
+    def estatisticas(self):
+        """
+        Retorna o número de renovações e falhas e os segundos até a expiração.
+
+        Returns:
+            dict: Resumo do estado das credenciais.
+        """
+        with self.__trava:
+            return {
+                'renovacoes': self.__renovacoes,
+                'falhas': self.__falhas,
+                'expira_em_s': self.__segundos_restantes(),
+            }
+
+    def __renova(self, credentials):
+        """
+        Renova as credenciais e salva o novo token.
+        """
+        from google.auth.transport.requests import Request
+        credentials.refresh(Request())
+        self.__renovacoes += 1
+        self.__salva(credentials)
+
+    def __segundos_restantes(self):
+        """
+        Segundos até a expiração do token, ou None se desconhecido.
+        """
+        if not self.__credentials or not self.__credentials.expiry:
+            return None
+        # O google-auth guarda a expiração como datetime UTC sem fuso
+        agora = datetime.now(timezone.utc).replace(tzinfo=None)
+        return (self.__credentials.expiry - agora).total_seconds()
+
+    def __agenda(self, espera=None):
+        """
+        Agenda a próxima renovação para `margem` segundos antes da expiração.
+        """
+        if self.__temporizador:
+            self.__temporizador.cancel()
+            self.__temporizador = None
+        if espera is None:
+            restante = self.__segundos_restantes()
+            if restante is None or not self.__credentials.refresh_token:
+                return
+            espera = max(0.0, restante - self.__margem)
+        self.__temporizador = threading.Timer(espera, self.renova)
+        self.__temporizador.daemon = True
+        self.__temporizador.start()
+
+    def __carrega(self):
+        """
+        Lê o token salvo em JSON, convertendo um `token.pickle` antigo se existir.
+        """
+        from google.oauth2.credentials import Credentials
+
+        if os.path.exists(self.__arquivo_token):
+            return Credentials.from_authorized_user_file(self.__arquivo_token, self.__scopes)
+
+        antigo = os.path.join(os.path.dirname(self.__arquivo_token), 'token.pickle')
+        if os.path.exists(antigo):
+            with open(antigo, 'rb') as token:
+                credentials = pickle.load(token)
+            self.__salva(credentials)
+            os.remove(antigo)
+            return credentials
+        return None
+
+    def __salva(self, credentials):
+        """
+        Grava o token em JSON de forma atômica e legível apenas pelo dono.
+        """
+        temporario = f'{self.__arquivo_token}.tmp'
+        fd = os.open(temporario, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(credentials.to_json())
+        os.replace(temporario, self.__arquivo_token)
+        os.chmod(self.__arquivo_token, 0o600)
@@ -1,159 +1,427 @@
-import mysql.connector  # Conector para interagir com o banco de dados MySQL/MariaDB
+import abc
+import json
+from collections import Counter
 
+import config
+import instrumentacao
+from pool_conexoes import PoolConexoes, PoolEsgotado
 
-class DataBase:
+
+class ErroBanco(Exception):
+    """
+    Lançada quando não é possível abrir ou acessar o banco de dados.
+    """
+
+
+def _nome_operacao(operacao):
+    """
+    Nome da operação para a instrumentação: o método que a definiu (por
+    exemplo, 'busca_contatos' para a função interna 'operacao').
+    """
+    nome = getattr(operacao, '__qualname__', repr(operacao))
+    return nome.split('.<locals>')[0].rsplit('.', 1)[-1]
+
+
+class DataBase(abc.ABC):
     """
-    Gerencia a conexão e as operações com um banco de dados MySQL/MariaDB.
+    Interface de armazenamento de comandos, contatos e dados de login.
 
     A classe é responsável por:
-    - Conectar e criar o banco de dados e as tabelas necessárias.
+    - Criar as tabelas necessárias.
     - Realizar buscas e salvamento de comandos, contatos e dados de login.
     - Garantir que as operações sejam seguras e robustas.
+
+    As operações são escritas uma única vez aqui; cada backend (MySQL/MariaDB
+    em `data_base_mysql`, SQLite em `data_base_sqlite`) fornece a abertura
+    das conexões, a criação das tabelas e os trechos de SQL que mudam entre
+    os dialetos (os métodos abstratos). Use `abre_data_base()` para obter o
+    backend configurado.
+
+    As conexões vêm de um `PoolConexoes`, de modo que várias threads podem
+    usar o banco ao mesmo tempo. Se uma conexão cair (por exemplo, pelo
+    `wait_timeout` do servidor), a operação é repetida uma vez com uma
+    conexão nova.
     """
 
     # Nomes de tabelas e colunas para manter a consistência e facilitar a manutenção
-    __db_tabela_cmds = 'comandos'
-    __db_coluna_cmds = 'cmds'
-    __db_tabela_contatos = 'contatos'
-    __db_coluna_email = 'emails'
-    __db_tabela_login = 'login'
-    __db_coluna_usuario = 'usuario'
-    __db_coluna_senha = 'senha'
+    _db_tabela_cmds = 'comandos'
+    _db_coluna_cmds = 'cmds'
+    _db_tabela_contatos = 'contatos'
+    _db_coluna_email = 'emails'
+    _db_coluna_usos = 'usos'
+    _db_coluna_ultimo_uso = 'ultimo_uso'
+    _db_tabela_login = 'login'
+    _db_coluna_usuario = 'usuario'
+    _db_coluna_senha = 'senha'
+    # Mensagens guardadas localmente (importadas de mbox/.eml), na ordem dos
+    # campos de `salva_mensagens`
+    _db_tabela_mensagens = 'mensagens'
+    _db_colunas_mensagens = ('id_msg', 'assunto', 'remetente', 'destinatario', 'copia', 'data', 'data_ts',
+                             'corpo_texto', 'corpo_html', 'anexos')
+
+    # Comandos oferecidos pelo autocompletar
+    _cmds = ['send=', 'show=', 'search=', 'back=', 'quik=', 'help=', 'file=', 'limit=', 'ass=', 'msg=',
+             'next=', 'prev=', 'user=', 'stats=', 'timers=', 'export=', 'fmt=', 'out=', 'resume=',
+             'import=', 'local=', 'threads=', 'read=', 'unread=', 'archive=', 'label=', 'unlabel=', 'em=',
+             'count=', 'exact=', 'acc=', 'account=']
+
+    # Número máximo de linhas por INSERT em operações em lote
+    _tamanho_lote = 500
+
+    # Marcador de parâmetro do driver ('%s' ou '?')
+    _marcador = '%s'
+
+    # Classe base dos erros do driver e erros que indicam conexão perdida
+    _erro = Exception
+    _erros_conexao = ()
+
+    def __init__(self):
+        """
+        Inicializa os atributos comuns. Os backends devem chamar `_inicia`
+        após abrir a primeira conexão.
+        """
+        self.__pool = None
+        # Índice em memória de contatos mantido em sincronia com a tabela
+        self.__indice_contatos = None
+
+    def _inicia(self, cnx, verifica=None):
+        """
+        Cria o pool de conexões a partir da primeira conexão já validada,
+        cria as tabelas e carrega os comandos.
+
+        Args:
+            cnx (objeto): Conexão aberta pelo backend.
+            verifica (callable, opcional): Verificação de saúde das conexões.
+
+        Raises:
+            ErroBanco: Se as tabelas não puderem ser criadas ou atualizadas
+                       (por exemplo, sem permissão de CREATE/ALTER).
+        """
+        self.__pool = PoolConexoes(
+            self._nova_conexao,
+            tamanho=config.get('db_pool_tamanho'),
+            espera=config.get('db_pool_espera'),
+            verifica=verifica,
+            verifica_apos=config.get('db_pool_verifica_apos'),
+            conexao_inicial=cnx
+        )
+        try:
+            self._executa(self._cria_tabelas, commit=True)
+        except (self._erro, ErroBanco) as error:
+            self.fecha_cnx()
+            raise ErroBanco(f'Erro ao criar as tabelas: {error}') from error
+        self.__carrega_cmds()
+
+    # Métodos que cada backend deve implementar
+
+    @abc.abstractmethod
+    def _nova_conexao(self):
+        """
+        Abre uma nova conexão com o banco de dados.
+        """
+
+    @abc.abstractmethod
+    def _cria_tabelas(self, cursor):
+        """
+        Cria (ou atualiza) as tabelas de contatos, comandos e login.
+        """
+
+    @abc.abstractmethod
+    def _sql_insert_ignore(self):
+        """
+        Retorna o início de um INSERT que ignora chaves duplicadas.
+        """
 
-    def __init__(self, db_pass):
+    @abc.abstractmethod
+    def _sql_upsert_contatos(self, quantidade):
         """
-        Inicializa a classe, definindo credenciais e conectando ao banco de dados.
+        Retorna o INSERT de `quantidade` contatos (email, usos, ultimo_uso),
+        com `ultimo_uso` em segundos desde a época ou None para agora, que
+        soma os usos dos contatos já existentes e mantém a data de último
+        uso mais recente.
         """
-        self.__db_host = 'localhost'
-        self.__db_user = 'root'
-        self.__db_name = 'sistema'
-        self.__db_pass = db_pass
 
-        self.__cnx = None
+    @abc.abstractmethod
+    def _sql_epoch(self, coluna):
+        """
+        Retorna a expressão que converte `coluna` para segundos desde a época.
+        """
 
-        # # Tenta estabelecer a conexão com o banco de dados
-        self.__conecta_db()
+    @abc.abstractmethod
+    def _sql_frecencia(self):
+        """
+        Retorna a expressão de frecência de um contato. Recebe a meia-vida,
+        em segundos, como único parâmetro.
+        """
 
-        # Se a conexão for bem-sucedida, cria as tabelas
-        if self.__cnx:
-            self.__cria_tabela_contatos()
-            self.__cria_tabela_cmds()
-            self.__cria_tabela_login()
+    # Operações comuns
 
-    def __conecta_db(self):
+    def _executa(self, operacao, commit=False):
         """
-        Tenta conectar ao banco de dados. Se o banco não existir, ele é criado
-        e a conexão é restabelecida.
+        Executa uma operação com um cursor de uma conexão do pool.
+
+        Se a conexão estiver morta, ela é descartada e a operação é repetida
+        uma única vez com uma conexão nova. Cada execução é registrada em
+        `instrumentacao.registro` com o nome do método que a chamou.
+
+        Args:
+            operacao (callable): Função que recebe o cursor e retorna o resultado.
+            commit (bool, opcional): Se True, faz commit ao final. O padrão é False.
 
         Returns:
-            bool: Retorna True se a conexão for bem-sucedida, False caso contrário.
+            Any: O valor retornado por `operacao`.
+
+        Raises:
+            ErroBanco: Se nenhuma conexão ficar livre a tempo.
+            Exception: Erros do driver (subclasses de `_erro`).
         """
-        try:
-            # Primeira tentativa de conexão
-            self.__cnx = mysql.connector.connect(
-                host=self.__db_host,
-                user=self.__db_user,
-                passwd=self.__db_pass,
-                database=self.__db_name
-            )
-            return True
-
-        except mysql.connector.Error:
-            # Se o erro for o banco de dados não existir
-            try:
-                # Conecta ao servidor para criar o banco de dados
-                temp_cnx = mysql.connector.connect(
-                    host=self.__db_host,
-                    user=self.__db_user,
-                    passwd=self.__db_pass
-                )
-            except mysql.connector.errors.ProgrammingError as proerr:
-                # Trata erros na segunda tentativa de conexão ou criação
-                # Retorna ao início para solicitar outra senha
-                raise proerr
-            except mysql.connector.Error as error:
-                # Trata erros de forma genêrica
-                raise error
-
-            temp_cursor = temp_cnx.cursor()
-            temp_cursor.execute(f"CREATE DATABASE {self.__db_name}")
-            temp_cursor.close()
-            temp_cnx.close()
-
-            # Se a tentativa de conecção a um banco genêrico for bem sucedida,
-            # retorna à função para uma nova tentativa de conecção ao banco do sistema
-            return self.__conecta_db()
+        with instrumentacao.mede(f'db.{_nome_operacao(operacao)}') as medida:
+            for tentativa in range(2):
+                medida.tentativas = tentativa
+                try:
+                    with self.__pool.conexao() as cnx:
+                        cursor = None
+                        try:
+                            # Uma conexão morta pode falhar já ao abrir o cursor
+                            cursor = cnx.cursor()
+                            resultado = operacao(cursor)
+                            if commit:
+                                cnx.commit()
+                            return resultado
+                        except self._erros_conexao:
+                            self.__pool.descarta(cnx)
+                            if tentativa:
+                                raise
+                        except self._erro:
+                            if commit:
+                                cnx.rollback()
+                            raise
+                        finally:
+                            if cursor is not None:
+                                try:
+                                    cursor.close()
+                                except self._erro:
+                                    pass
+                except PoolEsgotado as error:
+                    raise ErroBanco(str(error)) from error
 
     def __carrega_cmds(self):
         """
-        Popula a tabela de comandos com uma lista de comandos padrão.
+        Popula a tabela de comandos com a lista de comandos padrão, ignorando
+        os que já existem.
         """
-        cmds = ['send=', 'show=', 'search=', 'back=', 'quik=', 'help=', 'file=', 'limit=', 'ass=', 'msg=', 'file=',
-                'next=', 'prev=', 'user=']
+        def operacao(cursor):
+            query = (f'{self._sql_insert_ignore()} {self._db_tabela_cmds} ({self._db_coluna_cmds}) '
+                     f'VALUES ({self._marcador});')
+            cursor.executemany(query, [(cmd,) for cmd in self._cmds])
+
         try:
-            with self.__cnx.cursor() as cursor:
-                # Usa INSERT IGNORE para evitar duplicatas
-                query = f'INSERT IGNORE INTO `{self.__db_tabela_cmds}` ({self.__db_coluna_cmds}) VALUES (%s);'
-                data = [(cmd,) for cmd in cmds]
-                cursor.executemany(query, data)
-                self.__cnx.commit()
-        except mysql.connector.Error:
+            self._executa(operacao, commit=True)
+        except (self._erro, ErroBanco):
             pass
 
     def busca_contatos(self, contato):
         """
-        Busca contatos no banco de dados com base em uma string de busca.
+        Busca contatos no banco de dados com base em uma string de busca,
+        ordenados por frecência (ver `IndiceFrecencia`).
         """
-        busca = []
-        try:
-            with self.__cnx.cursor() as cursor:
-                query = f'SELECT {self.__db_coluna_email} FROM {self.__db_tabela_contatos} WHERE {self.__db_coluna_email}  LIKE %s LIMIT 50;'
-                cursor.execute(query, (contato + '%',))
+        meia_vida = config.get('contatos_meia_vida_dias') * 86400
 
-                for row in cursor.fetchall():
-                    busca.append(row[0])
-        except mysql.connector.Error:
-            pass
-        return busca
+        def operacao(cursor):
+            query = (f'SELECT {self._db_coluna_email} FROM {self._db_tabela_contatos} '
+                     f'WHERE {self._db_coluna_email} LIKE {self._marcador} '
+                     f'ORDER BY {self._sql_frecencia()} DESC LIMIT 50;')
+            cursor.execute(query, (contato + '%', meia_vida))
+            return [row[0] for row in cursor.fetchall()]
+
+        try:
+            return self._executa(operacao)
+        except (self._erro, ErroBanco):
+            return []
 
     def busca_cmds(self, cmds):
         """
         Busca comandos no banco de dados.
         """
-        busca = []
-        with self.__cnx.cursor() as cursor:
-            query = f'SELECT {self.__db_coluna_cmds} FROM {self.__db_tabela_cmds} WHERE {self.__db_coluna_cmds} LIKE %s LIMIT 50;'
+        def operacao(cursor):
+            query = (f'SELECT {self._db_coluna_cmds} FROM {self._db_tabela_cmds} '
+                     f'WHERE {self._db_coluna_cmds} LIKE {self._marcador} LIMIT 50;')
             cursor.execute(query, (cmds + '%',))
+            return [row[0] for row in cursor.fetchall()]
 
-            for row in cursor.fetchall():
-                busca.append(row[0])
-        return busca
+        return self._executa(operacao)
 
-    def __inicia_tabela_cmds(self):
+    def lista_contatos(self):
         """
-        Verifica se a tabela de comandos está vazia e a popula se necessário.
+        Retorna todos os contatos salvos com seus dados de uso, usada para
+        carregar o índice de autocompletar em memória.
+
+        Returns:
+            list[tuple]: Tuplas (email, usos, ultimo_uso), com `ultimo_uso`
+                         em segundos desde a época ou None.
+        """
+        def operacao(cursor):
+            cursor.execute(f'SELECT {self._db_coluna_email}, {self._db_coluna_usos}, '
+                           f'{self._sql_epoch(self._db_coluna_ultimo_uso)} FROM {self._db_tabela_contatos};')
+            return [(row[0], row[1], float(row[2]) if row[2] is not None else None)
+                    for row in cursor.fetchall()]
+
+        try:
+            return self._executa(operacao)
+        except (self._erro, ErroBanco):
+            return []
+
+    def lista_cmds(self):
+        """
+        Retorna todos os comandos salvos.
+
+        Returns:
+            list[str]: Os comandos cadastrados.
         """
-        teste = self.busca_cmds('send=')
-        if not teste:
-            self.__carrega_cmds()
+        def operacao(cursor):
+            cursor.execute(f'SELECT {self._db_coluna_cmds} FROM {self._db_tabela_cmds};')
+            return [row[0] for row in cursor.fetchall()]
+
+        return self._executa(operacao)
 
-    def salva_contatos(self, novos):
+    def set_indice_contatos(self, indice):
         """
-        Salva novos contatos no banco de dados, evitando duplicatas.
+        :param indice: IndiceFrecencia atualizado a cada chamada de salva_contatos
+        """
+        self.__indice_contatos = indice
+
+    def salva_contatos(self, novos, instantes=None):
+        """
+        Salva contatos no banco de dados em lote (upsert).
+
+        Os endereços são agrupados em blocos de até `_tamanho_lote` e cada
+        bloco é gravado com um único INSERT com atualização de duplicatas.
+        Contatos já existentes têm o contador de uso incrementado e a data
+        do último uso atualizada, sem nunca recuar. O commit é feito uma
+        única vez no final.
+
+        Args:
+            novos (list[str]): Endereços de e-mail a serem salvos.
+            instantes (dict[str, float], opcional): Data do último uso de
+                                                    cada endereço, em
+                                                    segundos desde a época
+                                                    (por exemplo, a data do
+                                                    e-mail coletado). Os
+                                                    ausentes usam agora.
+
+        Returns:
+            int: Quantidade de endereços distintos gravados.
         """
         if not novos:
-            return None
+            return 0
+
+        # Agrupa endereços repetidos, somando o número de ocorrências
+        contagem = Counter(n.strip() for n in novos if n and n.strip())
+        if not contagem:
+            return 0
+
+        instantes = instantes or {}
+        itens = [(endereco, usos, instantes.get(endereco)) for endereco, usos in contagem.items()]
+
+        def operacao(cursor):
+            for inicio in range(0, len(itens), self._tamanho_lote):
+                lote = itens[inicio:inicio + self._tamanho_lote]
+                cursor.execute(self._sql_upsert_contatos(len(lote)), [v for item in lote for v in item])
+
         try:
-            with self.__cnx.cursor() as cursor:
-                for novo in novos:
-                    teste = self.busca_contatos(novo)
-                    if not teste:
-                        cursor.execute(
-                            f'INSERT INTO `{self.__db_tabela_contatos}` ({self.__db_coluna_email}) VALUES (%s);',
-                            (novo,))
-                        self.__cnx.commit()
-        except mysql.connector.Error:
-            pass
+            self._executa(operacao, commit=True)
+        except (self._erro, ErroBanco):
+            return 0
+
+        # Mantém o índice de autocompletar em sincronia com o banco
+        if self.__indice_contatos is not None:
+            self.__indice_contatos.registra_uso(contagem, instantes)
+        return len(itens)
+
+    def salva_mensagens(self, mensagens):
+        """
+        Grava mensagens em lote, ignorando as que já estão gravadas (mesmo ID).
+
+        Args:
+            mensagens (list[dict]): Dados dos e-mails, como os retornados por
+                                    `mime_local.analisa`. Dos anexos são
+                                    guardados só o nome, o tipo e o tamanho.
+
+        Returns:
+            int: Quantidade de mensagens novas gravadas.
+
+        Raises:
+            ErroBanco: Se a gravação falhar. Ao contrário dos contatos, uma
+                       importação não pode perder mensagens em silêncio.
+        """
+        if not mensagens:
+            return 0
+
+        linhas = []
+        for dados in mensagens:
+            anexos = [{'filename': a.get('filename'), 'mime_type': a.get('mime_type'), 'tamanho': a.get('tamanho')}
+                      for a in dados.get('anexos', [])]
+            linhas.append((dados['id'][:255], dados.get('assunto', ''), dados.get('remetente', ''),
+                           dados.get('destinatario', ''), dados.get('copia', ''), dados.get('data', ''),
+                           dados.get('data_ts'), dados.get('corpo_texto', ''), dados.get('corpo_html', ''),
+                           json.dumps(anexos, ensure_ascii=False)))
+
+        def operacao(cursor):
+            colunas = ', '.join(self._db_colunas_mensagens)
+            marcadores = ', '.join([self._marcador] * len(self._db_colunas_mensagens))
+            query = f'{self._sql_insert_ignore()} {self._db_tabela_mensagens} ({colunas}) VALUES ({marcadores});'
+            cursor.executemany(query, linhas)
+            return max(cursor.rowcount, 0)
+
+        try:
+            return self._executa(operacao, commit=True)
+        except self._erro as error:
+            raise ErroBanco(f'Erro ao gravar mensagens: {error}') from error
+
+    def busca_mensagens(self, termo, limite=50):
+        """
+        Busca mensagens gravadas cujo assunto, remetente, destinatário ou
+        corpo contenham `termo`, das mais recentes para as mais antigas.
+
+        Args:
+            termo (str): O texto procurado.
+            limite (int, opcional): Número máximo de mensagens. O padrão é 50.
+
+        Returns:
+            list[dict]: Os dados dos e-mails encontrados, com os campos de `Email`.
+        """
+        campos = ('assunto', 'remetente', 'destinatario', 'corpo_texto', 'corpo_html')
+
+        def operacao(cursor):
+            condicao = ' OR '.join(f'{campo} LIKE {self._marcador}' for campo in campos)
+            query = (f'SELECT {", ".join(self._db_colunas_mensagens)} FROM {self._db_tabela_mensagens} '
+                     f'WHERE {condicao} ORDER BY data_ts DESC LIMIT {self._marcador};')
+            cursor.execute(query, [f'%{termo}%'] * len(campos) + [limite])
+            mensagens = []
+            for row in cursor.fetchall():
+                dados = dict(zip(self._db_colunas_mensagens, row))
+                dados['id'] = dados.pop('id_msg')
+                dados['anexos'] = json.loads(dados['anexos'] or '[]')
+                mensagens.append(dados)
+            return mensagens
+
+        try:
+            return self._executa(operacao)
+        except (self._erro, ErroBanco):
+            return []
+
+    def conta_mensagens(self):
+        """
+        Retorna o número de mensagens gravadas.
+        """
+        def operacao(cursor):
+            cursor.execute(f'SELECT COUNT(*) FROM {self._db_tabela_mensagens};')
+            return cursor.fetchone()[0]
+
+        try:
+            return self._executa(operacao)
+        except (self._erro, ErroBanco):
+            return 0
 
     def salva_login(self, usuario, senha):
         """
@@ -161,12 +429,15 @@ class DataBase:
         """
         if not usuario or not senha:
             return None
+
+        def operacao(cursor):
+            query = (f'INSERT INTO {self._db_tabela_login} ({self._db_coluna_usuario}, {self._db_coluna_senha}) '
+                     f'VALUES ({self._marcador}, {self._marcador});')
+            cursor.execute(query, (usuario, senha))
+
         try:
-            with self.__cnx.cursor() as cursor:
-                query = f'INSERT INTO `{self.__db_tabela_login}` ({self.__db_coluna_usuario}, {self.__db_coluna_senha}) VALUES (%s, %s);'
-                cursor.execute(query, (usuario, senha))
-                self.__cnx.commit()
-        except mysql.connector.Error:
+            self._executa(operacao, commit=True)
+        except (self._erro, ErroBanco):
             pass
 
     def verifica_tabela_login(self):
@@ -180,13 +451,15 @@ class DataBase:
             bool: Retorna True se a tabela tiver registros,
                   retorna False se a tabela estiver vazia.
         """
+        def operacao(cursor):
+            cursor.execute(f'SELECT COUNT(*) FROM {self._db_tabela_login};')
+            resultado = cursor.fetchone()
+            contagem = resultado[0]
+            return contagem > 0
+
         try:
-            with self.__cnx.cursor() as cursor:
-                cursor.execute(f'SELECT COUNT(*) FROM {self.__db_tabela_login};')
-                resultado = cursor.fetchone()
-                contagem = resultado[0]
-                return contagem > 0
-        except mysql.connector.Error:
+            return self._executa(operacao)
+        except (self._erro, ErroBanco):
             pass
 
     def busca_login(self, usuario):
@@ -195,58 +468,68 @@ class DataBase:
         """
         if not usuario:
             return None
-        with self.__cnx.cursor() as cursor:
-            query = f'SELECT {self.__db_coluna_senha} FROM {self.__db_tabela_login} WHERE {self.__db_coluna_usuario} = %s'
+
+        def operacao(cursor):
+            query = (f'SELECT {self._db_coluna_senha} FROM {self._db_tabela_login} '
+                     f'WHERE {self._db_coluna_usuario} = {self._marcador}')
             cursor.execute(query, (usuario,))
             senha = cursor.fetchone()
             if senha:
                 return senha[0]
-        return None
+            return None
 
-    def __cria_tabela_login(self):
-        """
-        Cria a tabela de 'login' se ela ainda não existir.
-        """
-        try:
-            with self.__cnx.cursor() as cursor:
-                cursor.execute(f'''CREATE TABLE IF NOT EXISTS {self.__db_tabela_login} (
-                        id INT UNIQUE DEFAULT 1,
-                        {self.__db_coluna_usuario} VARCHAR(100) NOT NULL UNIQUE,
-                        {self.__db_coluna_senha} VARCHAR(100) NOT NULL
-                    );''')
-        except mysql.connector.Error:
-            pass
+        return self._executa(operacao)
 
-    def __cria_tabela_cmds(self):
-        """
-        Cria a tabela de 'comandos' se ela ainda não existir e a popula.
+    def estatisticas_pool(self):
         """
-        try:
-            with self.__cnx.cursor() as cursor:
-                cursor.execute(f'''CREATE TABLE IF NOT EXISTS `{self.__db_tabela_cmds}` (
-                    id INT NOT NULL PRIMARY KEY AUTO_INCREMENT,
-                    {self.__db_coluna_cmds} VARCHAR(15) NOT NULL UNIQUE
-                    );''')
-                self.__inicia_tabela_cmds()
-        except mysql.connector.Error:
-            pass
+        Retorna as estatísticas do pool de conexões (tempo de espera,
+        reconexões, descartes etc.).
 
-    def __cria_tabela_contatos(self):
-        """
-        Cria a tabela de 'contatos' se ela ainda não existir.
+        Returns:
+            dict: O resumo gerado por `PoolConexoes.estatisticas()`.
         """
-        try:
-            with self.__cnx.cursor() as cursor:
-                cursor.execute(f'''CREATE TABLE IF NOT EXISTS `{self.__db_tabela_contatos}` (
-                    id INT NOT NULL PRIMARY KEY AUTO_INCREMENT,
-                    {self.__db_coluna_email} VARCHAR(50) NOT NULL UNIQUE
-                    );''')
-        except mysql.connector.Error:
-            pass
+        return self.__pool.estatisticas()
 
     def fecha_cnx(self):
         """
-        Fecha a conexão com o banco de dados se ela estiver aberta.
+        Fecha as conexões com o banco de dados.
         """
-        if self.__cnx and self.__cnx.is_connected():
-            self.__cnx.close()
+        if self.__pool:
+            self.__pool.fecha()
+
+
+def requer_senha():
+    """
+    Indica se o backend configurado precisa de senha para conectar.
+
+    Returns:
+        bool: True para MySQL/MariaDB, False para SQLite.
+    """
+    return config.get('db_backend') == 'mysql'
+
+
+def abre_data_base(db_pass=None):
+    """
+    Abre o backend de armazenamento escolhido na chave 'db_backend' da
+    configuração ('mysql' ou 'sqlite').
+
+    O módulo do backend só é importado aqui, de modo que o driver do MySQL
+    não é necessário para quem usa o SQLite.
+
+    Args:
+        db_pass (str, opcional): Senha do banco (apenas MySQL).
+
+    Returns:
+        DataBase: A instância do backend configurado.
+
+    Raises:
+        ErroBanco: Se não for possível conectar ou o backend for desconhecido.
+    """
+    backend = config.get('db_backend')
+    if backend == 'sqlite':
+        import data_base_sqlite
+        return data_base_sqlite.DataBaseSQLite(config.get('db_sqlite_arquivo'))
+    if backend == 'mysql':
+        import data_base_mysql
+        return data_base_mysql.DataBaseMySQL(db_pass)
+    raise ErroBanco(f'Backend de banco de dados desconhecido: {backend}')
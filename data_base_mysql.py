@@ -0,0 +1,166 @@
+import mysql.connector  # Conector para interagir com o banco de dados MySQL/MariaDB
+
+import config
+from data_base import DataBase, ErroBanco
+
+
+class DataBaseMySQL(DataBase):
+    """
+    Backend de armazenamento em um servidor MySQL/MariaDB.
+
+    Conecta com o usuário configurado (root, por padrão) e cria o banco de
+    dados do sistema se ele ainda não existir.
+    """
+
+    _erro = mysql.connector.Error
+    # Erros que indicam conexão perdida e justificam uma nova tentativa
+    _erros_conexao = (mysql.connector.errors.OperationalError, mysql.connector.errors.InterfaceError)
+
+    def __init__(self, db_pass, host=None, usuario=None, nome=None):
+        """
+        Inicializa a classe, definindo credenciais e conectando ao banco de dados.
+
+        Args:
+            db_pass (str): Senha do usuário do banco.
+            host (str, opcional): Servidor. O padrão vem de 'db_mysql_host'.
+            usuario (str, opcional): Usuário. O padrão vem de 'db_mysql_usuario'.
+            nome (str, opcional): Nome do banco. O padrão vem de 'db_mysql_nome'.
+
+        Raises:
+            ErroBanco: Se não for possível conectar ao servidor.
+        """
+        super().__init__()
+        self.__db_host = host or config.get('db_mysql_host')
+        self.__db_user = usuario or config.get('db_mysql_usuario')
+        self.__db_name = nome or config.get('db_mysql_nome')
+        self.__db_pass = db_pass
+
+        # # Tenta estabelecer a conexão com o banco de dados
+        try:
+            cnx = self.__conecta_db()
+        except mysql.connector.Error as error:
+            raise ErroBanco(str(error)) from error
+
+        # Se a conexão for bem-sucedida, cria o pool e as tabelas
+        self._inicia(cnx, verifica=lambda c: c.is_connected())
+
+    def _nova_conexao(self):
+        """
+        Abre uma nova conexão com o banco de dados do sistema.
+        """
+        return mysql.connector.connect(
+            host=self.__db_host,
+            user=self.__db_user,
+            passwd=self.__db_pass,
+            database=self.__db_name
+        )
+
+    def __conecta_db(self):
+        """
+        Tenta conectar ao banco de dados. Se o banco não existir, ele é criado
+        e a conexão é restabelecida.
+
+        Returns:
+            MySQLConnection: A conexão aberta com o banco do sistema.
+        """
+        try:
+            # Primeira tentativa de conexão
+            return self._nova_conexao()
+
+        except mysql.connector.Error:
+            # Se o erro for o banco de dados não existir
+            try:
+                # Conecta ao servidor para criar o banco de dados
+                temp_cnx = mysql.connector.connect(
+                    host=self.__db_host,
+                    user=self.__db_user,
+                    passwd=self.__db_pass
+                )
+            except mysql.connector.errors.ProgrammingError as proerr:
+                # Trata erros na segunda tentativa de conexão ou criação
+                # Retorna ao início para solicitar outra senha
+                raise proerr
+            except mysql.connector.Error as error:
+                # Trata erros de forma genêrica
+                raise error
+
+            temp_cursor = temp_cnx.cursor()
+            temp_cursor.execute(f"CREATE DATABASE {self.__db_name}")
+            temp_cursor.close()
+            temp_cnx.close()
+
+            # Se a tentativa de conecção a um banco genêrico for bem sucedida,
+            # retorna à função para uma nova tentativa de conecção ao banco do sistema
+            return self.__conecta_db()
+
+    def _cria_tabelas(self, cursor):
+        """
+        Cria as tabelas de 'contatos', 'comandos', 'login' e 'mensagens' se
+        elas ainda não existirem e atualiza a de contatos criada por versões
+        anteriores.
+        """
+        cursor.execute(f'''CREATE TABLE IF NOT EXISTS `{self._db_tabela_contatos}` (
+            id INT NOT NULL PRIMARY KEY AUTO_INCREMENT,
+            {self._db_coluna_email} VARCHAR(254) NOT NULL UNIQUE,
+            {self._db_coluna_usos} INT NOT NULL DEFAULT 0,
+            {self._db_coluna_ultimo_uso} DATETIME NULL
+            );''')
+        self.__atualiza_tabela_contatos(cursor)
+        cursor.execute(f'''CREATE TABLE IF NOT EXISTS `{self._db_tabela_cmds}` (
+            id INT NOT NULL PRIMARY KEY AUTO_INCREMENT,
+            {self._db_coluna_cmds} VARCHAR(15) NOT NULL UNIQUE
+            );''')
+        cursor.execute(f'''CREATE TABLE IF NOT EXISTS {self._db_tabela_login} (
+                id INT UNIQUE DEFAULT 1,
+                {self._db_coluna_usuario} VARCHAR(100) NOT NULL UNIQUE,
+                {self._db_coluna_senha} VARCHAR(100) NOT NULL
+            );''')
+        cursor.execute(f'''CREATE TABLE IF NOT EXISTS `{self._db_tabela_mensagens}` (
+            id_msg VARCHAR(255) NOT NULL PRIMARY KEY,
+            assunto TEXT, remetente TEXT, destinatario TEXT, copia TEXT, data TEXT,
+            data_ts BIGINT NULL,
+            corpo_texto MEDIUMTEXT, corpo_html MEDIUMTEXT, anexos TEXT,
+            INDEX (data_ts)
+            ) CHARACTER SET utf8mb4;''')
+
+    def __atualiza_tabela_contatos(self, cursor):
+        """
+        Adiciona as colunas de uso à tabela 'contatos' criada por versões
+        anteriores, que só possuía a coluna de e-mail.
+        """
+        colunas = {
+            self._db_coluna_usos: 'INT NOT NULL DEFAULT 0',
+            self._db_coluna_ultimo_uso: 'DATETIME NULL',
+        }
+        cursor.execute(f'SHOW COLUMNS FROM `{self._db_tabela_contatos}`;')
+        existentes = {}
+        for row in cursor.fetchall():
+            tipo = row[1].decode() if isinstance(row[1], bytes) else str(row[1])
+            existentes[row[0]] = tipo.lower()
+        for coluna, definicao in colunas.items():
+            if coluna not in existentes:
+                cursor.execute(f'ALTER TABLE `{self._db_tabela_contatos}` ADD COLUMN {coluna} {definicao};')
+        # Versões antigas limitavam o e-mail a 50 caracteres
+        if existentes.get(self._db_coluna_email) == 'varchar(50)':
+            cursor.execute(f'ALTER TABLE `{self._db_tabela_contatos}` '
+                           f'MODIFY {self._db_coluna_email} VARCHAR(254) NOT NULL;')
+
+    def _sql_insert_ignore(self):
+        return 'INSERT IGNORE INTO'
+
+    def _sql_upsert_contatos(self, quantidade):
+        valores = ', '.join(['(%s, %s, COALESCE(FROM_UNIXTIME(%s), NOW()))'] * quantidade)
+        return (f'INSERT INTO `{self._db_tabela_contatos}` '
+                f'({self._db_coluna_email}, {self._db_coluna_usos}, {self._db_coluna_ultimo_uso}) '
+                f'VALUES {valores} '
+                f'ON DUPLICATE KEY UPDATE '
+                f'{self._db_coluna_usos} = {self._db_coluna_usos} + VALUES({self._db_coluna_usos}), '
+                f'{self._db_coluna_ultimo_uso} = GREATEST(COALESCE({self._db_coluna_ultimo_uso}, '
+                f'VALUES({self._db_coluna_ultimo_uso})), VALUES({self._db_coluna_ultimo_uso}));')
+
+    def _sql_epoch(self, coluna):
+        return f'UNIX_TIMESTAMP({coluna})'
+
+    def _sql_frecencia(self):
+        return (f'LOG2(GREATEST({self._db_coluna_usos}, 1)) + '
+                f'COALESCE(UNIX_TIMESTAMP({self._db_coluna_ultimo_uso}), 0) / %s')
@@ -0,0 +1,109 @@
+import math
+import sqlite3
+
+from data_base import DataBase, ErroBanco
+
+
+def _frecencia(usos, ultimo_uso, meia_vida):
+    """
+    Frecência de um contato, igual à usada por `IndiceFrecencia`.
+    Registrada como função SQL, pois o SQLite não tem LOG2/GREATEST.
+    """
+    return math.log2(max(usos or 0, 1)) + (ultimo_uso or 0.0) / meia_vida
+
+
+class DataBaseSQLite(DataBase):
+    """
+    Backend de armazenamento embutido em um arquivo SQLite.
+
+    Não precisa de servidor nem de senha. O banco usa o modo WAL, que
+    permite leituras simultâneas a uma escrita, e cada thread usa sua
+    própria conexão do pool.
+    """
+
+    _marcador = '?'
+    # O SQLite antigo limita uma instrução a 999 parâmetros (2 por contato)
+    _tamanho_lote = 450
+    _erro = sqlite3.Error
+    _erros_conexao = ()
+
+    # Instante atual em segundos desde a época, com fração
+    __agora = "((julianday('now') - 2440587.5) * 86400.0)"
+
+    def __init__(self, arquivo):
+        """
+        Abre (ou cria) o banco de dados.
+
+        Args:
+            arquivo (str): Caminho do arquivo do banco.
+
+        Raises:
+            ErroBanco: Se não for possível abrir o arquivo.
+        """
+        super().__init__()
+        self.__arquivo = arquivo
+        try:
+            cnx = self._nova_conexao()
+        except sqlite3.Error as error:
+            raise ErroBanco(f'{arquivo}: {error}') from error
+        self._inicia(cnx)
+
+    def _nova_conexao(self):
+        """
+        Abre uma conexão configurada para o modo WAL.
+        """
+        cnx = sqlite3.connect(self.__arquivo, timeout=30, check_same_thread=False)
+        cnx.execute('PRAGMA journal_mode=WAL;')
+        # Em modo WAL, NORMAL é seguro contra corrupção e evita um fsync por commit
+        cnx.execute('PRAGMA synchronous=NORMAL;')
+        cnx.create_function('frecencia', 3, _frecencia, deterministic=True)
+        return cnx
+
+    def _cria_tabelas(self, cursor):
+        """
+        Cria as tabelas de 'contatos', 'comandos', 'login' e 'mensagens' se
+        elas ainda não existirem.
+        """
+        cursor.execute(f'''CREATE TABLE IF NOT EXISTS {self._db_tabela_contatos} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            {self._db_coluna_email} TEXT NOT NULL UNIQUE COLLATE NOCASE,
+            {self._db_coluna_usos} INTEGER NOT NULL DEFAULT 0,
+            {self._db_coluna_ultimo_uso} REAL NULL
+            );''')
+        cursor.execute(f'''CREATE TABLE IF NOT EXISTS {self._db_tabela_cmds} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            {self._db_coluna_cmds} TEXT NOT NULL UNIQUE
+            );''')
+        cursor.execute(f'''CREATE TABLE IF NOT EXISTS {self._db_tabela_login} (
+            id INTEGER UNIQUE DEFAULT 1,
+            {self._db_coluna_usuario} TEXT NOT NULL UNIQUE,
+            {self._db_coluna_senha} TEXT NOT NULL
+            );''')
+        cursor.execute(f'''CREATE TABLE IF NOT EXISTS {self._db_tabela_mensagens} (
+            id_msg TEXT NOT NULL PRIMARY KEY,
+            assunto TEXT, remetente TEXT, destinatario TEXT, copia TEXT, data TEXT,
+            data_ts INTEGER NULL,
+            corpo_texto TEXT, corpo_html TEXT, anexos TEXT
+            );''')
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {self._db_tabela_mensagens}_data_ts '
+                       f'ON {self._db_tabela_mensagens} (data_ts);')
+
+    def _sql_insert_ignore(self):
+        return 'INSERT OR IGNORE INTO'
+
+    def _sql_upsert_contatos(self, quantidade):
+        valores = ', '.join([f'(?, ?, COALESCE(?, {self.__agora}))'] * quantidade)
+        return (f'INSERT INTO {self._db_tabela_contatos} '
+                f'({self._db_coluna_email}, {self._db_coluna_usos}, {self._db_coluna_ultimo_uso}) '
+                f'VALUES {valores} '
+                f'ON CONFLICT({self._db_coluna_email}) DO UPDATE SET '
+                f'{self._db_coluna_usos} = {self._db_coluna_usos} + excluded.{self._db_coluna_usos}, '
+                f'{self._db_coluna_ultimo_uso} = MAX(COALESCE({self._db_coluna_ultimo_uso}, '
+                f'excluded.{self._db_coluna_ultimo_uso}), excluded.{self._db_coluna_ultimo_uso});')
+
+    def _sql_epoch(self, coluna):
+        # A coluna já é guardada em segundos desde a época
+        return coluna
+
+    def _sql_frecencia(self):
+        return f'frecencia({self._db_coluna_usos}, {self._db_coluna_ultimo_uso}, ?)'
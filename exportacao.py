@@ -0,0 +1,213 @@
+import base64
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import instrumentacao
+
+# Formatos de saída aceitos por export=
+FORMATOS = ('mbox', 'jsonl', 'eml')
+
+# No mbox (variante mboxrd), linhas do corpo que começam com 'From ', com ou
+# sem '>' na frente, recebem mais um '>' para não serem lidas como separador
+_LINHA_FROM = re.compile(rb'^(>*From )', re.MULTILINE)
+
+
+class ErroExportacao(Exception):
+    """Parâmetros inválidos ou exportação impossível de retomar."""
+
+
+class Exportador:
+    """
+    Exporta as mensagens de uma busca para um arquivo mbox, um arquivo JSON
+    Lines ou um diretório de arquivos .eml.
+
+    O mbox e os .eml recebem a mensagem original (messages.get com
+    format='raw'); o JSONL recebe os campos do Email (format='full'). As
+    mensagens de cada página da listagem são obtidas em paralelo, mas
+    escritas em ordem, assim que chegam: a memória usada não depende do
+    tamanho da caixa.
+
+    Um arquivo de estado ao lado do destino guarda a página da listagem, a
+    posição nela e o tamanho já escrito. Se a exportação for interrompida,
+    `exporta(..., retoma=True)` descarta o que foi escrito depois do último
+    estado e continua de onde parou. O estado é apagado ao concluir.
+    """
+
+    # Mensagens escritas entre gravações do estado
+    __intervalo_estado = 50
+
+    def __init__(self, client, destino, formato='mbox', tarefas=4, progresso=None):
+        """
+        Args:
+            client (EmailClient): Cliente autenticado.
+            destino (str): Arquivo (mbox, jsonl) ou diretório (eml) de saída.
+            formato (str, opcional): 'mbox' (padrão), 'jsonl' ou 'eml'.
+            tarefas (int, opcional): Mensagens obtidas ao mesmo tempo. O padrão é 4.
+            progresso (callable, opcional): Chamada com o número de mensagens
+                                            exportadas a cada gravação do estado.
+
+        Raises:
+            ErroExportacao: Se o formato ou o destino forem inválidos.
+        """
+        if formato not in FORMATOS:
+            raise ErroExportacao(f'formato {formato} inválido (use {", ".join(FORMATOS)})')
+        if not destino:
+            raise ErroExportacao('destino da exportação não informado (out=)')
+        self.__client = client
+        self.__destino = destino
+        self.__formato = formato
+        self.__tarefas = max(1, tarefas)
+        self.__progresso = progresso
+        self.__visao = 'completa' if formato == 'jsonl' else 'bruta'
+        if formato == 'eml':
+            self.__arquivo_estado = os.path.join(destino, '.estado.json')
+        else:
+            self.__arquivo_estado = destino + '.estado.json'
+        self.__saida = None
+        self.__estado = None
+
+    def exporta(self, query, limite=None, retoma=False):
+        """
+        Exporta as mensagens de `query`.
+
+        Args:
+            query (str): A busca do Gmail.
+            limite (int, opcional): Número máximo de mensagens. Sem limite se omitido.
+            retoma (bool, opcional): Continua uma exportação interrompida
+                                     da mesma busca para o mesmo destino.
+
+        Returns:
+            dict: Resumo com mensagens exportadas, falhas, bytes escritos e duração.
+
+        Raises:
+            ErroExportacao: Se `retoma` for True e não houver o que retomar.
+        """
+        if not query:
+            raise ErroExportacao('export= exige uma query')
+        self.__estado = self.__carrega_estado(query) if retoma else None
+        if retoma and self.__estado is None:
+            raise ErroExportacao(f'nenhuma exportação de "{query}" para retomar em {self.__destino}')
+        retomado = self.__estado is not None
+        if not retomado:
+            self.__estado = {'query': query, 'formato': self.__formato, 'page_token': None, 'posicao': 0,
+                             'exportados': 0, 'falhas': 0, 'tamanho': 0}
+        inicial = self.__estado['tamanho']
+
+        inicio = time.perf_counter()
+        self.__abre(retomado)
+        try:
+            self.__percorre(query, limite)
+        finally:
+            self.__grava_estado()
+            if self.__saida is not None:
+                self.__saida.close()
+        # Concluída: não há mais o que retomar
+        os.remove(self.__arquivo_estado)
+
+        return {
+            'destino': self.__destino,
+            'formato': self.__formato,
+            'retomada': retomado,
+            'exportados': self.__estado['exportados'],
+            'falhas': self.__estado['falhas'],
+            'bytes': self.__estado['tamanho'] - inicial,
+            'segundos': round(time.perf_counter() - inicio, 2),
+        }
+
+    def __percorre(self, query, limite):
+        estado = self.__estado
+        escritos = 0
+        with ThreadPoolExecutor(max_workers=self.__tarefas, thread_name_prefix='exporta') as executor:
+            for token, mensagens in self.__client.paginas(query, estado['page_token']):
+                if token != estado['page_token']:
+                    estado['page_token'], estado['posicao'] = token, 0
+                pendentes = mensagens[estado['posicao']:]
+                if limite is not None:
+                    pendentes = pendentes[:max(0, limite - estado['exportados'] - estado['falhas'])]
+                # As mensagens da página chegam em paralelo e são escritas em ordem
+                obtidas = executor.map(lambda m: self.__client.obtem_mensagem(m['id'], self.__visao), pendentes)
+                for mensagem in obtidas:
+                    if mensagem:
+                        self.__escreve(mensagem)
+                        estado['exportados'] += 1
+                    else:
+                        estado['falhas'] += 1
+                    estado['posicao'] += 1
+                    escritos += 1
+                    if escritos % self.__intervalo_estado == 0:
+                        self.__grava_estado()
+                        if self.__progresso:
+                            self.__progresso(estado['exportados'])
+                if limite is not None and estado['exportados'] + estado['falhas'] >= limite:
+                    return
+
+    def __abre(self, retomado):
+        if self.__formato == 'eml':
+            os.makedirs(self.__destino, exist_ok=True)
+            return
+        if retomado and os.path.exists(self.__destino):
+            self.__saida = open(self.__destino, 'r+b')
+            # Descarta o que foi escrito depois do último estado gravado
+            self.__saida.truncate(self.__estado['tamanho'])
+            self.__saida.seek(self.__estado['tamanho'])
+        else:
+            self.__saida = open(self.__destino, 'wb')
+            self.__estado['tamanho'] = 0
+
+    def __escreve(self, mensagem):
+        with instrumentacao.mede(f'exporta.{self.__formato}') as medida:
+            if self.__formato == 'jsonl':
+                dados = self.__client.cria_email(mensagem).para_dict()
+                bloco = json.dumps(dados, ensure_ascii=False).encode('utf-8') + b'\n'
+            else:
+                bruto = base64.urlsafe_b64decode(mensagem.get('raw', ''))
+                if self.__formato == 'eml':
+                    medida.bytes = self.__escreve_eml(mensagem['id'], bruto)
+                    self.__estado['tamanho'] += medida.bytes
+                    return
+                bloco = self.__bloco_mbox(mensagem, bruto)
+            self.__saida.write(bloco)
+            medida.bytes = len(bloco)
+            self.__estado['tamanho'] += len(bloco)
+
+    @staticmethod
+    def __bloco_mbox(mensagem, bruto):
+        """
+        Monta a entrada do mbox: a linha separadora 'From ' com a data de
+        recebimento, a mensagem com as linhas 'From ' escapadas e uma linha vazia.
+        """
+        recebida = time.gmtime(int(mensagem.get('internalDate', 0)) / 1000)
+        corpo = _LINHA_FROM.sub(rb'>\1', bruto.replace(b'\r\n', b'\n'))
+        if not corpo.endswith(b'\n'):
+            corpo += b'\n'
+        return b'From MAILER-DAEMON ' + time.asctime(recebida).encode('ascii') + b'\n' + corpo + b'\n'
+
+    def __escreve_eml(self, id_msg, bruto):
+        caminho = os.path.join(self.__destino, f'{id_msg}.eml')
+        # Escrito em um temporário e renomeado: um .eml nunca fica pela metade
+        with open(caminho + '.tmp', 'wb') as f:
+            f.write(bruto)
+        os.replace(caminho + '.tmp', caminho)
+        return len(bruto)
+
+    def __carrega_estado(self, query):
+        try:
+            with open(self.__arquivo_estado, 'r', encoding='utf-8') as f:
+                estado = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if estado.get('query') != query or estado.get('formato') != self.__formato:
+            return None
+        return estado
+
+    def __grava_estado(self):
+        if self.__saida is not None:
+            self.__saida.flush()
+            self.__estado['tamanho'] = self.__saida.tell()
+        temporario = self.__arquivo_estado + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(self.__estado, f)
+        os.replace(temporario, self.__arquivo_estado)
@@ -1,24 +1,132 @@
 import base64
 import email
 import email.encoders
+import html
 import itertools
+import json
 import mimetypes
 import os
-import pickle
+import re
+import threading
+import time
 import webbrowser
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from email.mime.base import MIMEBase
 from email.mime.image import MIMEImage
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from typing import Any
 
-from google.auth.transport.requests import Request
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+import config
+import instrumentacao
+from analise_paralela import AnalisadorParalelo
+import mime_local
+import perfil
+from credenciais import AutenticacaoNecessaria, GerenciadorCredenciais  # noqa: F401
+from limitador import LimitadorCota, e_limite_taxa
+from repeticao import PoliticaRepeticao
+from transporte import PoolHttp
+
+# As bibliotecas do Google são importadas apenas quando usadas (em
+# EmailClient.__authenticate), pois sua importação é a parte mais lenta da
+# inicialização do programa.
 
 # Define o ID do usuário como 'me', que representa o usuário autenticado.
 id_usuario = 'me'
 
+# Permissões (scopes) pedidas à API
+ESCOPOS = ['https://www.googleapis.com/auth/gmail.modify']
+
+# Cabeçalhos lidos das mensagens
+CABECALHOS = ['Subject', 'From', 'To', 'Cc', 'Date']
+
+# Máximo de IDs por chamada messages.batchModify
+LIMITE_MODIFICACAO = 1000
+
+# Motores de obtenção das mensagens completas: 'json' (format='full', a árvore
+# de partes montada pela API) ou 'bruto' (format='raw', analisado localmente
+# por `mime_local`)
+MOTORES = ('json', 'bruto')
+
+# Charset declarado no Content-Type de uma parte
+_CHARSET = re.compile(r'charset\s*=\s*"?([^";\s]+)', re.IGNORECASE)
+
+# Query formada por um único rótulo ('label:X', 'in:X' ou 'is:unread'), que
+# pode ser contada pelos contadores do próprio rótulo (labels.get)
+_QUERY_ROTULO = re.compile(r'^(?:label|in):(\S+)$|^is:(unread|starred|important)$', re.IGNORECASE)
+
+# Parâmetros de cada caso de uso das chamadas à API. O parâmetro `fields`
+# (resposta parcial) pede apenas os campos que o código realmente lê.
+PROJECOES = {
+    # messages.list: apenas os IDs e o token da próxima página
+    'listagem': {'fields': 'messages/id,nextPageToken'},
+    # messages.get para exibir só os cabeçalhos
+    'cabecalhos': {'format': 'metadata', 'metadataHeaders': CABECALHOS,
+                   'fields': 'id,labelIds,payload/headers(name,value)'},
+    # messages.get para abrir o e-mail: cabeçalhos, corpo e anexos
+    'completa': {'format': 'full',
+                 'fields': 'id,labelIds,payload(mimeType,filename,headers(name,value),body(data,size),'
+                           'parts(mimeType,filename,headers(name,value),body(data,size),parts))'},
+    # messages.get da mensagem original (RFC 822), para exportação e para o
+    # motor 'bruto', que a analisa localmente
+    'bruta': {'format': 'raw', 'fields': 'id,labelIds,internalDate,raw'},
+    # labels.list: o nome de cada rótulo, para traduzi-lo no ID usado pela API
+    'rotulos': {'fields': 'labels(id,name)'},
+    # labels.get: os contadores mantidos pelo Gmail para o rótulo
+    'contadores_rotulo': {'fields': 'id,name,messagesTotal,messagesUnread,threadsTotal,threadsUnread'},
+    # messages.list só para a estimativa do total de resultados
+    'estimativa': {'maxResults': 1, 'fields': 'resultSizeEstimate'},
+    # messages.list para a contagem exata: páginas de 500 (o máximo) só com os IDs
+    'contagem': {'maxResults': 500, 'fields': 'messages/id,nextPageToken'},
+    # getProfile: o historyId atual, ponto de partida da sincronização incremental
+    'perfil': {'fields': 'emailAddress,messagesTotal,historyId'},
+    # history.list: mensagens novas e apagadas e rótulos alterados desde um historyId
+    'historico': {'historyTypes': ['messageAdded', 'messageDeleted', 'labelAdded', 'labelRemoved'],
+                  'fields': 'history(messagesAdded/message(id,labelIds),messagesDeleted/message/id,'
+                            'labelsAdded/message(id,labelIds),labelsRemoved/message(id,labelIds)),'
+                            'historyId,nextPageToken'},
+    # threads.list: apenas os IDs das conversas e o token da próxima página
+    'listagem_conversas': {'fields': 'threads/id,nextPageToken'},
+    # threads.get para a lista de conversas: cabeçalhos e rótulos de cada mensagem
+    'conversa_cabecalhos': {'format': 'metadata', 'metadataHeaders': CABECALHOS,
+                            'fields': 'id,messages(id,labelIds,payload/headers(name,value))'},
+    # threads.get para abrir a conversa inteira
+    'conversa_completa': {'format': 'full',
+                          'fields': 'id,messages(id,labelIds,payload(mimeType,filename,headers(name,value),'
+                                    'body(data,size),parts(mimeType,filename,headers(name,value),body(data,size),'
+                                    'parts)))'},
+}
+
+
+def carrega_discovery():
+    """
+    Carrega o documento de descoberta da API do Gmail de uma cópia local.
+
+    Na primeira execução a cópia é criada a partir do documento estático
+    distribuído com o googleapiclient; nas seguintes, o arquivo local é lido
+    diretamente, sem acesso à rede.
+
+    Returns:
+        dict | None: O documento de descoberta, ou None se não houver cópia
+                     local nem documento estático disponível.
+    """
+    caminho = config.get('gmail_discovery_arquivo')
+    if os.path.exists(caminho):
+        with open(caminho, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    from googleapiclient.discovery_cache import get_static_doc
+    documento = get_static_doc('gmail', 'v1')
+    if not documento:
+        return None
+    try:
+        with open(caminho, 'w', encoding='utf-8') as f:
+            f.write(documento)
+    except OSError:
+        pass
+    return json.loads(documento)
+
 
 class Email:
     """
@@ -43,16 +151,21 @@ class Email:
             self.__assunto = email_data.get('assunto', '')
             self.__remetente = email_data.get('remetente', '')
             self.__destinatario = email_data.get('destinatario', '')
+            self.__copia = email_data.get('copia', '')
             self.__data = email_data.get('data', '')
             self.__corpo_texto = email_data.get('corpo_texto', '')
             self.__corpo_html = email_data.get('corpo_html', '')
             self.__anexos = email_data.get('anexos', [])
+            self.__rotulos = list(email_data.get('rotulos', []))
+            # Nome da conta de origem, quando há várias (ver contas.py)
+            self.__conta = email_data.get('conta')
 
     def __str__(self):
         """
         Retorna uma representação em string do e-mail para exibição.
         """
-        return f'De: {self.__remetente} | Assunto: {self.__assunto}'
+        origem = f'[{self.__conta}] ' if self.__conta else ''
+        return f'{origem}De: {self.__remetente} | Assunto: {self.__assunto}'
 
     @property
     def id_(self):
@@ -74,11 +187,26 @@ class Email:
         """Retorna o destinatário do e-mail."""
         return self.__destinatario
 
+    @property
+    def copia(self):
+        """Retorna os destinatários em cópia (Cc) do e-mail."""
+        return self.__copia
+
     @property
     def data(self):
         """Retorna a data de envio do e-mail."""
         return self.__data
 
+    @property
+    def data_ts(self):
+        """Retorna a data de envio em segundos desde a época (ou None)."""
+        return mime_local.data_ts(self.__data)
+
+    @property
+    def conta(self):
+        """Retorna o nome da conta de origem (None com uma só conta)."""
+        return self.__conta
+
     @property
     def corpo_texto(self):
         """Retorna o corpo do e-mail em formato de texto simples."""
@@ -93,6 +221,155 @@ class Email:
     def anexos(self):
         return self.__anexos
 
+    @property
+    def rotulos(self):
+        """Retorna os IDs dos rótulos do e-mail (por exemplo, 'INBOX', 'UNREAD')."""
+        return self.__rotulos
+
+    def altera_rotulos(self, adicionar=(), remover=()):
+        """
+        Atualiza os rótulos depois de uma alteração feita na API, sem buscar
+        o e-mail de novo.
+
+        Args:
+            adicionar (iterable[str], opcional): IDs dos rótulos adicionados.
+            remover (iterable[str], opcional): IDs dos rótulos removidos.
+        """
+        remover = set(remover)
+        rotulos = [r for r in self.__rotulos if r not in remover]
+        rotulos += [r for r in adicionar if r not in rotulos]
+        self.__rotulos = rotulos
+
+    def para_dict(self, corpo=True):
+        """
+        Retorna os dados do e-mail em um dicionário serializável em JSON.
+
+        Os anexos são descritos pelo nome e pelo tipo, sem o conteúdo.
+
+        Args:
+            corpo (bool, opcional): Inclui os corpos de texto e HTML. O padrão é True.
+
+        Returns:
+            dict: Os campos do e-mail.
+        """
+        dados = {
+            'id': self.__id, 'assunto': self.__assunto, 'remetente': self.__remetente,
+            'destinatario': self.__destinatario, 'copia': self.__copia, 'data': self.__data,
+            'rotulos': list(self.__rotulos),
+            **({'conta': self.__conta} if self.__conta else {}),
+            'anexos': [{'filename': a.get('filename'), 'mime_type': a.get('mime_type')} for a in self.__anexos],
+        }
+        if corpo:
+            dados['corpo_texto'] = self.__corpo_texto
+            dados['corpo_html'] = self.__corpo_html
+        return dados
+
+
+class Conversa:
+    """
+    Uma conversa (thread) do Gmail: as suas mensagens, da mais antiga para
+    a mais recente, exibidas como uma única linha.
+    """
+
+    def __init__(self, id_conversa, emails):
+        """
+        Args:
+            id_conversa (str): O ID da conversa.
+            emails (list[Email]): As mensagens, na ordem da API (cronológica).
+        """
+        self.__id = id_conversa
+        self.__emails = emails
+
+    def __str__(self):
+        """
+        Retorna uma representação em string da conversa para exibição.
+        """
+        contagem = f'{self.quantidade} msgs' if self.quantidade != 1 else '1 msg'
+        nao_lidas = self.nao_lidas
+        if nao_lidas:
+            contagem += f', {nao_lidas} não lida' + ('s' if nao_lidas != 1 else '')
+        return f'[{contagem}] De: {", ".join(self.remetentes)} | Assunto: {self.assunto}'
+
+    @property
+    def id_(self):
+        """Retorna o ID da conversa."""
+        return self.__id
+
+    @property
+    def emails(self):
+        """Retorna as mensagens da conversa."""
+        return self.__emails
+
+    @property
+    def quantidade(self):
+        """Retorna o número de mensagens da conversa."""
+        return len(self.__emails)
+
+    @property
+    def nao_lidas(self):
+        """Retorna o número de mensagens não lidas (com o rótulo UNREAD)."""
+        return sum('UNREAD' in email_.rotulos for email_ in self.__emails)
+
+    @property
+    def assunto(self):
+        """Retorna o assunto da primeira mensagem."""
+        return self.__emails[0].assunto if self.__emails else ''
+
+    @property
+    def remetentes(self):
+        """Retorna os remetentes distintos, na ordem em que aparecem."""
+        return list(dict.fromkeys(email_.remetente for email_ in self.__emails if email_.remetente))
+
+    @property
+    def data(self):
+        """Retorna a data da mensagem mais recente."""
+        return self.__emails[-1].data if self.__emails else ''
+
+    def para_dict(self, corpo=False):
+        """
+        Converte a conversa em um dicionário serializável em JSON.
+
+        Args:
+            corpo (bool, opcional): Inclui o corpo de cada mensagem. O padrão é False.
+
+        Returns:
+            dict: ID, contagens, assunto, remetentes, data e mensagens.
+        """
+        return {'id': self.__id, 'quantidade': self.quantidade, 'nao_lidas': self.nao_lidas,
+                'assunto': self.assunto, 'remetentes': self.remetentes, 'data': self.data,
+                'emails': [email_.para_dict(corpo) for email_ in self.__emails]}
+
+
+class RelatorioBusca:
+    """
+    O que uma busca na API não conseguiu obter, mesmo após as novas
+    tentativas: as mensagens perdidas e o erro que interrompeu a paginação.
+    """
+
+    def __init__(self):
+        self.perdidas = []
+        self.erro = None
+
+    @property
+    def completa(self):
+        """Retorna True se nenhuma mensagem foi perdida."""
+        return not self.perdidas and self.erro is None
+
+    def para_dict(self):
+        """
+        Returns:
+            dict: Número e IDs das mensagens perdidas e o erro da paginação.
+        """
+        return {'perdidas': len(self.perdidas), 'ids_perdidos': list(self.perdidas), 'erro': self.erro}
+
+    def __str__(self):
+        partes = []
+        if self.perdidas:
+            partes.append(f'{len(self.perdidas)} mensagens não puderam ser obtidas')
+        if self.erro is not None:
+            partes.append(f'busca interrompida: {self.erro}')
+        return '; '.join(partes)
+
 
 class Email_Cache:
     """
@@ -101,6 +378,9 @@ class Email_Cache:
     Esta classe armazena e-mails já visualizados ou buscados, evitando
     chamadas repetidas à API do Gmail. Ela implementa lógicas de busca
     local e remota, dependendo da query e do estado do cache.
+
+    Pode ser usada por várias threads ao mesmo tempo (modo em lote com
+    --jobs): as listas internas só são alteradas sob uma trava.
     """
 
     def __init__(self):
@@ -116,8 +396,15 @@ class Email_Cache:
         self.__emails_list = []
         # Lista para armazenar as queries de busca já executadas.
         self.__querys_list = []
-        # Conjunto para armazenar IDs de e-mail para uma busca rápida de duplicatas.
-        self.__emails_ids_set = set()
+        # E-mails por ID, para uma busca rápida de duplicatas.
+        self.__emails_por_id = {}
+        # Buscas mantidas atualizadas em segundo plano (ver `aquece`):
+        # query -> (IDs na ordem da API, completa, instante da confirmação)
+        self.__aquecidas = {}
+        # Protege as listas acima entre threads
+        self.__trava = threading.Lock()
+        # Armazenamento persistente das mensagens importadas
+        self.__data_base = None
 
     def set_service(self, service):
         """
@@ -125,6 +412,32 @@ class Email_Cache:
         """
         self.__service = service
 
+    def set_data_base(self, data_base):
+        """
+        :param data_base: DataBase onde as mensagens importadas são guardadas
+        """
+        self.__data_base = data_base
+
+    def guarda(self, mensagens):
+        """
+        Guarda mensagens no armazenamento persistente do cache (a tabela de
+        mensagens do banco), de onde as buscas locais as leem sem acessar a
+        API. Usado pela importação de mbox/.eml, que pode ter milhões de
+        mensagens: elas não são mantidas em memória.
+
+        Args:
+            mensagens (list[dict]): Dados dos e-mails (ver `mime_local.analisa`).
+
+        Returns:
+            int: Quantas mensagens novas foram guardadas.
+
+        Raises:
+            ErroBanco: Se o banco não gravou as mensagens.
+        """
+        if self.__data_base is None:
+            return 0
+        return self.__data_base.salva_mensagens(mensagens)
+
     def open_html(self, email):
         """
         Gera e abre um arquivo HTML com o conteúdo do e-mail no navegador.
@@ -132,16 +445,40 @@ class Email_Cache:
         Args:
             email (object): Objeto Email a ser aberto no navegador.
         """
+        self.__abre_pagina(f'email_id_{email.id_}.html', [email])
+
+    def open_conversa(self, conversa):
+        """
+        Busca a conversa inteira (uma chamada threads.get) e a abre no
+        navegador, com as mensagens em ordem cronológica. As mensagens
+        obtidas são guardadas no cache.
+
+        Args:
+            conversa (Conversa): A conversa exibida na lista.
+        """
+        completa = self.__service.obtem_conversa(conversa.id_)
+        if completa is None or not completa.emails:
+            print('\aErro ao obter a conversa')
+            return
+        self.adiciona_emails(completa.emails)
+        self.__abre_pagina(f'conversa_id_{conversa.id_}.html', completa.emails)
+
+    def __abre_pagina(self, nome_arquivo, emails):
+        """
+        Escreve as mensagens em um arquivo HTML e o abre no navegador.
+
+        Args:
+            nome_arquivo (str): O nome do arquivo HTML.
+            emails (list[Email]): As mensagens exibidas na página.
+        """
         # Obtém o conteúdo HTML do e-mail.
-        html_email = self.__get_content_html(email)
+        html_email = self.__get_content_html(emails)
 
         # Se o conteúdo HTML não puder ser extraído, imprime um erro e retorna.
         if not html_email:
             print('\aErro ao extrairo o html')
             return
 
-        # Define o nome do arquivo HTML.
-        nome_arquivo = f'email_id_{email.id_}.html'
         try:
             # Cria e escreve o conteúdo HTML no arquivo.
             with open(nome_arquivo, 'w', encoding='utf-8') as f:
@@ -152,15 +489,17 @@ class Email_Cache:
         except Exception as error:
             print(f'\aError ao abrir HTML: {error}')
 
-    def __get_content_html(self, email_data):
+    @perfil.cronometra
+    def __get_content_html(self, emails):
         """
-        Gera o conteúdo HTML completo para a visualização de um e-mail.
+        Gera o conteúdo HTML completo para a visualização de um e-mail ou
+        de uma conversa (um bloco por mensagem).
 
         Args:
-            email_data (objeto): Objeto da classe Email.
+            emails (list): Objetos da classe Email.
 
         Returns:
-            str: Uma string HTML contendo o e-mail formatado.
+            str: Uma string HTML contendo os e-mails formatados.
         """
 
         # Inicia a construção da string HTML com a estrutura básica.
@@ -175,16 +514,40 @@ class Email_Cache:
                     # O bloco <style> contém CSS para estilizar a página HTML.
                     # Ele define o estilo da fonte, cores, espaçamento e layout
                     # para uma visualização limpa e moderna do e-mail.
-                    body {{ font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, Helvetica, Arial, sans-serif; margin: 20px; line-height: 1.6; background-color: #f4f4f9; color: #333; }}
-                    .container {{ max-width: 800px; margin: auto; background: #fff; padding: 30px; border-radius: 8px; box-shadow: 0 4px 8px rgba(0,0,0,0.1); }}
-                    h1 {{ color: #0056b3; border-bottom: 2px solid #eee; padding-bottom: 10px; }}
-                    pre {{ background: #352f2f; padding: 15px; border-radius: 5px; overflow-x: auto; white-space: pre-wrap; word-wrap: break-word; }}
-                    .header-info {{ margin-bottom: 20px; }}
-                    .header-info p {{ margin: 5px 0; }}
-                    .attachments {{ margin-top: 20px; border-top: 1px solid #eee; padding-top: 15px; }}
+                    body { font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, Helvetica, Arial, sans-serif; margin: 20px; line-height: 1.6; background-color: #f4f4f9; color: #333; }
+                    .container { max-width: 800px; margin: auto; margin-bottom: 20px; background: #fff; padding: 30px; border-radius: 8px; box-shadow: 0 4px 8px rgba(0,0,0,0.1); }
+                    h1 { color: #0056b3; border-bottom: 2px solid #eee; padding-bottom: 10px; }
+                    pre { background: #352f2f; padding: 15px; border-radius: 5px; overflow-x: auto; white-space: pre-wrap; word-wrap: break-word; }
+                    .header-info { margin-bottom: 20px; }
+                    .header-info p { margin: 5px 0; }
+                    .attachments { margin-top: 20px; border-top: 1px solid #eee; padding-top: 15px; }
                 </style>
             </head>
             <body>
+            """
+        # Um bloco por mensagem; em uma conversa, da mais antiga para a mais recente.
+        for email_data in emails:
+            html_content += self.__bloco_html(email_data)
+
+        # Finaliza a construção da string HTML.
+        html_content += """
+            </body>
+            </html>
+            """
+        return html_content
+
+    @staticmethod
+    def __bloco_html(email_data):
+        """
+        Gera o bloco HTML de uma mensagem: cabeçalhos, corpo e anexos.
+
+        Args:
+            email_data (objeto): Objeto da classe Email.
+
+        Returns:
+            str: O bloco <div class="container"> da mensagem.
+        """
+        html_content = """
                 <div class="container">
                     <div class="header-info">
                         <p><strong>De:</strong> {remetente}</p>
@@ -206,8 +569,8 @@ class Email_Cache:
             remetente=email_data.remetente,
             destinatario=email_data.destinatario,
             data=email_data.data,
-            corpo_email=email_data.corpo_texto if email_data.corpo_texto else
-            f'<pre>{email_data.corpo_html}</pre>'
+            corpo_email=email_data.corpo_html if email_data.corpo_html else
+            f'<pre>{html.escape(email_data.corpo_texto)}</pre>'
         )
 
         # Se houver anexos, adiciona a seção de anexos ao HTML.
@@ -227,15 +590,12 @@ class Email_Cache:
                     </div>
                 """
 
-        # Finaliza a construção da string HTML.
         html_content += """
                 </div>
-            </body>
-            </html>
             """
         return html_content
 
-    def __search_in_gmail_and_save(self, query, limit):
+    def __search_in_gmail_and_save(self, query, limit, relatorio=None):
         """
         Busca e-mails na API do Gmail, salva-os no cache e retorna uma lista.
 
@@ -243,29 +603,129 @@ class Email_Cache:
             query (str): A string de busca para a API do Gmail.
             limit (int, opcional): O número máximo de e-mails a serem
                                     buscados. O padrão é 50.
+            relatorio (RelatorioBusca, opcional): Recebe as mensagens perdidas.
 
         Returns:
             list: Uma lista de objetos Email encontrados.
         """
-        # Cria uma lista a partir do gerador de API, limitando o número de itens.
-        temp_list = list(itertools.islice(self.__service.geratorAPI(query), limit))
+        relatorio = relatorio if relatorio is not None else RelatorioBusca()
+        # Baixa até `limit` e-mails: as mensagens de cada página são buscadas
+        # em paralelo e analisadas no pipeline do cliente.
+        temp_list = list(self.__service.baixa(query, limit, relatorio))
 
         if temp_list:
-            saved = 0
+            saved = self.adiciona_emails(temp_list)
+            # Se novos e-mails foram salvos, a query é adicionada à lista de
+            # queries. Uma busca incompleta não é reaproveitada do cache.
+            if saved > 0 and relatorio.completa:
+                with self.__trava:
+                    self.__querys_list.append(query)
+
+        return temp_list
+
+    def adiciona_emails(self, emails):
+        """
+        Guarda e-mails no cache, ignorando os que já estão nele.
+
+        Também usado para carregar o cache em lote (por exemplo, nos testes
+        de carga), sem passar pela API. Só os e-mails novos vão para a
+        coleta de contatos: uma mensagem buscada de novo (outra query, o
+        aquecedor, uma conversa aberta) não conta outro uso dos endereços.
+
+        Args:
+            emails (iterable[Email]): Os e-mails a guardar.
+
+        Returns:
+            int: Quantos e-mails novos foram guardados.
+        """
+        novos = []
+        with self.__trava:
             # Itera sobre a lista de e-mails.
-            for email_ in temp_list:
+            for email_ in emails:
                 # Verifica se o ID do e-mail já existe no conjunto.
-                if email_.id_ not in self.__emails_ids_set:
-                    # Se não, adiciona-o à lista e ao conjunto.
+                if email_.id_ not in self.__emails_por_id:
+                    # Se não, adiciona-o à lista e ao dicionário.
                     self.__emails_list.append(email_)
-                    self.__emails_ids_set.add(email_.id_)
-                    saved += 1
-            # Se novos e-mails foram salvos, a query é adicionada à lista de queries.
-            if saved > 0:
-                self.__querys_list.append(query)
+                    self.__emails_por_id[email_.id_] = email_
+                    novos.append(email_)
+        if novos and self.__service is not None:
+            self.__service.registra_contatos(novos)
+        return len(novos)
 
-        return temp_list
+    def faltantes(self, ids):
+        """
+        Retorna os IDs que ainda não estão no cache, na mesma ordem.
+        """
+        with self.__trava:
+            return [id_msg for id_msg in ids if id_msg not in self.__emails_por_id]
 
+    def atualiza_rotulos(self, id_msg, rotulos):
+        """
+        Substitui os rótulos de um e-mail do cache (por exemplo, alterados
+        em outro cliente e lidos do histórico). E-mails fora do cache são
+        ignorados.
+        """
+        with self.__trava:
+            email_ = self.__emails_por_id.get(id_msg)
+            if email_ is not None:
+                email_.altera_rotulos(rotulos, set(email_.rotulos) - set(rotulos))
+
+    def aquece(self, query, ids, completa):
+        """
+        Registra o resultado de uma busca obtido em segundo plano. Enquanto
+        confirmado há menos de 'aquecedor_validade' segundos, search= com a
+        mesma query é atendida por ele, sem acessar a API.
+
+        Args:
+            query (str): A query buscada.
+            ids (list[str]): Os IDs do resultado, na ordem da API, todos já
+                             no cache.
+            completa (bool): Se os IDs são o resultado inteiro; senão, só
+                             buscas com limit= até len(ids) são atendidas.
+        """
+        with self.__trava:
+            self.__aquecidas[query] = (list(ids), completa, time.monotonic())
+
+    def confirma_aquecidas(self):
+        """
+        Renova a validade das buscas aquecidas quando o histórico da caixa
+        não mostrou alterações.
+        """
+        agora = time.monotonic()
+        with self.__trava:
+            for query, (ids, completa, _) in self.__aquecidas.items():
+                self.__aquecidas[query] = (ids, completa, agora)
+
+    def descarta_aquecidas(self, query=None):
+        """
+        Descarta uma busca aquecida (ou todas, sem `query`), que volta a
+        ser feita na API.
+        """
+        with self.__trava:
+            if query is None:
+                self.__aquecidas.clear()
+            else:
+                self.__aquecidas.pop(query, None)
+
+    def __search_aquecida(self, query, limit):
+        """
+        Atende a busca pelo resultado aquecido, se ainda válido e
+        suficiente para `limit`.
+
+        Returns:
+            list | None: Os e-mails, ou None se a busca deve ir à API.
+        """
+        with self.__trava:
+            aquecida = self.__aquecidas.get(query)
+            if aquecida is None:
+                return None
+            ids, completa, instante = aquecida
+            if time.monotonic() - instante > config.get('aquecedor_validade') or \
+                    (not completa and limit > len(ids)):
+                return None
+            return [self.__emails_por_id[id_msg] for id_msg in ids[:limit]]
+
+    @perfil.cronometra
     def __search_in_saved_emails(self, query):
         """
         Busca e-mails na lista de cache com base em uma query.
@@ -281,9 +741,12 @@ class Email_Cache:
         # Converte a query para minúsculas para uma busca sem distinção de maiúsculas/minúsculas.
         query_lower = query.lower()
         temp_list = []
+        # A lista só cresce: basta percorrer os e-mails guardados até agora
+        with self.__trava:
+            quantidade = len(self.__emails_list)
 
         # Itera sobre os e-mails salvos.
-        for email_ in self.__emails_list:
+        for email_ in itertools.islice(self.__emails_list, quantidade):
             # Converte os campos do e-mail para minúsculas.
             remetente = email_.remetente.lower()
             assunto = email_.assunto.lower()
@@ -301,10 +764,30 @@ class Email_Cache:
 
         # Retorna a lista de e-mails encontrados ou uma lista vazia.
         if temp_list:
-            return sorted(temp_list, key=lambda data: data['data'])
+            return sorted(temp_list, key=lambda email_: email_.data)
         return []
 
-    def search_emails(self, limit, query='label:unread'):
+    def __search_local(self, query, limit):
+        """
+        Busca apenas localmente: nos e-mails em memória e nos guardados no
+        banco (importados), sem acessar a API.
+
+        Args:
+            query (str): O texto procurado.
+            limit (int): O número máximo de e-mails.
+
+        Returns:
+            list: Uma lista de objetos Email encontrados.
+        """
+        temp_list = self.__search_in_saved_emails(query)[:limit]
+        if self.__data_base is not None and len(temp_list) < limit:
+            vistos = {email_.id_ for email_ in temp_list}
+            for dados in self.__data_base.busca_mensagens(query, limit):
+                if dados['id'] not in vistos:
+                    temp_list.append(Email(dados))
+        return temp_list[:limit]
+
+    def search_emails(self, limit, query='label:unread', local=False, relatorio=None):
         """
         Método principal para buscar e-mails.
 
@@ -314,21 +797,32 @@ class Email_Cache:
         Args:
             query (str, opcional): A string de busca. O padrão é label:unread.
             limit (int, opcional): O limite de busca. O padrão é 50
+            local (bool, opcional): Busca só no cache, incluindo as
+                                    mensagens importadas. O padrão é False.
+            relatorio (RelatorioBusca, opcional): Recebe as mensagens que a
+                                                  busca na API não obteve.
 
         Returns:
             list: Uma lista de objetos Email encontrados ou None se não
                   houver resultados.
         """
         # Lógica para decidir o tipo de busca.
+        aquecida = None if local else self.__search_aquecida(query, limit)
+        # Busca local pedida explicitamente: não acessa a API.
+        if local:
+            temp_list = self.__search_local(query, limit)
+        # Busca mantida atualizada em segundo plano pelo aquecedor.
+        elif aquecida is not None:
+            temp_list = aquecida
         # Se a query for 'is:unread', busca diretamente na API.
-        if query == 'label:unread':
-            temp_list = self.__search_in_gmail_and_save(query, limit)
+        elif query == 'label:unread':
+            temp_list = self.__search_in_gmail_and_save(query, limit, relatorio)
         # Se a query já foi usada antes, busca no cache.
         elif query in self.__querys_list:
             temp_list = self.__search_in_saved_emails(query)
         # Caso contrário, busca na API e salva no cache.
         else:
-            temp_list = self.__search_in_gmail_and_save(query, limit)
+            temp_list = self.__search_in_gmail_and_save(query, limit, relatorio)
 
         # Se a lista de resultados estiver vazia, imprime uma mensagem e retorna None.
         if not temp_list:
@@ -337,6 +831,72 @@ class Email_Cache:
 
         return temp_list
 
+    def search_threads(self, limit, query='label:unread', relatorio=None):
+        """
+        Busca conversas na API do Gmail: uma chamada threads.get por
+        conversa, em vez de uma messages.get por mensagem.
+
+        As conversas não são guardadas no cache, pois só têm os cabeçalhos;
+        as mensagens entram nele quando a conversa é aberta (open_conversa).
+
+        Args:
+            limit (int): O número máximo de conversas.
+            query (str, opcional): A string de busca. O padrão é label:unread.
+            relatorio (RelatorioBusca, opcional): Recebe as conversas que
+                                                  não puderam ser obtidas.
+
+        Returns:
+            list: Uma lista de objetos Conversa encontrados ou None se não
+                  houver resultados.
+        """
+        temp_list = list(itertools.islice(self.__service.conversas(query, relatorio), limit))
+        if not temp_list:
+            print('\aNenhuma conversa encontrada')
+            return
+
+        return temp_list
+
+    def modifica(self, emails, adicionar=(), remover=()):
+        """
+        Adiciona e remove rótulos de vários e-mails com messages.batchModify
+        e atualiza os objetos Email do cache, que não precisam ser buscados
+        de novo.
+
+        Marcar como lido é remover 'UNREAD'; arquivar é remover 'INBOX'.
+
+        Args:
+            emails (list[Email]): Os e-mails alterados.
+            adicionar (iterable[str], opcional): IDs dos rótulos adicionados.
+            remover (iterable[str], opcional): IDs dos rótulos removidos.
+
+        Returns:
+            int: Quantos e-mails foram alterados.
+
+        Raises:
+            Exception: O erro da API; os e-mails das chamadas anteriores já
+                       foram alterados no cache.
+        """
+        # Um mesmo e-mail pode aparecer em mais de uma busca
+        por_id = {}
+        for email_ in emails:
+            por_id.setdefault(email_.id_, []).append(email_)
+
+        def aplica(ids):
+            with self.__trava:
+                # Os resultados aquecidos podem ter deixado de casar com a query
+                self.__aquecidas.clear()
+                for id_msg in ids:
+                    alterados = por_id[id_msg]
+                    # A cópia do cache pode ser outro objeto (por exemplo, um
+                    # e-mail de uma conversa listada com threads= on)
+                    guardado = self.__emails_por_id.get(id_msg)
+                    if guardado is not None and all(guardado is not e for e in alterados):
+                        alterados = alterados + [guardado]
+                    for email_ in alterados:
+                        email_.altera_rotulos(adicionar, remover)
+
+        return self.__service.modifica(list(por_id), adicionar, remover, aplica)
+
 
 class EmailClient:
     """
@@ -353,23 +913,82 @@ class EmailClient:
 
     __id_usuario: str
 
-    def __init__(self, email: Email):
+    def __init__(self, email: Email, interativo=True, credenciais=None, transporte=None, service=None,
+                 limitador=None, repeticao=None, conta=None, usuario=None, remetente=None):
         """
         Inicializa o cliente da API do Gmail.
 
         Args:
             email_class (class): A classe para criar objetos de e-mail.
+            interativo (bool, opcional): Se False, usa apenas as credenciais
+                                         salvas e lança AutenticacaoNecessaria
+                                         em vez de abrir o navegador. Permite
+                                         criar o cliente em segundo plano.
+                                         O padrão é True.
+            credenciais (GerenciadorCredenciais, opcional): Gerenciador
+                                         compartilhado. Se omitido, um novo é
+                                         criado com o token configurado.
+            transporte (objeto, opcional): Transporte HTTP com a interface de
+                                         `httplib2.Http.request`. Se omitido,
+                                         é criado um PoolHttp com as
+                                         credenciais do gerenciador.
+            service (objeto, opcional): Serviço da API já construído (por
+                                         exemplo, o serviço falso dos
+                                         benchmarks). Se informado, a
+                                         autenticação não é feita.
+            limitador (LimitadorCota, opcional): Limitador da cota do
+                                         usuário, compartilhado por todas as
+                                         chamadas. Se omitido, é criado com a
+                                         cota configurada (ou nenhum, se
+                                         'gmail_cota_unidades_s' for 0).
+            repeticao (PoliticaRepeticao, opcional): Política de novas
+                                         tentativas das chamadas que falham
+                                         por motivos passageiros. Se omitida,
+                                         é criada com a configuração.
+            conta (str, opcional): Nome da conta, gravado nos e-mails
+                                         obtidos quando há várias (ver
+                                         contas.py). O padrão é None.
+            usuario (str, opcional): userId das chamadas: 'me' (padrão), o
+                                         dono do token, ou o endereço de uma
+                                         caixa que o token pode acessar.
+            remetente (str, opcional): Endereço usado no From das mensagens
+                                         enviadas. O padrão é vazio, e o
+                                         Gmail usa o da conta.
         """
         # Define as permissões (scopes) necessárias para a API.
-        self.__SCOPES = ['https://www.googleapis.com/auth/gmail.modify']
-        self.__id_usuario = id_usuario
+        self.__SCOPES = ESCOPOS
+        self.__id_usuario = usuario or id_usuario
+        self.__conta = conta
+        self.__credenciais = credenciais or GerenciadorCredenciais(
+            self.__SCOPES,
+            arquivo_token=config.get('gmail_token_arquivo'),
+            arquivo_segredos=config.get('gmail_segredos_arquivo'),
+            margem=config.get('gmail_token_margem')
+        )
+        self.__transporte = transporte
+        self.__modelo = None
+        if limitador is None and config.get('gmail_cota_unidades_s'):
+            limitador = LimitadorCota(config.get('gmail_cota_unidades_s'), config.get('gmail_cota_rajada'))
+        self.__limitador = limitador
+        self.__repeticao = repeticao or PoliticaRepeticao(config.get('gmail_tentativas'),
+                                                          config.get('gmail_espera_base'),
+                                                          config.get('gmail_espera_maxima'))
+        # Se False, as chamadas voltam a receber o recurso completo
+        self.__projecoes = config.get('gmail_projecoes')
         # Chama o método de autenticação para criar o serviço da API.
-        self.__service = self.__authenticate()
+        self.__service = service or self.__authenticate(interativo)
         # Armazena as classes para uso posterior.
         self.__cache_class = None
         self.__email_class = email
+        # Coletor de contatos alimentado pelos cabeçalhos dos e-mails buscados
+        self.__coletor = None
+        # Rótulos da conta (nome -> ID), lidos na primeira alteração
+        self.__rotulos = None
+        # Motor usado para obter as mensagens completas (ver MOTORES)
+        self.__motor = None
+        self.set_motor(config.get('gmail_motor'))
         # Define o endereço de e-mail do remetente.
-        self.__email_remetente = '' # Coloque seu endereço de e-mail aqui
+        self.__email_remetente = remetente or ''  # Ou 'remetente' da conta em gmail_contas
 
     def set_cache_clas(self, cache):
         """
@@ -377,46 +996,131 @@ class EmailClient:
         """
         self.__cache_class = cache
 
-    def __authenticate(self):
+    @property
+    def conta(self):
+        """Retorna o nome da conta do cliente (None com uma só conta)."""
+        return self.__conta
+
+    @property
+    def credenciais(self):
+        """Retorna o GerenciadorCredenciais usado pelo cliente."""
+        return self.__credenciais
+
+    def set_projecoes(self, ativo):
         """
-        Autentica o usuário com a API do Gmail.
+        :param ativo: bool - Usa (True) ou não o parâmetro `fields` nas chamadas.
+        """
+        self.__projecoes = ativo
 
-        O método verifica se existe um token de autenticação local. Se
-        estiver expirado, tenta renová-lo. Caso contrário, inicia o
-        fluxo de autenticação OAuth 2.0.
+    @property
+    def limitador(self):
+        """Retorna o LimitadorCota das chamadas à API (ou None)."""
+        return self.__limitador
 
-        Returns:
-            build: O objeto de serviço da API do Gmail autenticado.
+    def set_limitador(self, limitador):
+        """
+        :param limitador: LimitadorCota compartilhado, ou None para não limitar as chamadas.
         """
-        credentials = None
+        self.__limitador = limitador
 
-        # Verifica se o arquivo de token existe.
-        if os.path.exists('token.pickle'):
-            # Se existir, carrega as credenciais do arquivo.
-            with open('token.pickle', 'rb') as token:
-                credentials = pickle.load(token)
+    @property
+    def motor(self):
+        """Retorna o motor das mensagens completas ('json' ou 'bruto')."""
+        return self.__motor
 
-        # Se as credenciais não existirem ou forem inválidas.
-        if not credentials or not credentials.valid:
-            # Se as credenciais existirem, mas estiverem expiradas e com um token de renovação.
-            if credentials and credentials.expired and credentials.refresh_token:
-                # Renova as credenciais.
-                credentials.refresh(Request())
+    def set_motor(self, motor):
+        """
+        :param motor: str - 'json' (format='full') ou 'bruto' (format='raw', analisado localmente).
+        """
+        if motor not in MOTORES:
+            raise ValueError(f'Motor desconhecido: {motor} (use {" ou ".join(MOTORES)})')
+        self.__motor = motor
 
-            else:
-                # Se não, inicia um novo fluxo de autenticação.
-                fluxo = InstalledAppFlow.from_client_secrets_file(
-                    'credentials.json', self.__SCOPES
-                )
-                # Executa o servidor local para o fluxo de autenticação.
-                credentials = fluxo.run_local_server(port=0)
+    def set_repeticao(self, repeticao):
+        """
+        :param repeticao: PoliticaRepeticao das chamadas à API.
+        """
+        self.__repeticao = repeticao
+
+    @property
+    def modelo(self):
+        """Retorna o ModeloMedido com o tamanho e o tempo de parse das respostas."""
+        return self.__modelo
+
+    @property
+    def transporte(self):
+        """Retorna o transporte HTTP usado pelo serviço da API."""
+        return self.__transporte
+
+    @property
+    def coletor(self):
+        """Retorna o ColetorContatos dos e-mails buscados (ou None)."""
+        return self.__coletor
+
+    def set_coletor(self, coletor):
+        """
+        :param coletor: ColetorContatos
+        """
+        self.__coletor = coletor
+
+    def registra_contatos(self, emails):
+        """
+        Enfileira os cabeçalhos dos e-mails para a coleta de contatos em
+        segundo plano, se houver um coletor. Chamado pelo Email_Cache com
+        os e-mails que ele ainda não tinha.
 
-            # Salva as novas credenciais em um arquivo.
-            with open('token.pickle', 'wb') as token:
-                pickle.dump(credentials, token)
+        Args:
+            emails (iterable[Email]): Os e-mails novos.
+        """
+        if self.__coletor is None:
+            return
+        for email_ in emails:
+            self.__coletor.registra(email_)
 
-        # Constrói o serviço da API com as credenciais.
-        service = build('gmail', 'v1', credentials=credentials)
+    def __authenticate(self, interativo=True):
+        """
+        Autentica o usuário com a API do Gmail.
+
+        O método verifica se existe um token de autenticação local. Se
+        estiver expirado, tenta renová-lo. Caso contrário, inicia o
+        fluxo de autenticação OAuth 2.0. Tudo isso é delegado ao
+        GerenciadorCredenciais, que mantém o token renovado.
+
+        Args:
+            interativo (bool, opcional): Se False, não inicia o fluxo OAuth.
+
+        Returns:
+            build: O objeto de serviço da API do Gmail autenticado.
+
+        Raises:
+            AutenticacaoNecessaria: Se `interativo` for False e não houver
+                                    credenciais salvas utilizáveis.
+        """
+        from googleapiclient.discovery import build, build_from_document
+
+        from modelo_json import ModeloMedido
+
+        # Carrega, renova ou cria as credenciais; a partir daqui o gerenciador
+        # as renova em segundo plano antes de expirarem.
+        credentials = self.__credenciais.obtem(interativo)
+
+        # Todas as requisições passam por um pool de conexões keep-alive que
+        # pede respostas comprimidas e pode ser usado por várias threads.
+        if self.__transporte is None:
+            self.__transporte = PoolHttp(
+                credentials,
+                tamanho=config.get('http_pool_tamanho'),
+                timeout=config.get('http_timeout')
+            )
+
+        # Constrói o serviço da API a partir da cópia local do documento de
+        # descoberta quando disponível. O modelo mede cada resposta JSON.
+        self.__modelo = ModeloMedido()
+        documento = carrega_discovery()
+        if documento:
+            service = build_from_document(documento, http=self.__transporte, model=self.__modelo)
+        else:
+            service = build('gmail', 'v1', http=self.__transporte, model=self.__modelo)
 
         return service
 
@@ -427,16 +1131,26 @@ class EmailClient:
         Args:
             body (list): Uma lista de tuplas contendo o corpo da mensagem
                          e o destinatário.
+
+        Returns:
+            list[tuple[str, str]]: Os destinatários cujo envio falhou e o erro.
         """
+        falhas = []
         # Itera sobre a lista de corpos de mensagem.
         for b, des in body:
             try:
                 # Envia cada mensagem individualmente.
-                self.__service.users().messages().send(userId=self.__id_usuario, body=b).execute()
+                # Um envio que falhou no servidor pode ter sido feito: só é
+                # repetido se a API recusou a requisição por limite de taxa
+                self.__executa(self.__service.users().messages().send(userId=self.__id_usuario, body=b),
+                               idempotente=False)
             except Exception as error:
                 # Em caso de erro, imprime uma mensagem.
                 print(f'\aError ao enviar: {des} - {error}')
+                falhas.append((des, str(error)))
+        return falhas
 
+    @perfil.cronometra
     def write_email(self, to, ass, text, files=None):
         """
         Cria uma mensagem MIME com corpo e anexos.
@@ -525,121 +1239,520 @@ class EmailClient:
 
         return msgs
 
-    def __gerator_emails(self, query):
+    def paginas(self, query, page_token=None):
         """
-        Um gerador que busca e-mails na API do Gmail em lotes.
+        Lista as mensagens de uma busca, uma página por vez.
 
-        Este método otimiza o uso de memória ao buscar e-mails em pequenas
-        partes, usando tokens de paginação para continuar a busca.
+        Uma página que falha é pedida de novo com o mesmo token, conforme a
+        política de repetição; se as tentativas acabarem, o erro é lançado
+        e a busca pode ser retomada pelo token da última página recebida.
 
         Args:
             query (str): A string de busca para a API.
+            page_token (str, opcional): Token da página onde começar (por
+                                        exemplo, para retomar uma exportação).
 
         Yields:
-            dict: Um dicionário de mensagem bruta da API.
+            tuple[str | None, list[dict]]: O token da página (None na
+                                           primeira) e as suas mensagens.
         """
-        try:
-            # Faz a primeira chamada à API para a lista de mensagens.
-            resposta = self.__service.users().messages().list(userId=self.__id_usuario, q=query).execute()
+        yield from self.__pagina(self.__service.users().messages, 'messages', 'listagem', query, page_token)
+
+    def __pagina(self, recurso, chave, visao, query, page_token=None):
+        """
+        Percorre as páginas de messages.list ou threads.list.
 
-            # Se houver mensagens na resposta, retorna cada uma como um gerador.
-            if 'messages' in resposta:
-                for messages in resposta['messages']:
-                    yield messages
+        Args:
+            recurso (callable): `users().messages` ou `users().threads`.
+            chave (str): O campo da resposta com os itens ('messages' ou 'threads').
+            visao (str): A projeção da listagem.
+            query (str): A string de busca para a API.
+            page_token (str, opcional): Token da página onde começar.
 
+        Yields:
+            tuple[str | None, list[dict]]: O token e os itens de cada página.
+        """
+        parametros = self.__parametros(visao)
+        while True:
+            pagina = {'pageToken': page_token} if page_token else {}
+            resposta = self.__executa(recurso().list(userId=self.__id_usuario, q=query, **pagina, **parametros),
+                                      visao)
+            yield page_token, resposta.get(chave, [])
             # Continua buscando até que não haja mais páginas de resultados.
-            while 'nextPageToken' in resposta:
-                page_token = resposta['nextPageToken']
-                # Faz a próxima chamada à API com o token de paginação.
-                resposta = self.__service.users().messages().list(userId=self.__id_usuario, q=query,
-                                                                  pageToken=page_token).execute()
-                # Retorna as mensagens da nova página.
-                if 'messages' in resposta:
-                    for messages in resposta['messages']:
-                        yield messages
+            page_token = resposta.get('nextPageToken')
+            if not page_token:
+                return
 
-        except Exception as error:
-            # Em caso de erro na geração, imprime uma mensagem.
-            print(f'Erro ao gerar mensagens: {error}')
+    @perfil.cronometra
+    def baixa(self, query, limite=None, relatorio=None, tarefas=None, processos=None, visao='completa'):
+        """
+        Baixa as mensagens completas de uma busca grande em um pipeline:
+        as mensagens de cada página são buscadas em paralelo (`tarefas`
+        conexões) e analisadas em um pool de processos (`processos`),
+        enquanto as próximas já estão sendo buscadas. Os e-mails saem na
+        ordem da busca.
+
+        O pool só é usado com o motor 'bruto', cuja análise MIME local é
+        limitada pela CPU; no motor 'json' (e na visão 'cabecalhos') as
+        partes já vêm separadas pela API e a conversão, barata, é feita na
+        própria thread.
+
+        Args:
+            query (str): A string de busca para a API.
+            limite (int, opcional): O número máximo de mensagens. O padrão
+                                    é a busca inteira.
+            relatorio (RelatorioBusca, opcional): Recebe as mensagens que
+                                                  não puderam ser obtidas.
+            tarefas (int, opcional): Requisições simultâneas. O padrão é
+                                     'http_pool_tamanho'.
+            processos (int, opcional): Processos de análise. O padrão é
+                                       'analise_processos'.
+            visao (str, opcional): 'completa' (padrão) busca corpo e anexos,
+                                   com o motor configurado; 'cabecalhos'
+                                   busca apenas os cabeçalhos.
+
+        Yields:
+            Email: Cada e-mail, na ordem da busca.
+        """
+        relatorio = relatorio if relatorio is not None else RelatorioBusca()
+        # Com o motor 'bruto', a mensagem completa vem no formato 'raw'
+        bruto = visao == 'completa' and self.__motor == 'bruto'
+        visao = 'bruta' if bruto else visao
+        tarefas = tarefas or config.get('http_pool_tamanho')
+        processos = config.get('analise_processos') if processos is None else processos
+
+        def mensagens(executor):
+            # Uma página de IDs por vez, buscada em paralelo e entregue em ordem
+            restantes = limite
+            try:
+                for _, pagina in self.paginas(query):
+                    if restantes is not None:
+                        pagina = pagina[:restantes]
+                        restantes -= len(pagina)
+                    obtidas = executor.map(lambda m: self.__get_content(m['id'], visao), pagina)
+                    for msg, conteudo in zip(pagina, obtidas):
+                        if conteudo:
+                            yield conteudo
+                        else:
+                            relatorio.perdidas.append(msg['id'])
+                    if restantes is not None and restantes <= 0:
+                        return
+            except Exception as error:
+                print(f'\aErro ao gerar mensagens: {error}')
+                relatorio.erro = str(error)
 
-    def geratorAPI(self, query):
+        with ThreadPoolExecutor(max_workers=tarefas, thread_name_prefix='baixa') as executor:
+            if bruto:
+                analisador = AnalisadorParalelo(processos, config.get('analise_lote'))
+                emails = self.__analisadas(analisador.analisa(mensagens(executor)), relatorio, self.__conta)
+            else:
+                emails = (self.cria_email(mensagem) for mensagem in mensagens(executor))
+            yield from emails
+
+    @staticmethod
+    def __analisadas(resultados, relatorio, conta):
+        for id_msg, dados in resultados:
+            if dados is None:
+                relatorio.perdidas.append(id_msg)
+            else:
+                dados['conta'] = conta
+                yield Email(dados)
+
+    def conversas(self, query, relatorio=None):
         """
-        Processa mensagens brutas da API e retorna objetos Email.
+        Lista as conversas de uma busca (threads.list) e obtém cada uma com
+        uma única chamada threads.get no formato 'metadata'.
 
         Args:
             query (str): A string de busca para a API.
+            relatorio (RelatorioBusca, opcional): Recebe as conversas que
+                                                  não puderam ser obtidas.
 
         Yields:
-            Email: Um objeto Email preenchido com os dados da mensagem.
+            Conversa: Cada conversa, com os cabeçalhos das suas mensagens.
+        """
+        relatorio = relatorio if relatorio is not None else RelatorioBusca()
+        try:
+            for _, conversas in self.__pagina(self.__service.users().threads, 'threads', 'listagem_conversas',
+                                              query):
+                for conversa in conversas:
+                    nova = self.obtem_conversa(conversa['id'], 'conversa_cabecalhos')
+                    if nova is None:
+                        relatorio.perdidas.append(conversa['id'])
+                        continue
+                    yield nova
+        except Exception as error:
+            print(f'\aErro ao gerar conversas: {error}')
+            relatorio.erro = str(error)
+
+    def obtem_conversa(self, id_conversa, visao='conversa_completa'):
         """
-        # Itera sobre as mensagens do gerador.
-        for msg in self.__gerator_emails(query):
-            # Obtém o conteúdo completo da mensagem.
-            msg_content = self.__get_content(msg['id'])
+        Busca uma conversa inteira com uma chamada threads.get.
 
-            # Se o conteúdo não for obtido, pula para o próximo.
-            if not msg_content:
-                print(f'\aErro ao obter mensagem - ID {msg['id']}')
-                continue
+        Args:
+            id_conversa (str): O ID da conversa.
+            visao (str, opcional): 'conversa_completa' (padrão), com corpo e
+                                   anexos, ou 'conversa_cabecalhos'.
+
+        Returns:
+            Conversa: A conversa, ou None em caso de erro.
+        """
+        try:
+            resposta = self.__executa(self.__service.users().threads().get(userId=self.__id_usuario, id=id_conversa,
+                                                                           **self.__parametros(visao)), visao)
+        except Exception as error:
+            print(f'\aError ao obter a conversa {id_conversa}: {error}')
+            return None
+        return Conversa(resposta.get('id', id_conversa), [self.cria_email(m) for m in resposta.get('messages', [])])
+
+    def rotulos(self):
+        """
+        Lista os rótulos da conta (labels.list), uma vez por cliente.
+
+        Returns:
+            dict[str, str]: ID de cada rótulo, indexado pelo nome em minúsculas.
+        """
+        if self.__rotulos is None:
+            resposta = self.__executa(self.__service.users().labels().list(userId=self.__id_usuario,
+                                                                           **self.__parametros('rotulos')),
+                                      'rotulos')
+            self.__rotulos = {r['name'].lower(): r['id'] for r in resposta.get('labels', [])}
+        return self.__rotulos
+
+    def id_rotulo(self, nome):
+        """
+        Traduz o nome de um rótulo (por exemplo, 'Trabalho' ou 'starred') no
+        ID usado pela API. Os rótulos do sistema têm o nome como ID.
 
-            # Dicionário para armazenar os dados do e-mail.
-            email_data = {
-                'id': msg['id'], 'assunto': '', 'remetente': '', 'destinatario': '',
-                'data': '', 'corpo_texto': '', 'corpo_html': '', 'anexos': []
-            }
+        Args:
+            nome (str): O nome ou o ID do rótulo.
 
-            # Se houver um payload (conteúdo) na mensagem.
-            if 'payload' in msg_content:
-                payload = msg_content['payload']
+        Returns:
+            str: O ID do rótulo.
 
-                # Extrai os cabeçalhos.
-                if 'headers' in payload:
-                    for cabecalho in payload['headers']:
-                        name = cabecalho['name'].lower()
-                        # Popula o dicionário com os dados dos cabeçalhos.
-                        if name == 'subject':
-                            email_data['assunto'] = cabecalho['value']
-                        elif name == 'from':
-                            email_data['remetente'] = cabecalho['value']
-                        elif name == 'to':
-                            email_data['destinatario'] = cabecalho['value']
-                        elif name == 'date':
-                            email_data['data'] = cabecalho['value']
+        Raises:
+            ValueError: Se a conta não tiver o rótulo.
+        """
+        rotulos = self.rotulos()
+        if nome in rotulos.values():
+            return nome
+        try:
+            return rotulos[nome.lower()]
+        except KeyError:
+            raise ValueError(f'Rótulo desconhecido: {nome}') from None
 
-                # Extrai as partes do corpo da mensagem.
-                if 'parts' in payload:
-                    self.__get_parts(payload.get('parts'), email_data)
+    def modifica(self, ids, adicionar=(), remover=(), ao_aplicar=None):
+        """
+        Adiciona e remove rótulos de várias mensagens com
+        messages.batchModify, em chamadas de até LIMITE_MODIFICACAO IDs,
+        em vez de uma messages.modify por mensagem.
 
-            # Cria um novo objeto Email com os dados extraídos.
-            new_email = Email(email_data)
-            # Retorna o objeto como um gerador.
-            yield new_email
+        Args:
+            ids (list[str]): Os IDs das mensagens.
+            adicionar (iterable[str], opcional): IDs dos rótulos adicionados.
+            remover (iterable[str], opcional): IDs dos rótulos removidos.
+            ao_aplicar (callable, opcional): Chamada com os IDs de cada
+                                             chamada bem-sucedida.
 
-    def __get_content(self, id_msg):
+        Returns:
+            int: Quantas mensagens foram alteradas.
         """
-        Busca o conteúdo completo de uma mensagem na API do Gmail.
+        corpo = {}
+        if adicionar:
+            corpo['addLabelIds'] = list(adicionar)
+        if remover:
+            corpo['removeLabelIds'] = list(remover)
+        if not corpo:
+            return 0
+        alteradas = 0
+        for inicio in range(0, len(ids), LIMITE_MODIFICACAO):
+            parte = ids[inicio:inicio + LIMITE_MODIFICACAO]
+            self.__executa(self.__service.users().messages().batchModify(userId=self.__id_usuario,
+                                                                         body={'ids': parte, **corpo}))
+            alteradas += len(parte)
+            if ao_aplicar is not None:
+                ao_aplicar(parte)
+        return alteradas
+
+    def contagem(self, query, exata=False):
+        """
+        Conta as mensagens de uma busca sem baixá-las.
+
+        Uma query formada só por um rótulo ('label:Trabalho', 'in:inbox',
+        'is:unread') é respondida pelos contadores do rótulo (labels.get),
+        que são exatos e incluem as não lidas. As demais usam a estimativa
+        da API (resultSizeEstimate), com uma única chamada, ou, se `exata`,
+        percorrem as páginas de IDs (500 por chamada messages.list), sem
+        nenhuma messages.get.
+
+        Args:
+            query (str): A string de busca.
+            exata (bool, opcional): Conta as mensagens uma a uma em vez de
+                                    usar a estimativa. O padrão é False.
+
+        Returns:
+            dict: query, total, metodo ('rotulo', 'estimativa' ou 'exata')
+                  e, com 'rotulo', nao_lidas, conversas e conversas_nao_lidas.
+        """
+        casou = _QUERY_ROTULO.match(query.strip())
+        if casou:
+            try:
+                id_rotulo = self.id_rotulo(casou.group(1) or casou.group(2))
+            except ValueError:
+                # Nome com espaços escrito com '-' na query, por exemplo: a
+                # busca comum sabe interpretá-lo
+                id_rotulo = None
+            if id_rotulo is not None:
+                return {'query': query, 'metodo': 'rotulo', **self.contadores_rotulo(id_rotulo)}
+
+        if not exata:
+            resposta = self.__executa(self.__service.users().messages().list(
+                userId=self.__id_usuario, q=query, **self.__parametros('estimativa')), 'estimativa')
+            return {'query': query, 'metodo': 'estimativa', 'total': resposta.get('resultSizeEstimate', 0)}
+
+        total = 0
+        for _, mensagens in self.__pagina(self.__service.users().messages, 'messages', 'contagem', query):
+            total += len(mensagens)
+        return {'query': query, 'metodo': 'exata', 'total': total}
+
+    def contadores_rotulo(self, id_rotulo):
+        """
+        Lê os contadores de um rótulo com uma chamada labels.get.
+
+        Args:
+            id_rotulo (str): O ID do rótulo (ver `id_rotulo`).
+
+        Returns:
+            dict: rotulo (nome), total e nao_lidas (mensagens), conversas e
+                  conversas_nao_lidas.
+        """
+        resposta = self.__executa(self.__service.users().labels().get(userId=self.__id_usuario, id=id_rotulo,
+                                                                      **self.__parametros('contadores_rotulo')),
+                                  'contadores_rotulo')
+        return {'rotulo': resposta.get('name', id_rotulo), 'total': resposta.get('messagesTotal', 0),
+                'nao_lidas': resposta.get('messagesUnread', 0), 'conversas': resposta.get('threadsTotal', 0),
+                'conversas_nao_lidas': resposta.get('threadsUnread', 0)}
+
+    def obtem_perfil(self):
+        """
+        Lê o perfil da conta com uma chamada getProfile.
+
+        Returns:
+            dict: emailAddress, messagesTotal e historyId (o ponto atual do
+                  histórico da caixa, ver `historico`).
+        """
+        return self.__executa(self.__service.users().getProfile(userId=self.__id_usuario,
+                                                                **self.__parametros('perfil')), 'perfil')
+
+    def historico(self, history_id):
+        """
+        Lê as alterações da caixa desde `history_id` (history.list): as
+        mensagens novas e apagadas e os rótulos adicionados e removidos.
+        Custa 2 unidades de cota por página, em vez de uma nova busca.
+
+        Args:
+            history_id (str): O historyId de `obtem_perfil` ou da chamada anterior.
+
+        Returns:
+            tuple[str, list[dict]]: O novo historyId e os registros do
+                                    histórico, do mais antigo ao mais novo.
+
+        Raises:
+            Exception: O erro da API; HTTP 404 indica que `history_id` é
+                       antigo demais e a caixa precisa ser lida de novo.
+        """
+        registros, page_token = [], None
+        parametros = self.__parametros('historico')
+        while True:
+            pagina = {'pageToken': page_token} if page_token else {}
+            resposta = self.__executa(self.__service.users().history().list(
+                userId=self.__id_usuario, startHistoryId=history_id, **pagina, **parametros), 'historico')
+            registros.extend(resposta.get('history', []))
+            page_token = resposta.get('nextPageToken')
+            if not page_token:
+                return resposta.get('historyId', history_id), registros
+
+    def obtem_email(self, id_msg):
+        """
+        Busca uma mensagem completa, com o motor configurado, e a converte
+        em Email.
 
         Args:
             id_msg (str): O ID da mensagem.
 
         Returns:
-            dict: O objeto de mensagem completo da API, ou None em caso de erro.
+            Email: O e-mail, ou None se a mensagem não pôde ser obtida.
+        """
+        bruto = self.__motor == 'bruto'
+        mensagem = self.__get_content(id_msg, 'bruta' if bruto else 'completa')
+        if not mensagem:
+            return None
+        return self.cria_email_bruto(mensagem) if bruto else self.cria_email(mensagem)
+
+    def cria_email(self, mensagem):
+        """
+        Converte um recurso Message da API (formato 'full' ou 'metadata')
+        em um objeto Email.
+
+        Args:
+            mensagem (dict): A mensagem retornada por messages.get.
+
+        Returns:
+            Email: O e-mail com cabeçalhos, corpo e anexos extraídos.
+        """
+        # Dicionário para armazenar os dados do e-mail.
+        email_data = {
+            'id': mensagem.get('id', ''), 'assunto': '', 'remetente': '', 'destinatario': '', 'copia': '',
+            'data': '', 'corpo_texto': '', 'corpo_html': '', 'anexos': [],
+            'rotulos': mensagem.get('labelIds', []), 'conta': self.__conta
+        }
+
+        # Se houver um payload (conteúdo) na mensagem.
+        if 'payload' in mensagem:
+            payload = mensagem['payload']
+
+            # Extrai os cabeçalhos. A máscara de campos omite as chaves
+            # vazias, então nenhuma delas é garantida na resposta.
+            for cabecalho in payload.get('headers', []):
+                name = cabecalho.get('name', '').lower()
+                valor = cabecalho.get('value', '')
+                # Popula o dicionário com os dados dos cabeçalhos.
+                if name == 'subject':
+                    email_data['assunto'] = valor
+                elif name == 'from':
+                    email_data['remetente'] = valor
+                elif name == 'to':
+                    email_data['destinatario'] = valor
+                elif name == 'cc':
+                    email_data['copia'] = valor
+                elif name == 'date':
+                    email_data['data'] = valor
+
+            # Extrai as partes do corpo da mensagem. Uma mensagem de parte
+            # única traz o corpo no próprio payload.
+            if 'parts' in payload:
+                self.__get_parts(payload.get('parts'), email_data)
+            elif payload.get('body', {}).get('data'):
+                self.__get_parts([payload], email_data)
+
+        # Cria um novo objeto Email com os dados extraídos.
+        return Email(email_data)
+
+    @perfil.cronometra
+    def cria_email_bruto(self, mensagem):
+        """
+        Converte uma mensagem no formato 'raw' em um objeto Email,
+        analisando o MIME localmente com o pacote `email` (`mime_local`).
+
+        Args:
+            mensagem (dict): A mensagem retornada por messages.get com a
+                             projeção 'bruta'.
+
+        Returns:
+            Email: O e-mail com cabeçalhos, corpos e anexos extraídos.
+        """
+        dados = mime_local.analisa(base64.urlsafe_b64decode(mensagem.get('raw', '')), mensagem.get('id'))
+        dados['rotulos'] = mensagem.get('labelIds', [])
+        dados['conta'] = self.__conta
+        return Email(dados)
+
+    def obtem_mensagem(self, id_msg, visao='completa'):
+        """
+        Busca uma mensagem na API do Gmail.
+
+        Args:
+            id_msg (str): O ID da mensagem.
+            visao (str, opcional): A projeção usada ('completa', 'cabecalhos'
+                                   ou 'bruta').
+
+        Returns:
+            dict: O objeto de mensagem da API, ou None em caso de erro.
+        """
+        return self.__get_content(id_msg, visao)
+
+    def __get_content(self, id_msg, visao='completa'):
+        """
+        Busca o conteúdo de uma mensagem na API do Gmail.
+
+        Args:
+            id_msg (str): O ID da mensagem.
+            visao (str, opcional): A projeção usada (uma chave de PROJECOES).
+
+        Returns:
+            dict: O objeto de mensagem da API, ou None em caso de erro.
         """
         try:
-            # Usa o serviço da API do Gmail para obter a mensagem com formato 'full'.
-            mensagem = self.__service.users().messages().get(userId=self.__id_usuario, id=id_msg,
-                                                             format='full').execute()
+            # Usa o serviço da API do Gmail para obter a mensagem no formato da projeção.
+            mensagem = self.__executa(self.__service.users().messages().get(userId=self.__id_usuario, id=id_msg,
+                                                                            **self.__parametros(visao)), visao)
             return mensagem
         except Exception as error:
-            print(f'\aError ao obter a mensagem: {error}')
+            print(f'\aError ao obter a mensagem {id_msg}: {error}')
             return None
 
+    def __executa(self, requisicao, rotulo=None, idempotente=True):
+        """
+        Executa uma requisição da API registrando-a na instrumentação.
+
+        A operação é nomeada pelo método da API (por exemplo,
+        'gmail.messages.get'); latência, bytes, novas tentativas e erros
+        são acumulados em `instrumentacao.registro`. Antes de cada
+        tentativa, a cota do método é reservada no limitador, que também é
+        avisado das respostas de limite de taxa (429). Os erros passageiros
+        são repetidos pela política de repetição.
+
+        Args:
+            requisicao (HttpRequest): A requisição montada pelo serviço.
+            rotulo (str, opcional): Caso de uso usado nas medidas do modelo
+                                    (por exemplo, a projeção). O padrão é
+                                    o nome da operação.
+            idempotente (bool, opcional): Se False, os erros temporários não
+                                          são repetidos. O padrão é True.
+
+        Returns:
+            dict: A resposta da API.
+        """
+        metodo = (getattr(requisicao, 'methodId', None) or 'desconhecido').removeprefix('gmail.users.')
+        nome = 'gmail.' + metodo
+        limitador = self.__limitador
+
+        def tentativa():
+            if limitador is not None:
+                limitador.aguarda(metodo)
+            try:
+                resposta = requisicao.execute()
+            except Exception as error:
+                if limitador is not None and e_limite_taxa(error):
+                    limitador.registra_limite()
+                raise
+            if limitador is not None:
+                limitador.registra_sucesso()
+            return resposta
+
+        medindo = self.__modelo.medindo(rotulo or nome) if self.__modelo else nullcontext()
+        with instrumentacao.mede(nome) as medida, medindo:
+            return self.__repeticao.executa(tentativa, medida, idempotente)
+
+    def __parametros(self, visao):
+        """
+        Retorna os parâmetros da chamada para a projeção `visao`, sem o
+        `fields` quando as projeções estão desativadas.
+        """
+        parametros = dict(PROJECOES[visao])
+        if not self.__projecoes:
+            parametros.pop('fields', None)
+        return parametros
+
+    @perfil.cronometra
     def __get_parts(self, parts, email_data):
         """
         Analisa as partes de uma mensagem MIME e extrai dados relevantes.
 
         Este método percorre recursivamente as partes do e-mail para encontrar
-        o corpo do texto (HTML ou texto simples) e os anexos.
+        o corpo do texto simples, o corpo HTML e os anexos. São anexos as
+        partes com Content-Disposition 'attachment' e as partes com nome de
+        arquivo que não são texto nem HTML; as imagens embutidas no HTML
+        (sem nome) não são. Vale o primeiro corpo de cada tipo.
 
         Args:
             parts (list): A lista de partes da mensagem.
@@ -650,34 +1763,49 @@ class EmailClient:
             return
 
         for part in parts:
-            mime_type = part.get('mimeType')
-            data = part['body'].get('data')
+            mime_type = part.get('mimeType', '')
+            body = part.get('body', {})
+            data = body.get('data')
 
             # Se a parte for multipart, chama a função recursivamente.
-            if 'multipart' in mime_type:
+            if mime_type.startswith('multipart/'):
                 self.__get_parts(part.get('parts'), email_data)
-            # Se for HTML, decodifica e salva.
-            elif mime_type == 'text/html' and data:
-                email_data['corpo_html'] = self.__decode_base64(data)
-            # Se for texto, salva se o corpo HTML ainda não foi preenchido.
-            elif mime_type == 'text/plain' and data:
-                if not email_data['corpo_html']:
-                    email_data['corpo_html'] = self.__decode_base64(data)
+                continue
+
+            cabecalhos = {h.get('name', '').lower(): h.get('value', '') for h in part.get('headers', [])}
+            nome = part.get('filename', '')
+            disposicao = cabecalhos.get('content-disposition', '').split(';')[0].strip().lower()
             # Se a parte for um anexo, extrai os dados do anexo e o adiciona à lista.
-            elif 'attachment' in part.get('filename', '').lower():
+            if disposicao == 'attachment' or (nome and mime_type not in ('text/plain', 'text/html')):
                 file_data = {
-                    'filename': part.get('filename'),
+                    'filename': nome,
                     'mime_type': mime_type,
-                    'data': part['body'].get('data')
+                    'data': data,
+                    'tamanho': body.get('size', 0)
                 }
                 email_data['anexos'].append(file_data)
+            # Texto simples e HTML são guardados cada um no seu campo.
+            elif mime_type == 'text/plain' and data and not email_data['corpo_texto']:
+                email_data['corpo_texto'] = self.__decode_base64(data, self.__charset(cabecalhos))
+            elif mime_type == 'text/html' and data and not email_data['corpo_html']:
+                email_data['corpo_html'] = self.__decode_base64(data, self.__charset(cabecalhos))
+
+    @staticmethod
+    def __charset(cabecalhos):
+        """
+        Retorna o charset declarado no Content-Type da parte, ou None.
+        """
+        casou = _CHARSET.search(cabecalhos.get('content-type', ''))
+        return casou.group(1) if casou else None
 
-    def __decode_base64(self, data):
+    @perfil.cronometra
+    def __decode_base64(self, data, charset=None):
         """
-        Decodifica uma string de dados base64-urlsafe para UTF-8.
+        Decodifica uma string de dados base64-urlsafe para texto.
 
         Args:
             data (str): A string a ser decodificada.
+            charset (str, opcional): O charset declarado na parte.
 
         Returns:
             str: A string decodificada, ou uma string vazia se os dados
@@ -687,5 +1815,16 @@ class EmailClient:
         if not data:
             return ''
 
-        # Decodifica a string usando base64url e UTF-8.
-        return base64.urlsafe_b64decode(data).decode('utf-8')
+        # A API entrega o corpo no charset original. Sem charset declarado
+        # (ou com um inválido), tenta UTF-8 e depois o Windows-1252, que
+        # cobre o ISO-8859-1.
+        bruto = base64.urlsafe_b64decode(data)
+        if charset:
+            try:
+                return bruto.decode(charset)
+            except (LookupError, UnicodeDecodeError):
+                pass
+        try:
+            return bruto.decode('utf-8')
+        except UnicodeDecodeError:
+            return bruto.decode('cp1252', errors='replace')
@@ -0,0 +1,163 @@
+import os
+import re
+import time
+
+import instrumentacao
+from analise_paralela import AnalisadorParalelo
+from data_base import ErroBanco
+
+# Linhas '>From ', '>>From ', ... do corpo de um mbox perdem um '>' (mboxrd)
+_LINHA_FROM = re.compile(rb'^>(>*From )')
+
+
+def le_mensagens(caminho):
+    """
+    Lê as mensagens de um arquivo mbox, de um arquivo .eml ou de um
+    diretório com arquivos .eml (recursivamente), uma por vez.
+
+    O mbox é lido linha a linha: uma mensagem começa em uma linha 'From '
+    no início do arquivo ou depois de uma linha vazia.
+
+    Args:
+        caminho (str): O arquivo ou diretório.
+
+    Yields:
+        bytes: Cada mensagem original (RFC 822).
+    """
+    if os.path.isdir(caminho):
+        for raiz, diretorios, arquivos in os.walk(caminho):
+            diretorios.sort()
+            for nome in sorted(arquivos):
+                if nome.lower().endswith('.eml'):
+                    with open(os.path.join(raiz, nome), 'rb') as f:
+                        yield f.read()
+    elif caminho.lower().endswith('.eml'):
+        with open(caminho, 'rb') as f:
+            yield f.read()
+    else:
+        yield from _le_mbox(caminho)
+
+
+def _le_mbox(caminho):
+    with open(caminho, 'rb') as f:
+        linhas = []
+        separado = True
+        for linha in f:
+            if separado and linha.startswith(b'From '):
+                if linhas:
+                    yield _junta(linhas)
+                linhas = []
+                separado = False
+                continue
+            separado = linha in (b'\n', b'\r\n')
+            linhas.append(_LINHA_FROM.sub(rb'\1', linha))
+        if linhas:
+            yield _junta(linhas)
+
+
+def _junta(linhas):
+    # A linha vazia antes do próximo separador não faz parte da mensagem
+    if linhas[-1] in (b'\n', b'\r\n'):
+        linhas.pop()
+    return b''.join(linhas)
+
+
+class Importador:
+    """
+    Importa arquivos mbox e .eml para o armazenamento persistente do
+    Email_Cache, de onde podem ser buscados localmente (search= ... local= on).
+
+    As mensagens são lidas em fluxo, analisadas em paralelo pela mesma etapa
+    das buscas com o motor 'bruto' (`AnalisadorParalelo`, já que a análise
+    MIME é limitada pela CPU) e gravadas no banco em lotes. Enquanto um lote
+    é gravado, os seguintes já estão sendo analisados. Uma falha do banco
+    interrompe a importação e é informada no resumo.
+    """
+
+    def __init__(self, cache, processos=None, lote=500, progresso=None):
+        """
+        Args:
+            cache (Email_Cache): Cache com o banco configurado (set_data_base).
+            processos (int, opcional): Processos de análise. O padrão
+                                       (None ou 0) é o número de CPUs.
+            lote (int, opcional): Mensagens por gravação no banco. O padrão é 500.
+            progresso (callable, opcional): Chamada com o número de
+                                            mensagens lidas a cada lote.
+        """
+        self.__cache = cache
+        self.__processos = processos or os.cpu_count() or 1
+        self.__lote = max(1, lote)
+        self.__progresso = progresso
+
+    def importa(self, caminhos):
+        """
+        Importa as mensagens dos arquivos e diretórios informados.
+
+        Args:
+            caminhos (list[str]): Arquivos mbox/.eml ou diretórios de .eml.
+
+        Returns:
+            dict: Resumo com mensagens lidas, novas gravadas, falhas de
+                  análise, bytes lidos, duração e mensagens por segundo e,
+                  se o banco falhou, o erro e as mensagens não gravadas.
+
+        Raises:
+            FileNotFoundError: Se algum caminho não existir.
+        """
+        for caminho in caminhos:
+            if not os.path.exists(caminho):
+                raise FileNotFoundError(caminho)
+
+        resumo = {'mensagens': 0, 'novas': 0, 'falhas': 0, 'bytes': 0, 'processos': self.__processos}
+        inicio = time.perf_counter()
+
+        def brutas():
+            for caminho in caminhos:
+                for bruto in le_mensagens(caminho):
+                    resumo['bytes'] += len(bruto)
+                    yield bruto
+
+        # Lotes de análise pequenos, para repartir cada lote gravado entre os processos
+        analisador = AnalisadorParalelo(self.__processos, self.__lote // (self.__processos * 4))
+        analisadas = analisador.analisa_brutas(brutas())
+        try:
+            lote = []
+            for dados in analisadas:
+                lote.append(dados)
+                if len(lote) >= self.__lote:
+                    if not self.__grava(lote, resumo):
+                        break
+                    lote = []
+            else:
+                self.__grava(lote, resumo)
+        finally:
+            analisadas.close()
+        resumo['segundos'] = round(time.perf_counter() - inicio, 2)
+        resumo['mensagens_por_s'] = round(resumo['mensagens'] / resumo['segundos'], 1) if resumo['segundos'] else None
+        return resumo
+
+    def __grava(self, analisadas, resumo):
+        """
+        Grava um lote analisado e atualiza o resumo.
+
+        Returns:
+            bool: Se a importação pode continuar (o banco não falhou).
+        """
+        dados = []
+        for mensagem in analisadas:
+            resumo['mensagens'] += 1
+            if mensagem is None:
+                resumo['falhas'] += 1
+            else:
+                dados.append(mensagem)
+        try:
+            with instrumentacao.mede('importa.lote'):
+                resumo['novas'] += self.__cache.guarda(dados)
+        except ErroBanco as error:
+            resumo['erro'] = str(error)
+            resumo['nao_gravadas'] = len(dados)
+            return False
+        finally:
+            if self.__progresso:
+                self.__progresso(resumo['mensagens'])
+        return True
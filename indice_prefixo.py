@@ -0,0 +1,168 @@
+import heapq
+import math
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+
+# Maior caractere Unicode, usado para delimitar o fim de um intervalo de prefixo
+_FIM = '\U0010ffff'
+
+
+class IndicePrefixo:
+    """
+    Índice em memória para busca por prefixo (autocompletar).
+
+    Mantém as chaves em uma lista ordenada e usa `bisect` para localizar o
+    intervalo de chaves que começam com um prefixo em O(log n). A comparação
+    ignora maiúsculas/minúsculas, como o `LIKE` do MySQL, mas as sugestões
+    são devolvidas com a grafia original.
+
+    A classe é segura para uso por várias threads.
+    """
+
+    def __init__(self, itens=None):
+        """
+        Inicializa o índice.
+
+        Args:
+            itens (iterable[str], opcional): Chaves iniciais.
+        """
+        self.__trava = threading.Lock()
+        # Chaves normalizadas (minúsculas), sempre ordenadas
+        self.__chaves = []
+        # Chave normalizada -> grafia original
+        self.__originais = {}
+        if itens:
+            self.adiciona(itens)
+
+    def __len__(self):
+        return len(self.__chaves)
+
+    def adiciona(self, itens):
+        """
+        Insere novas chaves no índice, ignorando as que já existem.
+
+        Lotes grandes são mesclados com uma nova ordenação; poucos itens são
+        inseridos diretamente na posição correta.
+
+        Args:
+            itens (iterable[str]): Chaves a serem inseridas.
+        """
+        novos = {}
+        for item in itens:
+            if item:
+                novos.setdefault(item.lower(), item)
+
+        with self.__trava:
+            novos = {k: v for k, v in novos.items() if k not in self.__originais}
+            if not novos:
+                return
+            self.__originais.update(novos)
+            if len(novos) > 32:
+                self.__chaves = sorted(self.__chaves + list(novos))
+            else:
+                for chave in novos:
+                    insort(self.__chaves, chave)
+
+    def busca(self, prefixo, limite=50):
+        """
+        Retorna as chaves que começam com `prefixo`, em ordem alfabética.
+
+        Args:
+            prefixo (str): O texto digitado.
+            limite (int, opcional): Número máximo de sugestões. O padrão é 50.
+
+        Returns:
+            list[str]: As sugestões encontradas.
+        """
+        prefixo = prefixo.lower()
+        with self.__trava:
+            chaves = self.__chaves
+            inicio = bisect_left(chaves, prefixo)
+            fim = bisect_right(chaves, prefixo + _FIM, inicio)
+            return [self.__originais[c] for c in self._seleciona(chaves, inicio, fim, limite)]
+
+    def _seleciona(self, chaves, inicio, fim, limite):
+        """
+        Escolhe, dentro do intervalo `chaves[inicio:fim]`, quais chaves
+        normalizadas serão sugeridas. Subclasses podem alterar a ordenação.
+        """
+        return chaves[inicio:min(fim, inicio + limite)]
+
+
+class IndiceFrecencia(IndicePrefixo):
+    """
+    Índice de prefixo que ordena as sugestões por frecência (frequência de
+    uso combinada com a data do último uso).
+
+    A frecência de uma chave é `usos * 2 ** ((ultimo_uso - agora) / meia_vida)`,
+    ou seja, o peso de um contato cai pela metade a cada `meia_vida` sem uso.
+    Como `agora` é o mesmo para todas as chaves, a ordem é dada pela
+    pontuação `log2(usos) + ultimo_uso / meia_vida`, que não precisa ser
+    recalculada com o passar do tempo.
+    """
+
+    def __init__(self, itens=None, meia_vida_dias=30.0):
+        """
+        Inicializa o índice.
+
+        Args:
+            itens (iterable[tuple], opcional): Tuplas (chave, usos, ultimo_uso),
+                                               com `ultimo_uso` em segundos
+                                               desde a época (ou None).
+            meia_vida_dias (float, opcional): Meia-vida da frecência, em dias.
+                                              O padrão é 30.
+        """
+        self.__meia_vida = meia_vida_dias * 86400
+        self.__trava_uso = threading.Lock()
+        # Chave normalizada -> [usos, ultimo_uso]
+        self.__usos = {}
+        # Chave normalizada -> pontuação de frecência
+        self.__pontos = {}
+        super().__init__()
+        if itens:
+            for chave, usos, ultimo_uso in itens:
+                if chave:
+                    self.__atualiza(chave.lower(), usos or 0, ultimo_uso or 0.0)
+            self.adiciona(chave for chave, _, _ in itens)
+
+    def registra_uso(self, usos, quando=None):
+        """
+        Soma usos às chaves informadas, inserindo as que ainda não existem.
+
+        Args:
+            usos (dict[str, int]): Chave -> número de novos usos.
+            quando (float | dict[str, float], opcional): Instante do uso em
+                                      segundos desde a época, para todas as
+                                      chaves ou por chave. O padrão (e o
+                                      das chaves ausentes) é agora. O
+                                      último uso de uma chave nunca recua.
+        """
+        agora = time.time()
+        instantes = quando if isinstance(quando, dict) else {}
+        quando = agora if quando is None or isinstance(quando, dict) else quando
+        with self.__trava_uso:
+            for chave, n in usos.items():
+                anterior, ultimo_uso = self.__usos.get(chave.lower(), (0, 0.0))
+                instante = instantes.get(chave, quando)
+                self.__atualiza(chave.lower(), anterior + n, max(ultimo_uso, instante))
+        self.adiciona(usos)
+
+    def __atualiza(self, chave, usos, ultimo_uso):
+        """
+        Guarda o estado de uso de uma chave e recalcula sua pontuação.
+        """
+        self.__usos[chave] = (usos, ultimo_uso)
+        self.__pontos[chave] = math.log2(max(usos, 1)) + ultimo_uso / self.__meia_vida
+
+    def _seleciona(self, chaves, inicio, fim, limite):
+        """
+        Retorna as `limite` chaves de maior frecência no intervalo.
+        """
+        if fim - inicio <= limite:
+            intervalo = chaves[inicio:fim]
+        else:
+            intervalo = (chaves[i] for i in range(inicio, fim))
+        pontos = self.__pontos
+        return heapq.nlargest(limite, intervalo, key=lambda c: pontos.get(c, 0.0))
+
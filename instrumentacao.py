@@ -0,0 +1,217 @@
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# Limites superiores, em milissegundos, das faixas do histograma de latência
+FAIXAS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, math.inf)
+
+
+class Medida:
+    """
+    Dados de uma execução em andamento, preenchidos durante a operação.
+    """
+
+    def __init__(self):
+        self.bytes = 0
+        self.requisicoes = 0
+        self.tentativas = 0
+
+
+class _Operacao:
+    """
+    Acumula as execuções de uma operação.
+    """
+
+    def __init__(self):
+        self.chamadas = 0
+        self.erros = 0
+        self.tentativas = 0
+        self.bytes = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.histograma = [0] * len(FAIXAS_MS)
+
+    def registra(self, duracao_ms, medida, erro):
+        self.chamadas += 1
+        self.erros += erro
+        # Requisições HTTP além da primeira são novas tentativas da biblioteca
+        self.tentativas += medida.tentativas + max(medida.requisicoes - 1, 0)
+        self.bytes += medida.bytes
+        self.total_ms += duracao_ms
+        self.max_ms = max(self.max_ms, duracao_ms)
+        for i, limite in enumerate(FAIXAS_MS):
+            if duracao_ms <= limite:
+                self.histograma[i] += 1
+                break
+
+    def percentil(self, fracao):
+        """
+        Estima o percentil pelo limite superior da faixa do histograma.
+        """
+        alvo = math.ceil(self.chamadas * fracao)
+        acumulado = 0
+        for limite, n in zip(FAIXAS_MS, self.histograma):
+            acumulado += n
+            if acumulado >= alvo:
+                return self.max_ms if limite == math.inf else min(limite, self.max_ms)
+        return self.max_ms
+
+    def resumo(self):
+        return {
+            'chamadas': self.chamadas,
+            'erros': self.erros,
+            'tentativas': self.tentativas,
+            'bytes': self.bytes,
+            'media_ms': round(self.total_ms / self.chamadas, 3) if self.chamadas else 0.0,
+            'p50_ms': round(self.percentil(0.50), 3),
+            'p95_ms': round(self.percentil(0.95), 3),
+            'max_ms': round(self.max_ms, 3),
+            'histograma_ms': {('inf' if limite == math.inf else str(limite)): n
+                              for limite, n in zip(FAIXAS_MS, self.histograma) if n},
+        }
+
+
+class Registro:
+    """
+    Registro das operações instrumentadas (chamadas à API e consultas ao banco).
+
+    Cada operação é medida com `mede(nome)`; o registro acumula por nome o
+    número de chamadas, erros, novas tentativas, bytes e um histograma de
+    latência. Outros componentes (pools, transporte, credenciais) podem
+    expor seus próprios resumos com `registra_fonte`.
+    """
+
+    def __init__(self):
+        self.__trava = threading.Lock()
+        self.__operacoes = {}
+        self.__fontes = {}
+        self.__atual = threading.local()
+
+    @contextmanager
+    def mede(self, nome):
+        """
+        Mede a execução do bloco como uma chamada da operação `nome`.
+
+        Yields:
+            Medida: Permite ao bloco informar bytes e novas tentativas.
+        """
+        medida = Medida()
+        pilha = self.__pilha()
+        pilha.append(medida)
+        erro = False
+        inicio = time.perf_counter()
+        try:
+            yield medida
+        except BaseException:
+            erro = True
+            raise
+        finally:
+            pilha.pop()
+            self.registra(nome, (time.perf_counter() - inicio) * 1000, medida, erro)
+
+    def registra(self, nome, duracao_ms, medida=None, erro=False):
+        """
+        Registra uma chamada da operação `nome` já medida.
+
+        Args:
+            nome (str): Nome da operação.
+            duracao_ms (float): Duração em milissegundos.
+            medida (Medida, opcional): Bytes e tentativas da chamada.
+            erro (bool, opcional): Se a chamada terminou com erro.
+        """
+        with self.__trava:
+            operacao = self.__operacoes.get(nome)
+            if operacao is None:
+                operacao = self.__operacoes[nome] = _Operacao()
+            operacao.registra(duracao_ms, medida or Medida(), erro)
+
+    def anota_requisicao(self, tamanho):
+        """
+        Soma uma requisição HTTP de `tamanho` bytes à operação em andamento
+        na thread atual, se houver (usada pelo transporte).
+        """
+        pilha = self.__pilha()
+        if pilha:
+            pilha[-1].requisicoes += 1
+            pilha[-1].bytes += tamanho
+
+    def registra_fonte(self, nome, funcao):
+        """
+        Inclui no resumo o dicionário retornado por `funcao()`.
+
+        Args:
+            nome (str): Nome da seção no resumo.
+            funcao (callable): Função sem argumentos que retorna um dict.
+        """
+        with self.__trava:
+            self.__fontes[nome] = funcao
+
+    def zera(self):
+        """
+        Descarta as medidas acumuladas (as fontes são mantidas).
+        """
+        with self.__trava:
+            self.__operacoes.clear()
+
+    def resumo(self):
+        """
+        Returns:
+            dict: {'operacoes': {nome: resumo}, 'fontes': {nome: dict}}
+        """
+        with self.__trava:
+            operacoes = {nome: op.resumo() for nome, op in sorted(self.__operacoes.items())}
+            fontes = dict(self.__fontes)
+        resumo_fontes = {}
+        for nome, funcao in fontes.items():
+            try:
+                resumo_fontes[nome] = funcao()
+            except Exception as error:
+                resumo_fontes[nome] = {'erro': str(error)}
+        return {'operacoes': operacoes, 'fontes': resumo_fontes}
+
+    def texto(self):
+        """
+        Returns:
+            str: O resumo formatado em tabela para o console.
+        """
+        resumo = self.resumo()
+        linhas = [f'{"operação":<28}{"n":>7}{"erros":>7}{"tent.":>7}{"média ms":>10}'
+                  f'{"p50 ms":>9}{"p95 ms":>9}{"máx ms":>9}{"KiB":>10}']
+        for nome, op in resumo['operacoes'].items():
+            linhas.append(f'{nome:<28}{op["chamadas"]:>7}{op["erros"]:>7}{op["tentativas"]:>7}'
+                          f'{op["media_ms"]:>10.1f}{op["p50_ms"]:>9.1f}{op["p95_ms"]:>9.1f}'
+                          f'{op["max_ms"]:>9.1f}{op["bytes"] / 1024:>10.1f}')
+        if not resumo['operacoes']:
+            linhas.append('nenhuma operação registrada')
+        for nome, dados in resumo['fontes'].items():
+            linhas.append(f'\n{nome}: {json.dumps(dados, ensure_ascii=False)}')
+        return '\n'.join(linhas)
+
+    def salva(self, caminho):
+        """
+        Grava o resumo em JSON.
+
+        Args:
+            caminho (str): Arquivo de destino.
+        """
+        with open(caminho, 'w', encoding='utf-8') as f:
+            json.dump(self.resumo(), f, indent=2, ensure_ascii=False)
+
+    def __pilha(self):
+        pilha = getattr(self.__atual, 'pilha', None)
+        if pilha is None:
+            pilha = self.__atual.pilha = []
+        return pilha
+
+
+# Registro global usado pelo cliente do Gmail, pelo banco e pelo comando stats=
+registro = Registro()
+
+
+def mede(nome):
+    """
+    Atalho para `registro.mede(nome)`.
+    """
+    return registro.mede(nome)
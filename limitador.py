@@ -0,0 +1,189 @@
+import collections
+import threading
+import time
+
+import instrumentacao
+
+# Unidades de cota cobradas por método da API do Gmail (por usuário). Em uma
+# requisição em lote, cada requisição interna é cobrada pelo seu método.
+CUSTOS = {
+    'messages.list': 5,
+    'messages.get': 5,
+    'messages.send': 100,
+    'messages.modify': 5,
+    'messages.batchModify': 50,
+    'messages.attachments.get': 5,
+    'history.list': 2,
+    'threads.list': 10,
+    'threads.get': 10,
+    'labels.list': 1,
+    'labels.get': 1,
+    'getProfile': 1,
+}
+
+# Custo dos métodos ausentes da tabela
+CUSTO_PADRAO = 5
+
+# Janela, em segundos, usada no cálculo da utilização
+_JANELA_S = 10.0
+
+# Respostas 429 recebidas até este tempo, em segundos, depois de uma redução
+# da taxa são consequência do mesmo excesso e não a reduzem de novo
+_INTERVALO_REDUCAO_S = 1.0
+
+
+def e_limite_taxa(error):
+    """
+    Indica se um erro da API é de limite de taxa: HTTP 429 ou HTTP 403 com
+    motivo rateLimitExceeded/userRateLimitExceeded.
+
+    Args:
+        error (Exception): O erro lançado por `execute()`.
+
+    Returns:
+        bool: True se o erro indica que a cota foi excedida.
+    """
+    status = getattr(getattr(error, 'resp', None), 'status', None)
+    try:
+        status = int(status)
+    except (TypeError, ValueError):
+        return False
+    return status == 429 or (status == 403 and 'ratelimitexceeded' in str(error).lower())
+
+
+class LimitadorCota:
+    """
+    Limita as chamadas à API do Gmail à cota de unidades por segundo do
+    usuário, com um balde de fichas compartilhado por todas as threads.
+
+    Cada chamada reserva o custo do seu método e, se o saldo ficar negativo,
+    espera o tempo necessário para repô-lo. Como o saldo da reserva já é
+    descontado, chamadas simultâneas formam uma fila e as rajadas são
+    espalhadas no tempo em vez de chegarem juntas à API.
+
+    A taxa se adapta como no controle de congestionamento do TCP (AIMD): cai
+    pela metade a cada resposta 429 e volta a subir aos poucos a cada
+    chamada bem-sucedida, até o máximo configurado.
+    """
+
+    def __init__(self, unidades_por_s=250.0, rajada=None):
+        """
+        Args:
+            unidades_por_s (float, opcional): Cota máxima, em unidades por
+                                              segundo. O padrão é 250, a
+                                              cota por usuário do Gmail.
+            rajada (float, opcional): Unidades que podem ser usadas de uma
+                                      vez, com o balde cheio. O padrão é um
+                                      segundo de cota.
+        """
+        self.__maximo = float(unidades_por_s)
+        self.__taxa = self.__maximo
+        self.__minimo = self.__maximo / 16
+        # Recupera a taxa máxima depois de uns 500 sucessos
+        self.__aumento = self.__maximo / 500
+        self.__capacidade = float(rajada or unidades_por_s)
+        self.__saldo = self.__capacidade
+        self.__atualizado = time.monotonic()
+        self.__trava = threading.Lock()
+        self.__recentes = collections.deque()
+        self.__unidades = 0
+        self.__requisicoes = 0
+        self.__esperas = 0
+        self.__espera_total = 0.0
+        self.__limites = 0
+        self.__ultima_reducao = float('-inf')
+
+    @staticmethod
+    def custo(metodo):
+        """
+        Retorna o custo, em unidades, de um método (por exemplo, 'messages.get').
+        """
+        return CUSTOS.get(metodo, CUSTO_PADRAO)
+
+    def aguarda(self, metodo, quantidade=1):
+        """
+        Reserva a cota de `quantidade` chamadas de `metodo`, esperando se
+        necessário.
+
+        Args:
+            metodo (str): O método da API, sem o prefixo 'gmail.users.'.
+            quantidade (int, opcional): Número de chamadas (por exemplo, as
+                                        requisições de um lote). O padrão é 1.
+
+        Returns:
+            float: O tempo esperado, em segundos.
+        """
+        custo = self.custo(metodo) * quantidade
+        with self.__trava:
+            agora = self.__repoe()
+            self.__saldo -= custo
+            espera = max(0.0, -self.__saldo / self.__taxa)
+            self.__unidades += custo
+            self.__requisicoes += quantidade
+            self.__recentes.append((agora + espera, custo))
+            if espera:
+                self.__esperas += 1
+                self.__espera_total += espera
+        if espera:
+            instrumentacao.registro.registra('cota.espera', espera * 1000)
+            time.sleep(espera)
+        return espera
+
+    def registra_sucesso(self):
+        """
+        Aumenta a taxa (aumento aditivo) após uma chamada bem-sucedida.
+        """
+        with self.__trava:
+            if self.__taxa < self.__maximo:
+                self.__repoe()
+                self.__taxa = min(self.__maximo, self.__taxa + self.__aumento)
+
+    def registra_limite(self):
+        """
+        Reduz a taxa pela metade (redução multiplicativa) após uma resposta
+        de limite de taxa e esvazia o balde, fazendo as próximas chamadas
+        esperarem. As chamadas simultâneas que também receberem 429 logo em
+        seguida não reduzem a taxa outra vez.
+        """
+        with self.__trava:
+            agora = self.__repoe()
+            self.__saldo = min(self.__saldo, 0.0)
+            self.__limites += 1
+            if agora - self.__ultima_reducao >= _INTERVALO_REDUCAO_S:
+                self.__taxa = max(self.__minimo, self.__taxa / 2)
+                self.__ultima_reducao = agora
+
+    def estatisticas(self):
+        """
+        Returns:
+            dict: Taxa atual e máxima, utilização da taxa atual nos últimos
+                  segundos, unidades e requisições reservadas, esperas e
+                  respostas de limite de taxa recebidas.
+        """
+        with self.__trava:
+            self.__repoe()
+            usadas = sum(custo for _, custo in self.__recentes)
+            return {
+                'unidades_por_s': round(self.__taxa, 1),
+                'maximo': self.__maximo,
+                'utilizacao': round(usadas / (_JANELA_S * self.__taxa), 3),
+                'saldo': round(self.__saldo, 1),
+                'unidades': self.__unidades,
+                'requisicoes': self.__requisicoes,
+                'esperas': self.__esperas,
+                'espera_total_s': round(self.__espera_total, 3),
+                'limites_429': self.__limites,
+                'fila_s': round(max(0.0, -self.__saldo / self.__taxa), 3),
+            }
+
+    def __repoe(self):
+        """
+        Repõe o saldo pelo tempo decorrido e descarta as reservas fora da
+        janela de utilização. Chamado com a trava.
+        """
+        agora = time.monotonic()
+        self.__saldo = min(self.__capacidade, self.__saldo + (agora - self.__atualizado) * self.__taxa)
+        self.__atualizado = agora
+        while self.__recentes and self.__recentes[0][0] < agora - _JANELA_S:
+            self.__recentes.popleft()
+        return agora
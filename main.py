@@ -1,8 +1,25 @@
-import mysql.connector
+import time
 
-import aux
-import data_base
-import gmail_server
+# Marca o início o mais cedo possível para medir o tempo até o primeiro prompt
+_INICIO = time.perf_counter()
+
+import argparse  # noqa: E402
+import os  # noqa: E402
+import sys  # noqa: E402
+from concurrent.futures import ThreadPoolExecutor  # noqa: E402
+
+import aquecedor  # noqa: E402
+import aux  # noqa: E402
+import coletor_contatos  # noqa: E402
+import config  # noqa: E402
+import contas  # noqa: E402
+import data_base  # noqa: E402
+import exportacao  # noqa: E402
+import gmail_server  # noqa: E402
+import importador  # noqa: E402
+import instrumentacao  # noqa: E402
+import modo_lote  # noqa: E402
+import perfil  # noqa: E402
 
 
 def imprime_emails(buscados):
@@ -13,7 +30,7 @@ def imprime_emails(buscados):
     abra um e-mail específico ('show') ou retorne ao menu principal ('back').
 
     Args:
-        buscados (list): Uma lista de objetos de e-mail a serem exibidos.
+        buscados (list): Uma lista de objetos Email ou Conversa a serem exibidos.
     """
 
     pag_atual = 0
@@ -66,33 +83,451 @@ def imprime_emails(buscados):
                 # Converte o índice exibido para o índice real na lista 'buscados'
                 index = index - 1
                 if 0 <= index < len(buscados):
-                    cache.open_html(buscados[index])
+                    cache_conta = gerenciador.de(buscados[index]).cache
+                    with gerenciador.pausa():
+                        if isinstance(buscados[index], gmail_server.Conversa):
+                            cache_conta.open_conversa(buscados[index])
+                        else:
+                            cache_conta.open_html(buscados[index])
                 else:
                     print('\a\nIndex error\n')
+            elif comando in ACOES_EM_LOTE or comando in ('label', 'unlabel'):
+                with gerenciador.pausa():
+                    modifica(comando, exibir, buscados)
             elif comando == 'help':
                 entrada.ajuda()
             else:
                 print(f'\aError: <{comando}>')
 
 
+# Rótulos adicionados e removidos por cada ação em lote da lista de e-mails
+ACOES_EM_LOTE = {
+    'read': ((), ('UNREAD',)),
+    'unread': (('UNREAD',), ()),
+    'archive': ((), ('INBOX',)),
+}
+
+
+def modifica(comando, exibir, buscados):
+    """
+    Executa uma ação em lote (read=, unread=, archive=, label=, unlabel=)
+    sobre a página exibida, todos os resultados ou os índices informados.
+    As conversas são alteradas com todas as suas mensagens, e os e-mails de
+    cada conta, na sua própria conta.
+
+    Args:
+        comando (str): A ação.
+        exibir (list): Os e-mails (ou conversas) da página exibida.
+        buscados (list): Todos os resultados da busca.
+    """
+    alvo = entrada.alvo
+    if alvo == 'page':
+        escolhidos = exibir
+    elif alvo == 'all':
+        escolhidos = buscados
+    else:
+        try:
+            indices = [int(i) - 1 for i in alvo.split()]
+        except ValueError:
+            print(f'Error: {alvo} inválido')
+            return
+        if not all(0 <= i < len(buscados) for i in indices):
+            print('\a\nIndex error\n')
+            return
+        escolhidos = [buscados[i] for i in indices]
+
+    if comando not in ACOES_EM_LOTE and not entrada.rotulo:
+        print('\aRótulo nescesário')
+        return
+    por_conta = {}
+    for item in escolhidos:
+        emails = item.emails if isinstance(item, gmail_server.Conversa) else [item]
+        por_conta.setdefault(gerenciador.de(item).nome, []).extend(emails)
+
+    alteradas = 0
+    try:
+        for nome, emails in por_conta.items():
+            conta = gerenciador.conta(nome)
+            if comando in ACOES_EM_LOTE:
+                adicionar, remover = ACOES_EM_LOTE[comando]
+            else:
+                # Cada conta tem os seus IDs de rótulo
+                id_rotulo = conta.client.id_rotulo(entrada.rotulo)
+                adicionar, remover = ((id_rotulo,), ()) if comando == 'label' else ((), (id_rotulo,))
+            alteradas += conta.cache.modifica(emails, adicionar, remover)
+    except ValueError as error:
+        print(f'\aError: {error}')
+        return
+    except Exception as error:
+        print(f'\aError ao alterar os e-mails: {error}')
+        return
+    print(f'{alteradas} e-mails alterados')
+
+
+def conta(client, entrada):
+    """
+    Executa o comando count=.
+
+    Args:
+        client (EmailClient): Instância do cliente de e-mail.
+        entrada (Entrada): Entrada com a query e o modo (exact=).
+    """
+    if not entrada.query:
+        print('\aQuery nescesária')
+        return
+    try:
+        contagem = client.contagem(entrada.query, entrada.exata)
+    except Exception as error:
+        print(f'\aError ao contar: {error}')
+        return
+    if contagem['metodo'] == 'rotulo':
+        print(f'{contagem["rotulo"]}: {contagem["total"]} mensagens, {contagem["nao_lidas"]} não lidas '
+              f'({contagem["conversas"]} conversas, {contagem["conversas_nao_lidas"]} não lidas)')
+    elif contagem['metodo'] == 'estimativa':
+        print(f'cerca de {contagem["total"]} mensagens (estimativa; exact= on para o número exato)')
+    else:
+        print(f'{contagem["total"]} mensagens')
+
+
+def busca_contas(gerenciador_, query, limite, nomes, relatorio):
+    """
+    Executa search= em várias contas ao mesmo tempo (acc=).
+
+    Args:
+        gerenciador_ (GerenciadorContas): As contas abertas.
+        query (str): A string de busca.
+        limite (int): O número máximo de e-mails, no total.
+        nomes (list[str]): As contas, ou ['all'] para todas.
+        relatorio (RelatorioBusca): Recebe as mensagens perdidas e os erros.
+
+    Returns:
+        list | None: Os e-mails, mais novos primeiro, ou None se não houver.
+    """
+    try:
+        buscados = list(gerenciador_.busca(query, limite, None if 'all' in nomes else nomes, relatorio))
+    except ValueError as error:
+        print(f'\aError: {error}')
+        return None
+    if not buscados:
+        print('\aNenhum e-mail encontrado')
+        return None
+    return buscados
+
+
+def exporta(client, entrada):
+    """
+    Executa o comando export=, mostrando o progresso.
+
+    Args:
+        client (EmailClient): Instância do cliente de e-mail.
+        entrada (Entrada): Entrada com a query, o formato e o destino.
+    """
+    try:
+        limite = entrada.limite_exportacao
+        exportador = exportacao.Exportador(client, entrada.destino, entrada.formato,
+                                           config.get('http_pool_tamanho'),
+                                           lambda n: print(f'\r{n} mensagens exportadas', end='', flush=True))
+        resumo = exportador.exporta(entrada.query, limite, entrada.retoma)
+    except ValueError:
+        print('Error: limit= inválido')
+        return
+    except exportacao.ErroExportacao as error:
+        print(f'\aError: {error}')
+        return
+    except KeyboardInterrupt:
+        print('\nExportação interrompida; repita o comando com resume= on para continuar')
+        return
+    print(f'\r{resumo["exportados"]} mensagens exportadas para {resumo["destino"]} '
+          f'({resumo["bytes"] / 2 ** 20:.1f} MB em {resumo["segundos"]} s, {resumo["falhas"]} falhas)')
+
+
+def importa(cache, entrada):
+    """
+    Executa o comando import=, mostrando o progresso.
+
+    Args:
+        cache (Email_Cache): Cache que recebe as mensagens.
+        entrada (Entrada): Entrada com os arquivos a importar.
+    """
+    if not entrada.arquivos:
+        print('\aArquivo nescesário')
+        return
+    importacao = importador.Importador(cache, config.get('importa_processos'), config.get('importa_lote'),
+                                       lambda n: print(f'\r{n} mensagens lidas', end='', flush=True))
+    try:
+        resumo = importacao.importa(entrada.arquivos)
+    except OSError as error:
+        print(f'\aError: {error}')
+        return
+    print(f'\r{resumo["mensagens"]} mensagens lidas, {resumo["novas"]} novas, {resumo["falhas"]} com erro '
+          f'({resumo["mensagens_por_s"]} mensagens/s com {resumo["processos"]} processos)')
+    if 'erro' in resumo:
+        print(f'\aImportação interrompida: {resumo["nao_gravadas"]} mensagens não gravadas ({resumo["erro"]})')
+
+
+def le_argumentos():
+    """
+    Lê as opções de linha de comando.
+
+    Returns:
+        argparse.Namespace: As opções lidas.
+    """
+    parser = argparse.ArgumentParser(description='Cliente do Gmail para o console.')
+    parser.add_argument('--profile', metavar='ARQUIVO',
+                        help='grava em ARQUIVO um perfil cProfile da sessão (legível com pstats)')
+    parser.add_argument('--profile-comando', metavar='COMANDO',
+                        help='com --profile, perfila só as chamadas à API de COMANDO (ex.: search)')
+    parser.add_argument('--batch', metavar='ARQUIVO',
+                        help='executa os comandos de ARQUIVO (- para a entrada padrão) sem prompts e '
+                             'escreve os resultados em JSON Lines')
+    parser.add_argument('--jobs', type=int, metavar='N',
+                        help='com --batch, comandos executados ao mesmo tempo (padrão: lote_tarefas)')
+    parser.add_argument('--corpo', action='store_true',
+                        help='com --batch, inclui os corpos dos e-mails nos resultados de search=')
+    return parser.parse_args()
+
+
 def valida_data_base():
     """
-    Tenta se conectar ao banco de dados com a senha fornecida pelo usuário.
-    Continua pedindo a senha até que a conexão seja bem-sucedida.
+    Abre o banco de dados configurado. Se o backend exigir senha (MySQL),
+    continua pedindo a senha até que a conexão seja bem-sucedida.
+
+    Sem senha a pedir (SQLite), um erro ao abrir o banco encerra o
+    programa com a mensagem do erro.
 
     Returns:
         data_base.DataBase: Uma instância do banco de dados se a conexão
                             for bem-sucedida.
     """
+    if not data_base.requer_senha():
+        try:
+            return data_base.abre_data_base()
+        except data_base.ErroBanco as error:
+            # Não há o que tentar de novo
+            print(f'\nError: {error}')
+            sys.exit(1)
+
     while True:
         try:
             db_pass = aux.senha('\njoin@[db_passwd]~ ')
-            db_instance = data_base.DataBase(db_pass)
+            db_instance = data_base.abre_data_base(db_pass)
             return db_instance
-        except mysql.connector.Error as error:
+        except data_base.ErroBanco as error:
             print(f'\nError: {error}')
 
 
+def inicia_client(email, nome=None, opcoes=None):
+    """
+    Começa a autenticação e a construção do serviço do Gmail em uma thread,
+    para que aconteçam enquanto o usuário digita a senha e o login.
+
+    Somente credenciais salvas são usadas nesta etapa; se for preciso o
+    fluxo OAuth no navegador, ele é feito depois, em `obtem_client`.
+
+    Args:
+        email (gmail_server.Email): Objeto repassado ao EmailClient.
+        nome (str, opcional): Nome da conta (None com uma só conta).
+        opcoes (dict, opcional): Opções da conta (ver `contas.configuradas`).
+
+    Returns:
+        Future: O resultado futuro da criação do EmailClient.
+    """
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='gmail-init')
+    futuro = executor.submit(contas.cria_client, email, nome, opcoes, False)
+    executor.shutdown(wait=False)
+    return futuro
+
+
+def obtem_client(futuro, email, nome=None, opcoes=None):
+    """
+    Aguarda o EmailClient criado em segundo plano. Se a criação falhou (por
+    exemplo, sem token salvo), autentica em primeiro plano, podendo abrir o
+    navegador.
+
+    Args:
+        futuro (Future): Retornado por `inicia_client`.
+        email (gmail_server.Email): Objeto repassado ao EmailClient.
+        nome (str, opcional): Nome da conta (None com uma só conta).
+        opcoes (dict, opcional): Opções da conta (ver `contas.configuradas`).
+
+    Returns:
+        gmail_server.EmailClient: O cliente autenticado.
+    """
+    try:
+        return futuro.result()
+    except Exception:
+        if nome:
+            print(f'Autorize o acesso à conta {nome}')
+        return contas.cria_client(email, nome, opcoes)
+
+
+def registra_estatisticas(client, db_instance, salva=True):
+    """
+    Inclui os resumos do cliente e do banco no comando stats= e, se
+    'stats_arquivo' estiver configurado, grava tudo em JSON ao encerrar.
+    Com várias contas, as seções do cliente levam o nome da conta
+    (por exemplo, 'suporte.cota').
+
+    Args:
+        client (gmail_server.EmailClient): O cliente autenticado.
+        db_instance (data_base.DataBase): Instância do banco de dados.
+        salva (bool, opcional): Registra a gravação do arquivo (uma vez,
+                                na primeira conta). O padrão é True.
+    """
+    registro = instrumentacao.registro
+    prefixo = f'{client.conta}.' if client.conta else ''
+    registro.registra_fonte(prefixo + 'http', client.transporte.estatisticas)
+    registro.registra_fonte(prefixo + 'respostas_json', client.modelo.estatisticas)
+    registro.registra_fonte(prefixo + 'credenciais', client.credenciais.estatisticas)
+    if client.limitador is not None:
+        registro.registra_fonte(prefixo + 'cota', client.limitador.estatisticas)
+    registro.registra_fonte('pool_banco', db_instance.estatisticas_pool)
+
+    arquivo = config.get('stats_arquivo')
+    if salva and arquivo:
+        # Registrada por último: roda depois da gravação dos contatos coletados
+        aux.ao_encerrar(lambda: registro.salva(arquivo))
+
+
+def prepara_cache(client, db_instance, coletor=None):
+    """
+    Liga o cliente ao cache e ao coletor de contatos e registra o que deve
+    ser encerrado ao sair.
+
+    Args:
+        client (gmail_server.EmailClient): O cliente autenticado.
+        db_instance (data_base.DataBase): Instância do banco de dados.
+        coletor (ColetorContatos, opcional): Coletor já criado para outra
+                                             conta; os contatos vão para o
+                                             mesmo banco. Se omitido, um
+                                             novo é criado.
+
+    Returns:
+        gmail_server.Email_Cache: O cache de e-mails.
+    """
+    cache = gmail_server.Email_Cache()
+    cache.set_data_base(db_instance)
+    aux.ao_encerrar(client.credenciais.para)
+    aux.ao_encerrar(client.transporte.close)
+    cache.set_service(client)
+    client.set_cache_clas(cache)
+    primeiro = coletor is None
+    if primeiro:
+        coletor = coletor_contatos.ColetorContatos(db_instance, config.get('coleta_lote'),
+                                                   config.get('coleta_intervalo'))
+        aux.ao_encerrar(coletor.fecha)
+    client.set_coletor(coletor)
+    registra_estatisticas(client, db_instance, salva=primeiro)
+    return cache
+
+
+def abre_contas(futuros, email, opcoes, db_instance):
+    """
+    Aguarda os clientes das contas, cria o cache e o aquecedor de cada uma
+    e retorna o gerenciador das contas, com a principal ativa.
+
+    Args:
+        futuros (dict[str, Future]): Os clientes de `inicia_client`, pelo nome da conta.
+        email (gmail_server.Email): Objeto repassado ao EmailClient.
+        opcoes (dict[str, dict]): As opções de cada conta (`contas.configuradas`).
+        db_instance (data_base.DataBase): Instância do banco de dados.
+
+    Returns:
+        contas.GerenciadorContas: As contas abertas.
+    """
+    abertas, coletor = [], None
+    for nome, futuro in futuros.items():
+        client = obtem_client(futuro, email, nome if len(futuros) > 1 else None, opcoes[nome])
+        cache = prepara_cache(client, db_instance, coletor)
+        coletor = client.coletor
+        abertas.append(contas.Conta(nome, client, cache, inicia_aquecedor(client, cache)))
+    return contas.GerenciadorContas(abertas)
+
+
+def inicia_aquecedor(client, cache):
+    """
+    Inicia o aquecedor do cache, se 'aquecedor_ativo' estiver ligado, e
+    registra as suas estatísticas e o seu encerramento.
+
+    Args:
+        client (gmail_server.EmailClient): O cliente autenticado.
+        cache (gmail_server.Email_Cache): O cache de e-mails.
+
+    Returns:
+        aquecedor.AquecedorCache | None: O aquecedor, ou None se desligado.
+    """
+    if not config.get('aquecedor_ativo'):
+        return None
+    aquecedor_ = aquecedor.AquecedorCache(client, cache, config.get('aquecedor_buscas'),
+                                          config.get('aquecedor_limite'), config.get('aquecedor_intervalo'),
+                                          config.get('aquecedor_utilizacao'))
+    prefixo = f'{client.conta}.' if client.conta else ''
+    instrumentacao.registro.registra_fonte(prefixo + 'aquecedor', aquecedor_.estatisticas)
+    aux.ao_encerrar(aquecedor_.fecha)
+    return aquecedor_
+
+
+def prompt_principal(gerenciador_):
+    """
+    Retorna o prompt do loop principal, com a conta ativa (havendo várias)
+    e as mensagens novas vistas pelos aquecedores (lidas sem bloquear).
+    """
+    local = gerenciador_.ativa.nome if gerenciador_.varias else 'main'
+    novas = gerenciador_.novas
+    if novas:
+        return f'\nmain@[{local} +{novas} nova{"s" if novas > 1 else ""}]~ '
+    return f'\nmain@[{local}]~ '
+
+
+def executa_lote(argumentos):
+    """
+    Modo em lote: executa os comandos do arquivo de --batch sem prompts.
+
+    Apenas credenciais salvas são usadas (sem fluxo OAuth no navegador) e
+    não há login no aplicativo. A senha do MySQL, se necessária, vem da
+    variável de ambiente EMAIL_CONSOLE_DB_SENHA. Os resultados vão para a
+    saída padrão em JSON Lines; as mensagens do programa vão para stderr.
+
+    Args:
+        argumentos (argparse.Namespace): As opções lidas por `le_argumentos`.
+
+    Returns:
+        int: Código de saída: 0 se todos os comandos deram certo, 1 se algum
+             falhou e 2 se não foi possível iniciar.
+    """
+    saida = sys.stdout
+    sys.stdout = sys.stderr
+
+    email = gmail_server.Email()
+    futuro_client = inicia_client(email)
+    try:
+        db_instance = data_base.abre_data_base(os.environ.get('EMAIL_CONSOLE_DB_SENHA'))
+    except data_base.ErroBanco as error:
+        print(f'Error: {error}')
+        return 2
+    try:
+        client = futuro_client.result()
+    except gmail_server.AutenticacaoNecessaria as error:
+        print(f'Error: {error} (execute o programa uma vez no modo interativo para autorizar)')
+        db_instance.fecha_cnx()
+        return 2
+    except Exception as error:
+        # Rede fora do ar, credenciais corrompidas, falha ao montar o serviço...
+        print(f'Error: não foi possível conectar ao Gmail: {error}')
+        db_instance.fecha_cnx()
+        return 2
+
+    cache = prepara_cache(client, db_instance)
+    tarefas = argumentos.jobs or config.get('lote_tarefas')
+    executor = modo_lote.ExecutorLote(cache, client, db_instance, saida, tarefas, argumentos.corpo)
+    try:
+        with modo_lote.abre_linhas(argumentos.batch) as linhas:
+            falhas = executor.executa(linhas)
+    finally:
+        aux.finaliza(db_instance)
+    return 1 if falhas else 0
+
+
 def login_ou_cadastro(db_instance, entrada):
     """
     Gerencia o processo de login ou criação de novo usuário.
@@ -142,70 +577,136 @@ def login_ou_cadastro(db_instance, entrada):
                         print('\aInválido: new != check')
 
 
-def main(cache, client, db_instance, entrada):
+def main(gerenciador_, db_instance, entrada):
     """
     Loop principal da aplicação que gerencia a interação com o usuário.
 
-    Oferece opções para enviar e-mails, buscar e-mails e obter ajuda.
+    Oferece opções para enviar e-mails, buscar e-mails e obter ajuda. Os
+    comandos usam o cache e o cliente da conta ativa; os aquecedores das
+    contas ficam pausados durante as chamadas à API de cada comando, mas
+    não enquanto o usuário lê os resultados ou confirma um envio.
 
     Args:
-        cache (Email_Cache): Instância do cache de e-mails.
-        client (EmailClient): Instância do cliente de e-mail.
+        gerenciador_ (GerenciadorContas): As contas abertas.
         db_instance (DataBase): Instância do banco de dados para contatos.
         entrada (Entrada): Instância para gerenciar a entrada do usuário.
     """
     while True:
-        entrada.entrada('\nmain@[main]~ ')
+        entrada.entrada(prompt_principal(gerenciador_))
         aux.encerra_programa(entrada.comando, db_instance)
         comando = entrada.comando
         if comando:
-            if comando == 'send':
-                para = entrada.contatos
-                if para:
-                    ass = entrada.assunto
-                    msg = entrada.mensagem
-                    arqvs = entrada.arquivos
-                    entrada.entrada(f'Enviar?\npara: {para}\nassunto: {ass}\nmensagem: {msg}\narquivos: {arqvs}\n(S/*): ')
-                    comando = entrada.comando
-                    if comando == 'S':
-                        msgs = client.write_email(para, ass, msg, arqvs)
-                        db_instance.salva_contatos(para)
-                        client.send_email(msgs)
-                    else:
-                        print('Cancelada')
-                else:
-                    print('\aDestinatário nescesário')
-            elif comando == 'search':
-                query = entrada.query
-                limite = entrada.limite
-                try:
-                    limite = int(limite)
-                except ValueError:
-                    print(f'Error: {limite} inválido')
-                    continue
-                buscados = cache.search_emails(limite, query)
-                imprime_emails(buscados)
-            elif comando == 'help':
-                entrada.ajuda()
-            else:
-                print(f'\nComando <{comando}> incorreto')
+            ativa = gerenciador_.ativa
+            executa_comando(comando, ativa.cache, ativa.client, db_instance, entrada, gerenciador_)
         else:
             print('Nada a fazer...')
 
 
+def executa_comando(comando, cache, client, db_instance, entrada, gerenciador_):
+    """
+    Executa um comando do loop principal.
+
+    Args:
+        comando (str): O comando lido por `entrada`.
+        cache (Email_Cache): Instância do cache de e-mails da conta ativa.
+        client (EmailClient): Instância do cliente de e-mail da conta ativa.
+        db_instance (DataBase): Instância do banco de dados para contatos.
+        entrada (Entrada): Instância para gerenciar a entrada do usuário.
+        gerenciador_ (GerenciadorContas): As contas abertas.
+    """
+    if comando == 'send':
+        para = entrada.contatos
+        if para:
+            ass = entrada.assunto
+            msg = entrada.mensagem
+            arqvs = entrada.arquivos
+            entrada.entrada(f'Enviar?\npara: {para}\nassunto: {ass}\nmensagem: {msg}\narquivos: {arqvs}\n(S/*): ')
+            comando = entrada.comando
+            if comando == 'S':
+                with gerenciador_.pausa(), perfil.comando('send'):
+                    msgs = client.write_email(para, ass, msg, arqvs)
+                    db_instance.salva_contatos(para)
+                    client.send_email(msgs)
+            else:
+                print('Cancelada')
+        else:
+            print('\aDestinatário nescesário')
+    elif comando == 'search':
+        query = entrada.query
+        limite = entrada.limite
+        try:
+            limite = int(limite)
+        except ValueError:
+            print(f'Error: {limite} inválido')
+            return
+        relatorio = gmail_server.RelatorioBusca()
+        # Os aquecedores voltam ao trabalho (e o perfilador para) enquanto
+        # os resultados são lidos
+        with gerenciador_.pausa(), perfil.comando('search'):
+            if entrada.contas:
+                buscados = busca_contas(gerenciador_, query, limite, entrada.contas, relatorio)
+            elif entrada.conversas and not entrada.local:
+                buscados = cache.search_threads(limite, query, relatorio)
+            else:
+                buscados = cache.search_emails(limite, query, entrada.local, relatorio)
+        gerenciador_.zera_novas()
+        if not relatorio.completa:
+            print(f'\aAtenção: {relatorio}')
+        imprime_emails(buscados)
+    elif comando == 'account':
+        if entrada.conta:
+            try:
+                gerenciador_.usa(entrada.conta)
+            except ValueError as error:
+                print(f'\aError: {error}')
+                return
+        print(' '.join(f'[{nome}]' if nome == gerenciador_.ativa.nome else nome for nome in gerenciador_.nomes))
+    elif comando == 'count':
+        with gerenciador_.pausa(), perfil.comando('count'):
+            conta(client, entrada)
+    elif comando == 'export':
+        with gerenciador_.pausa(), perfil.comando('export'):
+            exporta(client, entrada)
+    elif comando == 'import':
+        with gerenciador_.pausa(), perfil.comando('import'):
+            importa(cache, entrada)
+    elif comando == 'stats':
+        print(instrumentacao.registro.texto())
+    elif comando == 'timers':
+        if entrada.timers in ('on', 'off'):
+            perfil.ativa_cronometros(entrada.timers == 'on')
+        print(f'cronômetros {"ligados" if perfil.cronometros_ativos() else "desligados"}')
+    elif comando == 'help':
+        entrada.ajuda()
+    else:
+        print(f'\nComando <{comando}> incorreto')
+
+
 if __name__ == '__main__':
     SCOPES = ['https://www.googleapis.com/auth/gmail.modify']
+    aux.marca_inicio(_INICIO)
+    argumentos = le_argumentos()
+    perfil.ativa_cronometros(config.get('perfil_cronometros'))
+    if argumentos.profile:
+        perfilador = perfil.inicia(argumentos.profile, argumentos.profile_comando)
+        aux.ao_encerrar(perfilador.salva)
+    if argumentos.batch:
+        sys.exit(executa_lote(argumentos))
     entrada = aux.Entrada()
 
+    # Autentica no Gmail (cada conta em uma thread) em paralelo com o login
+    # no banco e no aplicativo
+    email = gmail_server.Email()
+    configuradas = contas.configuradas()
+    varias = len(configuradas) > 1
+    futuros = {nome: inicia_client(email, nome if varias else None, opcoes)
+               for nome, opcoes in configuradas.items()}
+
     # Valida a conexão com o banco de dados uma única vez
     db_instance = valida_data_base()
     aux.Autocomplete(db_instance)
 
     # Tenta o login ou a criação de usuário
     if login_ou_cadastro(db_instance, entrada):
-        email = gmail_server.Email()
-        cache = gmail_server.Email_Cache()
-        client = gmail_server.EmailClient(email)
-        cache.set_service(client)
-        client.set_cache_clas(cache)
-        main(cache, client, db_instance, entrada)
+        gerenciador = abre_contas(futuros, email, configuradas, db_instance)
+        main(gerenciador, db_instance, entrada)
@@ -0,0 +1,96 @@
+import hashlib
+from email import policy
+from email.parser import BytesParser
+from email.utils import parsedate_to_datetime
+
+# Cabeçalhos lidos e o campo correspondente do Email
+_CABECALHOS = {'Subject': 'assunto', 'From': 'remetente', 'To': 'destinatario', 'Cc': 'copia', 'Date': 'data'}
+
+# Um analisador por processo; o policy.default decodifica cabeçalhos (RFC 2047) e corpos
+_analisador = BytesParser(policy=policy.default)
+
+
+def analisa(bruto, id_msg=None):
+    """
+    Analisa uma mensagem RFC 822 (a de um .eml, de um mbox ou do
+    format='raw' da API) com o pacote `email` da biblioteca padrão.
+
+    O resultado tem os mesmos campos usados por `Email`, mais 'data_ts',
+    e só contém tipos simples, podendo voltar de outro processo.
+
+    Args:
+        bruto (bytes): A mensagem original.
+        id_msg (str, opcional): ID da mensagem. Se omitido, usa o
+                                Message-ID ou, sem ele, um hash do conteúdo.
+
+    Returns:
+        dict: Os dados do e-mail: id, assunto, remetente, destinatario,
+              copia, data, data_ts (segundos desde a época ou None),
+              corpo_texto, corpo_html e anexos (nome, tipo e tamanho).
+    """
+    mensagem = _analisador.parsebytes(bruto)
+    dados = {campo: _cabecalho(mensagem, nome) for nome, campo in _CABECALHOS.items()}
+    dados['id'] = id_msg or _identificador(mensagem, bruto)
+    dados['data_ts'] = data_ts(dados['data'])
+    dados['corpo_texto'] = ''
+    dados['corpo_html'] = ''
+    dados['anexos'] = []
+
+    for parte in mensagem.walk():
+        if parte.is_multipart():
+            continue
+        tipo = parte.get_content_type()
+        nome = parte.get_filename()
+        if parte.is_attachment() or (nome and tipo not in ('text/plain', 'text/html')):
+            conteudo = parte.get_payload(decode=True) or b''
+            dados['anexos'].append({'filename': nome or '', 'mime_type': tipo, 'data': None,
+                                    'tamanho': len(conteudo)})
+        # O primeiro texto simples e o primeiro HTML são os corpos; os demais
+        # (por exemplo, mensagens encaminhadas) ficam de fora
+        elif tipo == 'text/plain' and not dados['corpo_texto']:
+            dados['corpo_texto'] = _texto(parte)
+        elif tipo == 'text/html' and not dados['corpo_html']:
+            dados['corpo_html'] = _texto(parte)
+    return dados
+
+
+def _cabecalho(mensagem, nome):
+    try:
+        return str(mensagem.get(nome, ''))
+    except (ValueError, LookupError, IndexError, AttributeError):
+        # Cabeçalho malformado: usa o texto original, sem decodificação
+        for chave, valor in mensagem.raw_items():
+            if chave.lower() == nome.lower():
+                return valor.encode('utf-8', 'surrogateescape').decode('utf-8', 'replace')
+        return ''
+
+
+def _identificador(mensagem, bruto):
+    message_id = _cabecalho(mensagem, 'Message-ID').strip().strip('<>')
+    return message_id or 'sha1:' + hashlib.sha1(bruto).hexdigest()
+
+
+def data_ts(data):
+    """
+    Converte o cabeçalho Date em segundos desde a época, ou None se não
+    puder ser interpretado.
+    """
+    try:
+        return int(parsedate_to_datetime(data).timestamp())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+def _texto(parte):
+    """
+    Corpo de uma parte de texto no charset declarado; com charset
+    desconhecido ou inválido, tenta UTF-8 e depois Windows-1252.
+    """
+    try:
+        return parte.get_content()
+    except (LookupError, UnicodeError, ValueError):
+        conteudo = parte.get_payload(decode=True) or b''
+        try:
+            return conteudo.decode('utf-8')
+        except UnicodeDecodeError:
+            return conteudo.decode('cp1252', errors='replace')
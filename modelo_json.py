@@ -0,0 +1,73 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from googleapiclient.model import JsonModel
+
+
+class ModeloMedido(JsonModel):
+    """
+    Modelo JSON do googleapiclient que mede cada resposta da API.
+
+    Registra, por rótulo (caso de uso), o número de respostas, o tamanho do
+    corpo JSON (já descomprimido) e o tempo gasto em `json.loads`. O rótulo
+    vale para as requisições executadas pela thread dentro de `medindo()`.
+    """
+
+    def __init__(self):
+        super().__init__(data_wrapper=False)
+        self.__contexto = threading.local()
+        self.__trava = threading.Lock()
+        self.__medidas = {}
+
+    @contextmanager
+    def medindo(self, rotulo):
+        """
+        Atribui `rotulo` às respostas recebidas pela thread atual no bloco.
+        """
+        anterior = getattr(self.__contexto, 'rotulo', None)
+        self.__contexto.rotulo = rotulo
+        try:
+            yield
+        finally:
+            self.__contexto.rotulo = anterior
+
+    def deserialize(self, content):
+        inicio = time.perf_counter()
+        corpo = super().deserialize(content)
+        duracao = time.perf_counter() - inicio
+
+        rotulo = getattr(self.__contexto, 'rotulo', None) or 'outros'
+        with self.__trava:
+            medida = self.__medidas.setdefault(rotulo, [0, 0, 0.0])
+            medida[0] += 1
+            medida[1] += len(content)
+            medida[2] += duracao
+        return corpo
+
+    def zera(self):
+        """
+        Descarta as medidas acumuladas.
+        """
+        with self.__trava:
+            self.__medidas.clear()
+
+    def estatisticas(self):
+        """
+        Retorna as medidas por rótulo.
+
+        Returns:
+            dict: {rótulo: {'respostas', 'bytes', 'bytes_medio',
+                  'parse_ms', 'parse_medio_ms'}}
+        """
+        with self.__trava:
+            return {
+                rotulo: {
+                    'respostas': n,
+                    'bytes': tamanho,
+                    'bytes_medio': round(tamanho / n),
+                    'parse_ms': round(duracao * 1000, 3),
+                    'parse_medio_ms': round(duracao * 1000 / n, 3),
+                }
+                for rotulo, (n, tamanho, duracao) in self.__medidas.items()
+            }
@@ -0,0 +1,198 @@
+import contextlib
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import aux
+import config
+import exportacao
+import importador
+import instrumentacao
+from gmail_server import RelatorioBusca
+
+
+class ErroLote(Exception):
+    """Erro em um comando do lote, reportado na linha de resultado."""
+
+
+class ExecutorLote:
+    """
+    Executa comandos (search=, count=, send=, export=, import=, ...) lidos de um arquivo ou da entrada
+    padrão, sem prompts, paginação ou navegador.
+
+    Cada comando gera uma linha JSON (JSON Lines) na saída, com o número da
+    linha de origem, o comando, se deu certo, a duração e o resultado ou o
+    erro. Com `tarefas` > 1 os comandos rodam ao mesmo tempo em threads,
+    compartilhando o cliente (pool HTTP) e o cache; as linhas saem na ordem
+    em que terminam.
+    """
+
+    def __init__(self, cache, client, db_instance, saida=None, tarefas=1, corpo=False):
+        """
+        Args:
+            cache (Email_Cache): Instância do cache de e-mails.
+            client (EmailClient): Cliente autenticado.
+            db_instance (DataBase): Banco de dados dos contatos.
+            saida (arquivo, opcional): Onde as linhas JSON são escritas. O
+                                       padrão é a saída padrão.
+            tarefas (int, opcional): Comandos executados ao mesmo tempo. O padrão é 1.
+            corpo (bool, opcional): Inclui os corpos dos e-mails nos
+                                    resultados de search=. O padrão é False.
+        """
+        self.__cache = cache
+        self.__client = client
+        self.__db_instance = db_instance
+        self.__saida = saida or sys.stdout
+        self.__tarefas = max(1, tarefas)
+        self.__corpo = corpo
+        self.__trava = threading.Lock()
+        self.__falhas = 0
+        # Comandos aceitos. Os de navegação (show=, next=, ...) dependem da
+        # tela interativa e não se aplicam.
+        self.__acoes = {
+            'search': self.__search,
+            'count': self.__count,
+            'send': self.__send,
+            'export': self.__export,
+            'import': self.__import,
+            'stats': self.__stats,
+        }
+
+    def executa(self, linhas):
+        """
+        Executa todos os comandos de `linhas`. Linhas vazias e iniciadas
+        por '#' são ignoradas.
+
+        Args:
+            linhas (iterable[str]): As linhas de comando.
+
+        Returns:
+            int: O número de comandos que falharam.
+        """
+        comandos = ((numero, linha.strip()) for numero, linha in enumerate(linhas, 1))
+        comandos = ((numero, linha) for numero, linha in comandos if linha and not linha.startswith('#'))
+
+        if self.__tarefas == 1:
+            for numero, linha in comandos:
+                self.__escreve(self.__executa_linha(numero, linha))
+            return self.__falhas
+
+        with ThreadPoolExecutor(max_workers=self.__tarefas, thread_name_prefix='lote') as executor:
+            pendentes = set()
+            for numero, linha in comandos:
+                pendentes.add(executor.submit(self.__executa_linha, numero, linha))
+                # Limita as linhas lidas à frente, para arquivos muito grandes
+                if len(pendentes) >= self.__tarefas * 4:
+                    feito = next(as_completed(pendentes))
+                    pendentes.remove(feito)
+                    self.__escreve(feito.result())
+            for feito in as_completed(pendentes):
+                self.__escreve(feito.result())
+        return self.__falhas
+
+    def __escreve(self, resultado):
+        with self.__trava:
+            if not resultado['ok']:
+                self.__falhas += 1
+            self.__saida.write(json.dumps(resultado, ensure_ascii=False) + '\n')
+            self.__saida.flush()
+
+    def __executa_linha(self, numero, linha):
+        """
+        Interpreta e executa uma linha, sem deixar exceções escaparem.
+
+        Returns:
+            dict: A linha de resultado.
+        """
+        entrada = aux.Entrada()
+        entrada.interpreta(linha)
+        comando = entrada.comando
+        resultado = {'linha': numero, 'comando': comando}
+        inicio = time.perf_counter()
+        try:
+            if comando not in self.__acoes:
+                raise ErroLote(f'comando inválido no modo em lote: {linha}')
+            with instrumentacao.mede(f'lote.{comando}'):
+                resultado['resultado'] = self.__acoes[comando](entrada)
+            resultado['ok'] = True
+        except ErroLote as error:
+            resultado['ok'] = False
+            resultado['erro'] = str(error)
+        except Exception as error:
+            resultado['ok'] = False
+            resultado['erro'] = f'{type(error).__name__}: {error}'
+        resultado['ms'] = round((time.perf_counter() - inicio) * 1000, 1)
+        return resultado
+
+    def __search(self, entrada):
+        try:
+            limite = entrada.limite
+        except ValueError:
+            raise ErroLote(f'limit= inválido na busca: {entrada.query}')
+        if not entrada.query:
+            raise ErroLote('search= exige uma query')
+        relatorio = RelatorioBusca()
+        if entrada.conversas and not entrada.local:
+            conversas = self.__cache.search_threads(limite, entrada.query, relatorio) or []
+            return {'query': entrada.query, 'total': len(conversas), **relatorio.para_dict(),
+                    'conversas': [conversa.para_dict() for conversa in conversas]}
+        emails = self.__cache.search_emails(limite, entrada.query, entrada.local, relatorio) or []
+        return {'query': entrada.query, 'total': len(emails), **relatorio.para_dict(),
+                'emails': [email_.para_dict(self.__corpo) for email_ in emails]}
+
+    def __count(self, entrada):
+        if not entrada.query:
+            raise ErroLote('count= exige uma query')
+        return self.__client.contagem(entrada.query, entrada.exata)
+
+    def __send(self, entrada):
+        if not entrada.contatos:
+            raise ErroLote('Destinatário nescesário')
+        msgs = self.__client.write_email(entrada.contatos, entrada.assunto, entrada.mensagem, entrada.arquivos)
+        self.__db_instance.salva_contatos(entrada.contatos)
+        falhas = self.__client.send_email(msgs)
+        if falhas:
+            raise ErroLote('; '.join(f'{des}: {erro}' for des, erro in falhas))
+        return {'para': entrada.contatos, 'assunto': entrada.assunto}
+
+    def __export(self, entrada):
+        try:
+            limite = entrada.limite_exportacao
+        except ValueError:
+            raise ErroLote(f'limit= inválido na exportação: {entrada.query}')
+        try:
+            exportador = exportacao.Exportador(self.__client, entrada.destino, entrada.formato,
+                                               config.get('http_pool_tamanho'))
+            return exportador.exporta(entrada.query, limite, entrada.retoma)
+        except exportacao.ErroExportacao as error:
+            raise ErroLote(str(error))
+
+    def __import(self, entrada):
+        if not entrada.arquivos:
+            raise ErroLote('import= exige um arquivo ou diretório')
+        resumo = importador.Importador(self.__cache, config.get('importa_processos'),
+                                       config.get('importa_lote')).importa(entrada.arquivos)
+        if 'erro' in resumo:
+            raise ErroLote(f'import= interrompido após {resumo["novas"]} mensagens novas: {resumo["erro"]}')
+        return resumo
+
+    def __stats(self, entrada):
+        return instrumentacao.registro.resumo()
+
+
+def abre_linhas(caminho):
+    """
+    Abre o arquivo de comandos; '-' é a entrada padrão.
+
+    Args:
+        caminho (str): Caminho do arquivo ou '-'.
+
+    Returns:
+        arquivo: O arquivo aberto, iterável por linhas, para uso em um
+                 `with`. A entrada padrão não é fechada na saída.
+    """
+    if caminho == '-':
+        return contextlib.nullcontext(sys.stdin)
+    return open(caminho, 'r', encoding='utf-8')
@@ -0,0 +1,154 @@
+import cProfile
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+
+import instrumentacao
+
+# Cronômetros dos caminhos críticos ligados ou não (alterável em execução)
+_cronometros = True
+
+# Perfilador da sessão, criado por `inicia` quando o programa recebe --profile
+_perfilador = None
+
+
+def ativa_cronometros(ativo):
+    """
+    Liga ou desliga os cronômetros dos caminhos críticos.
+
+    Args:
+        ativo (bool): True para medir, False para chamar as funções sem medição.
+    """
+    global _cronometros
+    _cronometros = bool(ativo)
+
+
+def cronometros_ativos():
+    """Retorna se os cronômetros estão ligados."""
+    return _cronometros
+
+
+def cronometra(funcao):
+    """
+    Decorador que mede cada chamada de `funcao` como a operação
+    'perfil.<Classe>.<função>' em `instrumentacao.registro`, visível no
+    comando stats=.
+
+    Em funções recursivas só a chamada mais externa é medida. Em geradores
+    é somado apenas o tempo gasto dentro do gerador, sem o tempo de quem o
+    consome, e a chamada é registrada quando ele termina ou é fechado.
+    """
+    nome = f'perfil.{funcao.__qualname__}'
+    profundidade = threading.local()
+
+    if inspect.isgeneratorfunction(funcao):
+        @functools.wraps(funcao)
+        def gerador(*args, **kwargs):
+            if not _cronometros:
+                yield from funcao(*args, **kwargs)
+                return
+            interno = funcao(*args, **kwargs)
+            total = 0.0
+            try:
+                while True:
+                    inicio = time.perf_counter()
+                    try:
+                        item = next(interno)
+                    finally:
+                        total += time.perf_counter() - inicio
+                    yield item
+            except StopIteration:
+                return
+            finally:
+                interno.close()
+                instrumentacao.registro.registra(nome, total * 1000)
+        return gerador
+
+    @functools.wraps(funcao)
+    def medida(*args, **kwargs):
+        if not _cronometros or getattr(profundidade, 'n', 0):
+            return funcao(*args, **kwargs)
+        profundidade.n = 1
+        inicio = time.perf_counter()
+        try:
+            return funcao(*args, **kwargs)
+        finally:
+            profundidade.n = 0
+            instrumentacao.registro.registra(nome, (time.perf_counter() - inicio) * 1000)
+    return medida
+
+
+class Perfilador:
+    """
+    Captura um perfil cProfile da sessão inteira ou apenas das execuções de
+    um comando e o grava em um arquivo (legível com `pstats` ou snakeviz).
+
+    O cProfile mede apenas a thread principal; o trabalho das threads em
+    segundo plano aparece nos cronômetros e no comando stats=.
+    """
+
+    def __init__(self, arquivo, comando=None):
+        """
+        Args:
+            arquivo (str): Arquivo onde o perfil é gravado.
+            comando (str, opcional): Se informado, só as execuções deste
+                                     comando (por exemplo, 'search') são
+                                     perfiladas. Se omitido, a sessão toda.
+        """
+        self.__arquivo = arquivo
+        self.__comando = comando
+        self.__perfil = cProfile.Profile()
+        if comando is None:
+            self.__perfil.enable()
+
+    @contextmanager
+    def comando(self, nome):
+        """
+        Perfila o bloco se `nome` for o comando escolhido.
+        """
+        if nome != self.__comando:
+            yield
+            return
+        self.__perfil.enable()
+        try:
+            yield
+        finally:
+            self.__perfil.disable()
+
+    def salva(self):
+        """
+        Encerra a captura e grava o perfil.
+        """
+        self.__perfil.disable()
+        self.__perfil.dump_stats(self.__arquivo)
+        print(f'perfil gravado em {self.__arquivo}')
+
+
+def inicia(arquivo, comando=None):
+    """
+    Cria o perfilador da sessão.
+
+    Args:
+        arquivo (str): Arquivo onde o perfil é gravado.
+        comando (str, opcional): Comando a perfilar; a sessão toda se omitido.
+
+    Returns:
+        Perfilador: O perfilador criado.
+    """
+    global _perfilador
+    _perfilador = Perfilador(arquivo, comando)
+    return _perfilador
+
+
+@contextmanager
+def comando(nome):
+    """
+    Marca a execução de um comando do loop principal. Sem --profile, não faz nada.
+    """
+    if _perfilador is None:
+        yield
+        return
+    with _perfilador.comando(nome):
+        yield
@@ -0,0 +1,221 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class PoolEsgotado(Exception):
+    """
+    Lançada quando nenhuma conexão fica livre dentro do tempo de espera.
+    """
+
+
+class PoolConexoes:
+    """
+    Mantém um conjunto de conexões reutilizáveis com o banco de dados.
+
+    As conexões são criadas sob demanda até o limite `tamanho` e devolvidas
+    ao pool após o uso. Antes de reutilizar uma conexão que ficou ociosa por
+    muito tempo, o pool executa uma verificação de saúde; conexões mortas
+    (por exemplo, derrubadas pelo `wait_timeout` do servidor) são
+    descartadas e substituídas por uma nova, de forma transparente.
+
+    A classe é segura para uso por várias threads ao mesmo tempo.
+    """
+
+    def __init__(self, fabrica, tamanho=4, espera=10.0, verifica=None, verifica_apos=30.0,
+                 conexao_inicial=None):
+        """
+        Inicializa o pool.
+
+        Args:
+            fabrica (callable): Função sem argumentos que abre uma nova conexão.
+            tamanho (int, opcional): Número máximo de conexões. O padrão é 4.
+            espera (float, opcional): Tempo máximo, em segundos, de espera por
+                                      uma conexão livre. O padrão é 10.
+            verifica (callable, opcional): Função que recebe uma conexão e
+                                           retorna True se ela estiver viva.
+            verifica_apos (float, opcional): Conexões ociosas há mais que este
+                                             tempo (segundos) são verificadas
+                                             antes do uso. O padrão é 30.
+            conexao_inicial (objeto, opcional): Conexão já aberta que será
+                                                colocada no pool.
+        """
+        self.__fabrica = fabrica
+        self.__tamanho = max(1, int(tamanho))
+        self.__espera = espera
+        self.__verifica = verifica
+        self.__verifica_apos = verifica_apos
+
+        self.__trava = threading.Lock()
+        # Controla quantas conexões podem estar em uso ao mesmo tempo
+        self.__vagas = threading.BoundedSemaphore(self.__tamanho)
+        # Conexões livres, como tuplas (conexao, instante_da_devolucao)
+        self.__livres = deque()
+        self.__abertas = 0
+        self.__fechado = False
+        # Identificadores das conexões marcadas como defeituosas
+        self.__descartadas = set()
+
+        # Estatísticas
+        self.__aquisicoes = 0
+        self.__espera_total = 0.0
+        self.__espera_max = 0.0
+        self.__reconexoes = 0
+        self.__descartes = 0
+        self.__esgotamentos = 0
+
+        if conexao_inicial is not None:
+            self.__abertas = 1
+            self.__livres.append((conexao_inicial, time.monotonic()))
+
+    @contextmanager
+    def conexao(self):
+        """
+        Empresta uma conexão do pool durante o bloco `with`.
+
+        Yields:
+            objeto: Uma conexão viva com o banco de dados.
+
+        Raises:
+            PoolEsgotado: Se nenhuma conexão ficar livre dentro do tempo de espera.
+        """
+        cnx = self.__obtem()
+        try:
+            yield cnx
+        finally:
+            self.__devolve(cnx)
+
+    def descarta(self, cnx):
+        """
+        Marca uma conexão como defeituosa. Ela será fechada ao ser devolvida
+        em vez de voltar para o pool.
+
+        Args:
+            cnx (objeto): A conexão emprestada por `conexao()`.
+        """
+        with self.__trava:
+            self.__descartadas.add(id(cnx))
+
+    def fecha(self):
+        """
+        Fecha todas as conexões livres. Conexões em uso são fechadas quando
+        forem devolvidas.
+        """
+        with self.__trava:
+            self.__fechado = True
+            livres = list(self.__livres)
+            self.__livres.clear()
+            self.__abertas -= len(livres)
+        for cnx, _ in livres:
+            self.__fecha_cnx(cnx)
+
+    def estatisticas(self):
+        """
+        Retorna um resumo do uso do pool.
+
+        Returns:
+            dict: Tamanho, conexões abertas/livres, número de aquisições,
+                  tempo de espera (total, médio e máximo, em ms) e contagem
+                  de reconexões, descartes e esgotamentos.
+        """
+        with self.__trava:
+            media = self.__espera_total / self.__aquisicoes if self.__aquisicoes else 0.0
+            return {
+                'tamanho': self.__tamanho,
+                'abertas': self.__abertas,
+                'livres': len(self.__livres),
+                'aquisicoes': self.__aquisicoes,
+                'espera_total_ms': round(self.__espera_total * 1000, 3),
+                'espera_media_ms': round(media * 1000, 3),
+                'espera_max_ms': round(self.__espera_max * 1000, 3),
+                'reconexoes': self.__reconexoes,
+                'descartes': self.__descartes,
+                'esgotamentos': self.__esgotamentos,
+            }
+
+    def __obtem(self):
+        """
+        Aguarda uma vaga e retorna uma conexão livre e saudável, abrindo uma
+        nova se necessário.
+        """
+        inicio = time.monotonic()
+        if not self.__vagas.acquire(timeout=self.__espera):
+            with self.__trava:
+                self.__esgotamentos += 1
+            raise PoolEsgotado(f'Nenhuma conexão livre após {self.__espera}s')
+        esperou = time.monotonic() - inicio
+
+        try:
+            with self.__trava:
+                self.__aquisicoes += 1
+                self.__espera_total += esperou
+                self.__espera_max = max(self.__espera_max, esperou)
+                livre = self.__livres.pop() if self.__livres else None
+                if livre is None:
+                    self.__abertas += 1
+
+            if livre is None:
+                return self.__abre()
+
+            cnx, devolvida_em = livre
+            if time.monotonic() - devolvida_em > self.__verifica_apos and not self.__saudavel(cnx):
+                # Conexão morta: substitui por uma nova sem que o chamador perceba
+                self.__fecha_cnx(cnx)
+                with self.__trava:
+                    self.__reconexoes += 1
+                return self.__abre()
+            return cnx
+        except Exception:
+            self.__vagas.release()
+            raise
+
+    def __abre(self):
+        """
+        Abre uma nova conexão, desfazendo a reserva se a abertura falhar.
+        """
+        try:
+            return self.__fabrica()
+        except Exception:
+            with self.__trava:
+                self.__abertas -= 1
+            raise
+
+    def __devolve(self, cnx):
+        """
+        Devolve a conexão ao pool ou a fecha se ela tiver sido descartada.
+        """
+        try:
+            with self.__trava:
+                descartada = id(cnx) in self.__descartadas
+                self.__descartadas.discard(id(cnx))
+                if descartada or self.__fechado:
+                    self.__abertas -= 1
+                    self.__descartes += descartada
+                else:
+                    self.__livres.append((cnx, time.monotonic()))
+            if descartada or self.__fechado:
+                self.__fecha_cnx(cnx)
+        finally:
+            self.__vagas.release()
+
+    def __saudavel(self, cnx):
+        """
+        Executa a verificação de saúde configurada.
+        """
+        if self.__verifica is None:
+            return True
+        try:
+            return bool(self.__verifica(cnx))
+        except Exception:
+            return False
+
+    @staticmethod
+    def __fecha_cnx(cnx):
+        """
+        Fecha a conexão ignorando erros (ela pode já estar morta).
+        """
+        try:
+            cnx.close()
+        except Exception:
+            pass
@@ -0,0 +1,109 @@
+import http.client
+import random
+import threading
+import time
+
+from limitador import e_limite_taxa
+
+# Status HTTP de falhas temporárias do servidor
+STATUS_TEMPORARIOS = frozenset({500, 502, 503, 504})
+
+
+def status_http(error):
+    """
+    Retorna o status HTTP de um erro da API (`resp.status`), ou None se o
+    erro não veio de uma resposta HTTP (por exemplo, falha de conexão).
+    """
+    status = getattr(getattr(error, 'resp', None), 'status', None)
+    try:
+        return int(status)
+    except (TypeError, ValueError):
+        return None
+
+
+def classifica(error):
+    """
+    Classifica um erro de uma chamada à API.
+
+    Args:
+        error (Exception): O erro lançado por `execute()`.
+
+    Returns:
+        str: 'limite' (cota excedida: 429 ou 403 rateLimitExceeded),
+             'temporario' (5xx, timeout ou falha de conexão) ou 'fatal'
+             (demais respostas 4xx e erros do programa), que não adianta repetir.
+    """
+    if e_limite_taxa(error):
+        return 'limite'
+    status = status_http(error)
+    if status is not None:
+        return 'temporario' if status in STATUS_TEMPORARIOS else 'fatal'
+    # Sem resposta HTTP: rede (OSError inclui timeouts e conexões recusadas)
+    # ou erros do httplib2 (servidor não encontrado, resposta incompleta)
+    if isinstance(error, (OSError, http.client.HTTPException)) or type(error).__module__.startswith('httplib2'):
+        return 'temporario'
+    return 'fatal'
+
+
+class PoliticaRepeticao:
+    """
+    Repete chamadas que falharam por motivos passageiros, com espera
+    exponencial e aleatória ("full jitter"): antes da tentativa n, espera um
+    tempo sorteado entre 0 e min(maximo, base * 2^n) segundos. O sorteio
+    evita que várias threads que falharam juntas tentem de novo juntas.
+    """
+
+    def __init__(self, tentativas=5, base=0.5, maximo=30.0, semente=None):
+        """
+        Args:
+            tentativas (int, opcional): Número máximo de execuções, incluindo
+                                        a primeira. O padrão é 5.
+            base (float, opcional): Espera base, em segundos. O padrão é 0.5.
+            maximo (float, opcional): Espera máxima, em segundos. O padrão é 30.
+            semente (int, opcional): Semente do sorteio (para testes).
+        """
+        self.__tentativas = max(1, tentativas)
+        self.__base = base
+        self.__maximo = maximo
+        self.__rnd = random.Random(semente)
+        self.__trava = threading.Lock()
+
+    def espera(self, tentativa):
+        """
+        Retorna o tempo, em segundos, a esperar antes da nova tentativa de
+        número `tentativa` (1 para a primeira repetição).
+        """
+        with self.__trava:
+            return self.__rnd.uniform(0, min(self.__maximo, self.__base * 2 ** tentativa))
+
+    def executa(self, funcao, medida=None, idempotente=True):
+        """
+        Executa `funcao`, repetindo-a nos erros de limite de taxa e, se a
+        operação for idempotente, nos temporários.
+
+        Args:
+            funcao (callable): A chamada, sem argumentos.
+            medida (instrumentacao.Medida, opcional): Recebe o número de
+                                                      novas tentativas.
+            idempotente (bool, opcional): Se False (por exemplo, um envio),
+                                          só o limite de taxa, que garante
+                                          que a requisição não foi
+                                          processada, é repetido. O padrão é True.
+
+        Returns:
+            Any: O resultado de `funcao`.
+
+        Raises:
+            Exception: O último erro, se for fatal ou as tentativas acabarem.
+        """
+        for tentativa in range(self.__tentativas):
+            if medida is not None:
+                medida.tentativas = tentativa
+            try:
+                return funcao()
+            except Exception as error:
+                tipo = classifica(error)
+                repete = tipo == 'limite' or (tipo == 'temporario' and idempotente)
+                if not repete or tentativa + 1 >= self.__tentativas:
+                    raise
+                time.sleep(self.espera(tentativa + 1))
@@ -0,0 +1,145 @@
+import threading
+
+import instrumentacao
+from pool_conexoes import PoolConexoes
+
+# Guarda, por thread, o tamanho do corpo recebido antes da descompressão
+_medicao = threading.local()
+
+
+def _instala_medidor():
+    """
+    Intercepta a descompressão do httplib2 para registrar o tamanho do corpo
+    como veio da rede (comprimido). O httplib2 descompacta a resposta e
+    descarta o tamanho original, por isso a medição é feita aqui.
+    """
+    import httplib2
+
+    original = getattr(httplib2, '_decompressContent', None)
+    if original is None or getattr(original, '_medidor', False):
+        return
+
+    def descomprime(response, new_content):
+        _medicao.comprimido = len(new_content or b'')
+        return original(response, new_content)
+
+    descomprime._medidor = True
+    httplib2._decompressContent = descomprime
+
+
+class PoolHttp:
+    """
+    Transporte HTTP para o googleapiclient, seguro para várias threads.
+
+    O objeto `httplib2.Http` padrão não pode ser usado por duas threads ao
+    mesmo tempo. Esta classe mantém um pool de `AuthorizedHttp`, cada um com
+    suas conexões keep-alive por host, e empresta um deles a cada
+    requisição. Todas as requisições pedem respostas comprimidas
+    (`Accept-Encoding: gzip`).
+
+    Pode ser passado como `http=` para `build`/`build_from_document` e
+    registra conexões abertas e reutilizadas e os bytes recebidos antes e
+    depois da descompressão.
+    """
+
+    def __init__(self, credentials, tamanho=4, timeout=60, espera=30.0):
+        """
+        Inicializa o pool. As conexões são abertas sob demanda.
+
+        Args:
+            credentials (Credentials): Credenciais compartilhadas por todas
+                                       as conexões.
+            tamanho (int, opcional): Número máximo de requisições simultâneas.
+                                     O padrão é 4.
+            timeout (float, opcional): Timeout de socket, em segundos.
+            espera (float, opcional): Tempo máximo de espera por um
+                                      transporte livre, em segundos.
+        """
+        _instala_medidor()
+        # Lido pelo googleapiclient (por exemplo, em requisições em lote)
+        self.credentials = credentials
+        self.__timeout = timeout
+        self.__pool = PoolConexoes(self.__novo_http, tamanho=tamanho, espera=espera)
+
+        self.__trava = threading.Lock()
+        self.__requisicoes = 0
+        self.__conexoes_abertas = 0
+        self.__conexoes_reutilizadas = 0
+        self.__respostas_gzip = 0
+        self.__bytes_rede = 0
+        self.__bytes_descomprimidos = 0
+        self.__erros = 0
+
+    def __novo_http(self):
+        """
+        Cria um transporte autorizado com suas próprias conexões.
+        """
+        import google_auth_httplib2
+        import httplib2
+        return google_auth_httplib2.AuthorizedHttp(self.credentials, http=httplib2.Http(timeout=self.__timeout))
+
+    def request(self, uri, method='GET', body=None, headers=None, **kwargs):
+        """
+        Executa uma requisição HTTP com um transporte livre do pool.
+
+        Mesma assinatura de `httplib2.Http.request`.
+
+        Returns:
+            tuple: (resposta, conteúdo), como no httplib2.
+        """
+        headers = dict(headers or {})
+        headers.setdefault('accept-encoding', 'gzip')
+
+        with self.__pool.conexao() as http:
+            conexoes = len(http.http.connections)
+            _medicao.comprimido = None
+            try:
+                resposta, conteudo = http.request(uri, method=method, body=body, headers=headers, **kwargs)
+            except Exception:
+                # As conexões deste transporte podem ter ficado inválidas
+                self.__pool.descarta(http)
+                instrumentacao.registro.anota_requisicao(0)
+                with self.__trava:
+                    self.__erros += 1
+                raise
+            abriu = len(http.http.connections) > conexoes
+
+        descomprimidos = len(conteudo or b'')
+        rede = _medicao.comprimido if _medicao.comprimido is not None else descomprimidos
+        # Atribui os bytes à chamada da API em andamento nesta thread
+        instrumentacao.registro.anota_requisicao(rede)
+        with self.__trava:
+            self.__requisicoes += 1
+            self.__conexoes_abertas += abriu
+            self.__conexoes_reutilizadas += not abriu
+            self.__respostas_gzip += resposta.get('-content-encoding') == 'gzip'
+            self.__bytes_rede += rede
+            self.__bytes_descomprimidos += descomprimidos
+        return resposta, conteudo
+
+    def close(self):
+        """
+        Fecha todas as conexões livres.
+        """
+        self.__pool.fecha()
+
+    def estatisticas(self):
+        """
+        Retorna o resumo de uso do transporte.
+
+        Returns:
+            dict: Requisições, conexões abertas/reutilizadas, respostas gzip,
+                  bytes na rede e depois da descompressão, erros e o
+                  resumo do pool (tempo de espera etc.).
+        """
+        with self.__trava:
+            return {
+                'requisicoes': self.__requisicoes,
+                'conexoes_abertas': self.__conexoes_abertas,
+                'conexoes_reutilizadas': self.__conexoes_reutilizadas,
+                'respostas_gzip': self.__respostas_gzip,
+                'bytes_rede': self.__bytes_rede,
+                'bytes_descomprimidos': self.__bytes_descomprimidos,
+                'erros': self.__erros,
+                'pool': self.__pool.estatisticas(),
+            }